@@ -1,6 +1,35 @@
 from google.adk.agents import Agent
-import math
-from itertools import permutations
+import numpy as np
+from .mixing_engine import SearchBudget, lattice_divisions, find_best_ratios, find_best_ratios_continuous, find_best_ratios_branch_bound, find_best_ratios_branch_bound_sharded, find_best_ratios_warm, find_best_palette_mix, hull_distance_batch, roundtrip_slack, lattice_size, GRID_STEP, PALETTE_SHORTLIST, get_mix_lattice, rgb_distance_batch, delta_e_batch, palette_to_array, palette_key, lattice_cache, MIX_METRICS, MIX_MODELS
+from .result_cache import cache_from_env
+from .parallel_solver import executor_for, MIX_WORKERS
+from .colors import RGBColor, CMYKColor, MixMatch
+from .color_space import rgb_to_cmyk_array, cmyk_percentages
+from .gamut import get_palette_gamut, gamut_cache
+from .paint_catalog import get_paint_catalog, CATALOG_SPACES
+from .color_tables import get_color_tables, delta_e2000_batch, srgb_to_lab_exact
+from .paint_cover import minimal_recipes, CoverSearch, mask_indices, best_recipes, cover_work
+
+MIX_SOLVERS = ("grid", "continuous", "lattice", "branch_bound")
+FULL_SEARCH_SOLVERS = ("continuous", "branch_bound")  # Skipped for targets outside the palette's gamut
+ACCURACY_THRESHOLD = 50  # Max RGB distance for a mix to count as achievable
+MAX_DIRECT_COLORS = 3  # Larger palettes go through subset selection
+MAX_PALETTE_COLORS = 100
+MAX_MIX_PAINTS = 4
+MAX_BATCH_TARGETS = 1000
+MAX_CONVERT_COLORS = 10000
+MAX_PAINT_SUGGESTIONS = 10
+MAX_NEAREST_PAINTS = 20
+MAX_TOP_K = 10  # Recipes per target with top_k
+EXACT_SOLVERS = ("grid", "lattice", "branch_bound")  # Searches whose completed result is the optimum of their lattice
+MAX_COVER_TARGETS = 100
+MAX_COVER_SUBSETS = 250000  # Paint subsets a covering search may mix (e.g. 40 paints with max_paints 4)
+SUGGESTION_SHORTLIST = 64  # Unpruned catalog paints ranked by their linear hull distance
+
+# Mixing results are a pure function of palette, target and solver options
+mix_result_cache = cache_from_env("mix_results", "MIX_CACHE_SIZE", 4096, "MIX_CACHE_TTL", 0)
+# Last recipe per client session token, the starting point for the next nearby target
+mix_session_cache = cache_from_env("mix_sessions", "MIX_SESSION_CACHE_SIZE", 1024, "MIX_SESSION_TTL", 600)
 
 def rgb_to_cmyk(r: int, g: int, b: int):
     """Convert RGB values to CMYK with adjustments for real-life paint mixing."""
@@ -9,40 +38,21 @@ def rgb_to_cmyk(r: int, g: int, b: int):
         if not all(0 <= val <= 255 for val in [r, g, b]):
             return {"error": "RGB values must be between 0 and 255"}
         
-        # Normalize RGB values
-        r_prime = r / 255.0
-        g_prime = g / 255.0
-        b_prime = b / 255.0
-
-        # Calculate K (Black)
-        k = 1 - max(r_prime, g_prime, b_prime)
-
-        # Avoid introducing black for vibrant colors
-        if k > 0.5 and (r > 100 or g > 100 or b > 100):  # Adjust threshold for bright colors
-            k = 0
+        # K comes from the brightest channel; vibrant colors get no black (see CMYKColor)
+        cmyk = CMYKColor.from_rgb(r, g, b)
 
-        if k == 1:
+        if cmyk.k == 1:
             return {
                 "success": True,
                 "rgb": {"r": r, "g": g, "b": b},
-                "cmyk": {"c": 0, "m": 0, "y": 0, "k": 100},
+                "cmyk": cmyk.to_dict(),
                 "message": "Pure black color detected"
             }
 
-        # Calculate C, M, Y
-        c = (1 - r_prime - k) / (1 - k) if k < 1 else 0
-        m = (1 - g_prime - k) / (1 - k) if k < 1 else 0
-        y = (1 - b_prime - k) / (1 - k) if k < 1 else 0
-
         return {
             "success": True,
             "rgb": {"r": r, "g": g, "b": b},
-            "cmyk": {
-                "c": round(c * 100, 2),
-                "m": round(m * 100, 2),
-                "y": round(y * 100, 2),
-                "k": round(k * 100, 2)
-            },
+            "cmyk": cmyk.to_dict(),
             "message": f"Successfully converted RGB({r}, {g}, {b}) to CMYK"
         }
     
@@ -52,52 +62,289 @@ def rgb_to_cmyk(r: int, g: int, b: int):
             "error": f"Failed to convert RGB to CMYK: {str(e)}"
         }
 
-def calculate_color_mix_ratios(target_rgb: dict, user_colors: list):
-    """Calculate the best ratios to mix user colors to achieve target RGB using subtractive color theory."""
+def rgb_to_cmyk_batch(colors: list):
+    """Convert a list of RGB colors to CMYK in one vectorized call (same values as rgb_to_cmyk)."""
     try:
-        if not target_rgb or not user_colors or len(user_colors) > 3:
-            return {"error": "Invalid input. Provide target_rgb and up to 3 user_colors."}
-        
-        target_r, target_g, target_b = target_rgb["r"], target_rgb["g"], target_rgb["b"]
-        
-        # Generate permutations of ratios
-        ratios = [0.1 * i for i in range(11)]  # 0.0 to 1.0 in steps of 0.1
-        permutations_of_ratios = [p for p in permutations(ratios, len(user_colors)) if abs(sum(p) - 1.0) < 0.01]
-        
-        closest_match = None
-        min_distance = float("inf")
-        
-        # Find best ratio combination using subtractive mixing
-        for ratio_set in permutations_of_ratios:
-            # Convert RGB to CMYK for subtractive mixing
-            mixed_cmyk = subtractive_color_mix(user_colors, ratio_set)
-            # Convert back to RGB for comparison
-            mixed_rgb = cmyk_to_rgb(mixed_cmyk)
-            
-            # Calculate distance to target
-            distance = math.sqrt((mixed_rgb["r"] - target_r) ** 2 + (mixed_rgb["g"] - target_g) ** 2 + (mixed_rgb["b"] - target_b) ** 2)
-            
-            if distance < min_distance:
-                min_distance = distance
-                closest_match = {
-                    "ratios": ratio_set,
-                    "mixed_rgb": mixed_rgb,
-                    "mixed_cmyk": mixed_cmyk,
-                    "distance": distance
-                }
-        
-        # Convert target to CMYK
-        target_cmyk = rgb_to_cmyk(target_r, target_g, target_b)
+        if not colors or len(colors) > MAX_CONVERT_COLORS:
+            return {"error": f"Provide between 1 and {MAX_CONVERT_COLORS} colors"}
+        
+        for i, color in enumerate(colors):
+            if not isinstance(color, dict) or not all(key in color for key in ["r", "g", "b"]):
+                return {"error": f"colors[{i}] must contain r, g, b values"}
+        
+        rgb = np.array([[color["r"], color["g"], color["b"]] for color in colors], dtype=np.float64)
+        out_of_range = np.flatnonzero(((rgb < 0) | (rgb > 255)).any(axis=1))
+        if len(out_of_range):
+            return {"error": f"colors[{out_of_range[0]}]: RGB values must be between 0 and 255"}
+        
+        # Whole-number colors are looked up in the shared CMYK tables; fractional ones are converted directly
+        if np.array_equal(rgb, np.trunc(rgb)):
+            cmyk = get_color_tables().rgb_to_cmyk(rgb.astype(np.int64))
+        else:
+            cmyk = rgb_to_cmyk_array(rgb)
+        percentages = cmyk_percentages(cmyk).tolist()
+        return {
+            "success": True,
+            "cmyk": [{"c": c, "m": m, "y": y, "k": k} for c, m, y, k in percentages],
+            "count": len(colors),
+            "message": f"Successfully converted {len(colors)} colors to CMYK"
+        }
+    
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to convert RGB to CMYK: {str(e)}"
+        }
+
+def validate_mix_options(user_colors: list, solver: str, resolution: float, max_paints: int, metric: str = "rgb", model: str = "subtractive"):
+    """Return an error dict for an unusable palette or solver options, else None."""
+    if not user_colors or len(user_colors) > MAX_PALETTE_COLORS:
+        return {"error": f"Invalid input. Provide target_rgb and up to {MAX_PALETTE_COLORS} user_colors."}
+    
+    if not 1 <= max_paints <= MAX_MIX_PAINTS:
+        return {"error": f"max_paints must be between 1 and {MAX_MIX_PAINTS}"}
+    
+    if solver not in MIX_SOLVERS:
+        return {"error": f"Unknown solver '{solver}'. Use one of: {', '.join(MIX_SOLVERS)}"}
+    
+    if metric not in MIX_METRICS:
+        return {"error": f"Unknown metric '{metric}'. Use one of: {', '.join(MIX_METRICS)}"}
+    
+    if model not in MIX_MODELS:
+        return {"error": f"Unknown model '{model}'. Use one of: {', '.join(MIX_MODELS)}"}
+    
+    if solver == "branch_bound":
+        # Its bounds assume the subtractive mix and RGB distance
+        if model != "subtractive" or metric != "rgb":
+            return {"error": "The branch_bound solver supports the subtractive model with the rgb metric"}
+        if not 0.001 <= resolution <= 0.1:
+            return {"error": "resolution must be between 0.001 and 0.1"}
+        # The search is exhaustive at resolution itself, never at a rounded step
+        error = resolution_error(resolution)
+        if error:
+            return error
+    
+    if solver == "continuous":
+        if not 0.0001 <= resolution <= 0.1:
+            return {"error": "resolution must be between 0.0001 and 0.1"}
+        # Ratios are reported in steps of resolution, never of a rounded step
+        error = resolution_error(resolution)
+        if error:
+            return error
+    
+    return None
+
+def is_number(value):
+    """Whether a request value is a real number (JSON strings and booleans are not)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def resolution_error(resolution: float):
+    """Return an error dict for a ratio step that does not divide 1 evenly, else None."""
+    try:
+        lattice_divisions(resolution)
+    except ValueError:
+        return {"error": f"resolution must divide 1 evenly (e.g. 0.01, 0.02, 0.05), got {resolution}"}
+    return None
+
+def can_warm_start(solver: str, user_colors: list):
+    """Whether a session's previous recipe can speed up the next solve.
+
+    "continuous" refines the previous ratios; "branch_bound" is exact, so it only
+    gains on large palettes, where it reuses the previous paint subset.
+    """
+    return solver == "continuous" or (solver == "branch_bound" and len(user_colors) > MAX_DIRECT_COLORS)
+
+def search_work(user_colors: list, solver: str, resolution: float, max_paints: int):
+    """Ratio sets on the lattices a solve searches, which decides whether it runs in worker processes."""
+    if solver == "lattice":
+        return 0  # Answered from the in-process index
+    step = resolution if solver in ("continuous", "branch_bound") else GRID_STEP
+    if len(user_colors) > MAX_DIRECT_COLORS:
+        # Up to PALETTE_SHORTLIST subsets of every size
+        return sum(PALETTE_SHORTLIST * lattice_size(size, step) for size in range(1, min(max_paints, len(user_colors)) + 1))
+    return lattice_size(len(user_colors), step)
+
+def solve_color_mix(target_rgb: dict, user_colors: list, solver: str = "grid", resolution: float = 0.01, max_paints: int = MAX_MIX_PAINTS, metric: str = "rgb", model: str = "subtractive", warm_start: tuple = None, top_k: int = 1, budget: SearchBudget = None):
+    """Run the selected solver and return the closest match (a MixMatch), the indices of the paints it uses
+    and, for top_k > 1, up to top_k - 1 runner-up (MixMatch, paint indices) recipes.
+
+    warm_start is the (ratios, selected_colors) of a previous recipe for the same
+    palette and options; it is refined locally instead of searching from scratch.
+    budget (a SearchBudget) lets the solver return its best recipe early; its
+    stopped_by is set when it did.
+    """
+    # Score every candidate ratio set in one batch (see mixing_engine)
+    if warm_start is not None:
+        previous_ratios, previous_selected = warm_start
+        # Large palettes stay on the previously selected paints
+        subset = list(previous_selected) if len(user_colors) > MAX_DIRECT_COLORS else list(range(len(user_colors)))
+        colors = [user_colors[i] for i in subset]
+        if solver == "branch_bound":
+            best = find_best_ratios_branch_bound(target_rgb, colors, resolution, top_k=top_k, budget=budget)
+        else:
+            best = find_best_ratios_warm(target_rgb, colors, [previous_ratios[i] for i in subset], resolution, metric, model, top_k, budget)
+        
+        def palette_ratios(subset_ratios):
+            ratios = [0.0] * len(user_colors)
+            for i, ratio in zip(subset, subset_ratios):
+                ratios[i] = ratio
+            return tuple(ratios)
+        
+        # top_recipes[0] is the best recipe itself
+        for recipe in best.get("top_recipes", [])[1:]:
+            recipe["ratios"] = palette_ratios(recipe["ratios"])
+        ratios = best["ratios"] = palette_ratios(best["ratios"])
+        if len(user_colors) > MAX_DIRECT_COLORS:
+            selected_colors = subset
+        else:
+            selected_colors = [i for i, ratio in enumerate(ratios) if ratio > 0]
+        mixed_cmyk = mix_colors_cmyk(colors, [ratios[i] for i in subset], model)
+    elif len(user_colors) > MAX_DIRECT_COLORS:
+        executor = executor_for(search_work(user_colors, solver, resolution, max_paints))
+        best = find_best_palette_mix(target_rgb, user_colors, max_paints, solver, resolution, metric, model, executor=executor, top_k=top_k, budget=budget)
+        selected_colors = best["selected_colors"]
+        mixed_cmyk = mix_colors_cmyk([user_colors[i] for i in selected_colors], best["subset_ratios"], model)
+    else:
+        if solver == "continuous":
+            best = find_best_ratios_continuous(target_rgb, user_colors, resolution, metric, model, top_k, budget)
+        elif solver == "branch_bound":
+            executor = executor_for(search_work(user_colors, solver, resolution, max_paints))
+            if executor is not None and len(user_colors) > 1:
+                best = find_best_ratios_branch_bound_sharded(target_rgb, user_colors, resolution, executor, MIX_WORKERS, top_k, budget)
+            else:
+                best = find_best_ratios_branch_bound(target_rgb, user_colors, resolution, top_k=top_k, budget=budget)
+        elif solver == "lattice":
+            best = get_mix_lattice(user_colors, model).best_match(target_rgb, metric, top_k)
+        else:
+            best = find_best_ratios(target_rgb, user_colors, metric, model, top_k=top_k)
+        selected_colors = [i for i, ratio in enumerate(best["ratios"]) if ratio > 0]
+        mixed_cmyk = mix_colors_cmyk(user_colors, best["ratios"], model)
+    
+    delta_e = round(float(delta_e_batch([list(best["mixed_rgb"])], (target_rgb["r"], target_rgb["g"], target_rgb["b"]))[0]), 2)
+    closest_match = MixMatch(best["ratios"], best["mixed_rgb"], mixed_cmyk, best["distance"], delta_e)
+    return closest_match, selected_colors, runner_up_matches(target_rgb, user_colors, best.get("top_recipes", [])[1:], model)
+
+def runner_up_matches(target_rgb: dict, user_colors: list, recipes: list, model: str = "subtractive"):
+    """(MixMatch, indices of the paints used) for solver recipes with ratios over the whole palette."""
+    if not recipes:
+        return []
+    delta_es = delta_e_batch([list(recipe["mixed_rgb"]) for recipe in recipes], (target_rgb["r"], target_rgb["g"], target_rgb["b"]))
+    matches = []
+    for recipe, delta_e in zip(recipes, delta_es.tolist()):
+        used = [i for i, ratio in enumerate(recipe["ratios"]) if ratio > 0]
+        mixed_cmyk = mix_colors_cmyk([user_colors[i] for i in used], [recipe["ratios"][i] for i in used], model)
+        matches.append((MixMatch(recipe["ratios"], recipe["mixed_rgb"], mixed_cmyk, recipe["distance"], round(delta_e, 2)), used))
+    return matches
+
+def target_to_cmyk(target_rgb: dict):
+    """CMYK of a target color, rejecting channels outside 0-255."""
+    if not all(0 <= target_rgb[c] <= 255 for c in "rgb"):
+        raise ValueError("RGB values must be between 0 and 255")
+    return CMYKColor.from_rgb(target_rgb["r"], target_rgb["g"], target_rgb["b"])
+
+def mix_colors_cmyk(user_colors: list, ratios: list, model: str = "subtractive"):
+    """CMYK of a mix under the selected mixing model (same values as subtractive_color_mix for "subtractive")."""
+    mixed = MIX_MODELS[model](palette_to_array(user_colors), np.array([ratios], dtype=np.float64))[0]
+    return CMYKColor.from_mix(mixed)
+
+def calculate_color_mix_ratios(target_rgb: dict, user_colors: list, solver: str = "grid", resolution: float = 0.01, max_paints: int = MAX_MIX_PAINTS, metric: str = "rgb", model: str = "subtractive", session_token: str = "", top_k: int = 1, max_ms: float = None, tolerance: float = None):
+    """Calculate the best ratios to mix user colors to achieve target RGB using subtractive color theory.
+
+    solver "grid" searches ratios in steps of 0.1; "continuous" optimizes over all
+    ratios summing to 1 and reports them in steps of `resolution` (default 1%);
+    "lattice" gives the grid result from a per-palette index built on first use,
+    which suits many targets against the same palette; "branch_bound" returns the
+    exhaustive optimum at `resolution` while skipping regions that cannot win.
+    Palettes with more than 3 colors are reduced to the best subset of at most
+    `max_paints` paints; unused paints get a ratio of 0.
+    metric "rgb" minimizes RGB distance; "delta_e" minimizes the perceptual
+    CIEDE2000 difference. Both are reported as distance and delta_e.
+    model "subtractive" is the weighted RGB mix; "kubelka_munk" mixes paint
+    reflectance curves the way pigments absorb and scatter light.
+    session_token (any client-chosen string) remembers the last recipe; the next
+    "continuous" or "branch_bound" call with the same token, palette and options
+    refines that recipe instead of solving from scratch (reported as warm_started).
+    For the subtractive model, a target farther than ACCURACY_THRESHOLD from the
+    palette's gamut hull cannot be achieved by any recipe, so it gets the "lattice"
+    recipe instead of a "continuous" or "branch_bound" search.
+    top_k > 1 also returns up to top_k - 1 runner-up recipes as alternatives, each
+    mixing a different color or using a different set of paints, collected in a
+    bounded heap during the same search (exact for grid, lattice and branch_bound;
+    the best ones the local refinement visited for continuous).
+    max_ms caps the time spent searching and tolerance (in units of `metric`) ends
+    the search at the first recipe that close; either way the best recipe so far is
+    returned. "search" reports whether the search completed ("exhaustive" when its
+    result is the optimum of the searched lattice) or stopped early ("best_effort").
+    """
+    try:
+        if not target_rgb:
+            return {"error": f"Invalid input. Provide target_rgb and up to {MAX_PALETTE_COLORS} user_colors."}
+        
+        error = validate_mix_options(user_colors, solver, resolution, max_paints, metric, model)
+        if error:
+            return error
+        
+        # JSON strings such as "3" get the same message as out-of-range numbers
+        if not isinstance(top_k, int) or isinstance(top_k, bool) or not 1 <= top_k <= MAX_TOP_K:
+            return {"error": f"top_k must be an integer between 1 and {MAX_TOP_K}"}
+        
+        if max_ms is not None and not (is_number(max_ms) and max_ms > 0):
+            return {"error": "max_ms must be a positive number of milliseconds"}
+        
+        if tolerance is not None and not (is_number(tolerance) and tolerance >= 0):
+            return {"error": "tolerance must be a number, 0 or more"}
+        
+        budget = SearchBudget(max_ms, tolerance) if max_ms is not None or tolerance is not None else None
+        gamut = None
+        search_solver = solver
+        if model == "subtractive":
+            distance_bound = float(get_palette_gamut(user_colors).distance_bound((target_rgb["r"], target_rgb["g"], target_rgb["b"])))
+            if solver in FULL_SEARCH_SOLVERS and distance_bound > ACCURACY_THRESHOLD:
+                search_solver = "lattice"
+            gamut = {"in_gamut": distance_bound == 0, "distance_bound": round(distance_bound, 2), "full_search_skipped": search_solver != solver}
+        
+        cache_key = palette_key(user_colors, float(target_rgb["r"]), float(target_rgb["g"]), float(target_rgb["b"]), solver, resolution, max_paints, metric, model, top_k)
+        # The cache holds the compact recipe; every response gets freshly built dicts
+        cached = mix_result_cache.get(cache_key)
+        warm_started = False
+        options_key = palette_key(user_colors, solver, resolution, max_paints, metric, model) if session_token else None
+        if cached is None:
+            warm_start = None
+            if session_token and can_warm_start(search_solver, user_colors):
+                session = mix_session_cache.get(session_token)
+                if session is not None and session[0] == options_key:
+                    warm_start = session[1:]
+            closest_match, selected_colors, alternatives = solve_color_mix(target_rgb, user_colors, search_solver, resolution, max_paints, metric, model, warm_start, top_k, budget)
+            cached = (closest_match, tuple(selected_colors), target_to_cmyk(target_rgb), tuple(alternatives))
+            warm_started = warm_start is not None
+            stopped_by = budget.stopped_by if budget is not None else None
+            # A local refinement depends on where it started and a stopped search on timing,
+            # so only complete cold solves are shared
+            if not warm_started and stopped_by is None:
+                mix_result_cache.put(cache_key, cached)
+        else:
+            stopped_by = None
+        closest_match, selected_colors, target_cmyk, alternatives = cached
+        # Subset selection and the warm and continuous refinements are heuristics
+        exhaustive = search_solver == solver and solver in EXACT_SOLVERS and len(user_colors) <= MAX_DIRECT_COLORS and not warm_started
+        if session_token:
+            mix_session_cache.put(session_token, (options_key, closest_match.ratios, selected_colors))
         
         return {
             "success": True,
             "target_rgb": target_rgb,
-            "target_cmyk": target_cmyk["cmyk"],
-            "closest_match": {
-                "ratios": closest_match["ratios"],
-                "mixed_rgb": closest_match["mixed_rgb"],
-                "mixed_cmyk": closest_match["mixed_cmyk"],
-                "distance": closest_match["distance"]
+            "target_cmyk": target_cmyk.to_dict(),
+            "closest_match": closest_match.to_dict(),
+            "selected_colors": list(selected_colors),
+            "alternatives": [dict(match.to_dict(), selected_colors=list(used)) for match, used in alternatives],
+            "solver": solver,
+            "metric": metric,
+            "model": model,
+            "warm_started": warm_started,
+            "gamut": gamut,
+            "search": {
+                "status": "best_effort" if stopped_by else "exhaustive" if exhaustive else "complete",
+                "stopped_by": stopped_by
             },
             "message": "Successfully calculated color mixing ratios using subtractive color theory"
         }
@@ -108,6 +355,285 @@ def calculate_color_mix_ratios(target_rgb: dict, user_colors: list):
             "error": f"Failed to calculate color mix ratios: {str(e)}"
         }
 
+def calculate_batch_color_mix_ratios(target_rgbs: list, user_colors: list, solver: str = "lattice", resolution: float = 0.01, max_paints: int = MAX_MIX_PAINTS, metric: str = "rgb", model: str = "subtractive"):
+    """Calculate one mixing recipe per target color for a single palette.
+
+    Palette validation and, for the grid/lattice solvers, the indexed mix lattice
+    are shared by every target, which are then looked up in one query.
+    """
+    try:
+        if not target_rgbs or len(target_rgbs) > MAX_BATCH_TARGETS:
+            return {"error": f"Provide between 1 and {MAX_BATCH_TARGETS} target colors"}
+        
+        for i, target_rgb in enumerate(target_rgbs):
+            if not isinstance(target_rgb, dict) or not all(key in target_rgb for key in ["r", "g", "b"]):
+                return {"error": f"target_rgbs[{i}] must contain r, g, b values"}
+        
+        error = validate_mix_options(user_colors, solver, resolution, max_paints, metric, model)
+        if error:
+            return error
+        
+        recipes = []
+        if solver in ("grid", "lattice") and len(user_colors) <= MAX_DIRECT_COLORS:
+            # Grid and lattice agree exactly, so every target goes through one shared index
+            lattice = get_mix_lattice(user_colors, model)
+            targets = [[t["r"], t["g"], t["b"]] for t in target_rgbs]
+            indices = lattice.nearest(targets, metric)
+            distances = rgb_distance_batch(lattice.mixed_rgb[indices], targets)
+            delta_es = delta_e_batch(lattice.mixed_rgb[indices], targets)
+            # Targets landing on the same lattice point share its colors and paint list
+            shared_by_index = {}
+            for index, distance, delta_e in zip(indices.tolist(), distances.tolist(), delta_es.tolist()):
+                ratios = lattice.ratios(index)
+                if index not in shared_by_index:
+                    shared_by_index[index] = (
+                        RGBColor(*lattice.mixed_rgb[index].tolist()),
+                        mix_colors_cmyk(user_colors, ratios, model),
+                        [i for i, ratio in enumerate(ratios) if ratio > 0]
+                    )
+                mixed_rgb, mixed_cmyk, selected_colors = shared_by_index[index]
+                recipes.append((MixMatch(ratios, mixed_rgb, mixed_cmyk, distance, round(delta_e, 2)), selected_colors))
+        else:
+            for target_rgb in target_rgbs:
+                recipes.append(solve_color_mix(target_rgb, user_colors, solver, resolution, max_paints, metric, model)[:2])
+        
+        results = []
+        shared_dicts = {}
+        for target_rgb, (closest_match, selected_colors) in zip(target_rgbs, recipes):
+            results.append({
+                "target_rgb": target_rgb,
+                "target_cmyk": target_to_cmyk(target_rgb).to_dict(),
+                "closest_match": closest_match.to_dict(shared_dicts),
+                "selected_colors": selected_colors
+            })
+        
+        return {
+            "success": True,
+            "results": results,
+            "total_targets": len(results),
+            "solver": solver,
+            "metric": metric,
+            "model": model,
+            "message": f"Successfully calculated color mixing ratios for {len(results)} target colors"
+        }
+    
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to calculate batch color mix ratios: {str(e)}"
+        }
+
+def suggest_catalog_paints(target_rgb: dict, user_colors: list, count: int = 3, max_paints: int = MAX_MIX_PAINTS):
+    """Find the catalog paints that, added to the palette, bring the closest mix nearest the target.
+
+    A paint can only pull mixes past a facet of the palette's gamut hull by as much
+    as it sticks out beyond that facet, which bounds its best distance from below;
+    paints whose bound cannot beat the current mix (or the `count` nearest catalog
+    paints used on their own) are never solved.
+    """
+    try:
+        if not target_rgb or not all(key in target_rgb for key in ["r", "g", "b"]):
+            return {"error": "target_rgb must contain r, g, b values"}
+        
+        if not 1 <= count <= MAX_PAINT_SUGGESTIONS:
+            return {"error": f"count must be between 1 and {MAX_PAINT_SUGGESTIONS}"}
+        
+        error = validate_mix_options(user_colors, "grid", GRID_STEP, max_paints)
+        if error:
+            return error
+        
+        catalog = get_paint_catalog()
+        target = np.array([target_rgb["r"], target_rgb["g"], target_rgb["b"]], dtype=np.float64)
+        baseline, _, _ = solve_color_mix(target_rgb, user_colors, "grid", GRID_STEP, max_paints)
+        
+        # Truncation and the CMYK round trip can move a mix this far
+        margin = np.sqrt(3) * (roundtrip_slack() + 1)
+        nearest, _ = catalog.nearest(target, count, "rgb")
+        worth_beating = min(baseline.distance, float(np.max(nearest)) + margin)
+        
+        gamut = get_palette_gamut(user_colors)
+        facet_gaps = gamut.normals @ target + gamut.offsets
+        overhang = np.maximum(catalog.rgb @ gamut.normals.T + gamut.offsets, 0)
+        bounds = np.maximum((facet_gaps - overhang).max(axis=1) - margin, 0)
+        candidates = np.flatnonzero(bounds < worth_beating)
+        candidates = candidates[np.argsort(bounds[candidates], kind="stable")][:SUGGESTION_SHORTLIST]
+        
+        suggestions = []
+        solved = 0
+        if len(candidates):
+            # Rank by how close the linear mixes of palette + paint get, then solve the best few
+            palette = palette_to_array(user_colors)
+            extended = np.concatenate([np.broadcast_to(palette, (len(candidates),) + palette.shape), catalog.rgb[candidates][:, None, :]], axis=1)
+            hull_distances = hull_distance_batch(extended, target)
+            for position in np.argsort(hull_distances, kind="stable"):
+                # The linear mixes bound every recipe from below: stop once none can enter the top `count`
+                if len(suggestions) >= count and hull_distances[position] - margin >= suggestions[count - 1][0].distance:
+                    break
+                paint = catalog.paint(int(candidates[position]))
+                match, _, _ = solve_color_mix(target_rgb, list(user_colors) + [paint["rgb"]], "grid", GRID_STEP, max_paints)
+                if match.distance < baseline.distance:
+                    suggestions.append((match, paint))
+                    suggestions.sort(key=lambda suggestion: suggestion[0].distance)
+                solved += 1
+        
+        return {
+            "success": True,
+            "current_distance": baseline.distance,
+            "suggestions": [
+                dict(paint, expected_distance=match.distance, ratios=match.ratios,
+                     reason=f"Adding {paint['name']} brings the closest mix from {baseline.distance:.1f} to {match.distance:.1f}")
+                for match, paint in suggestions[:count]
+            ],
+            "candidates_checked": len(candidates),
+            "candidates_solved": solved,
+            "catalog_size": len(catalog),
+            "message": f"Solved {solved} of {len(catalog)} catalog paints"
+        }
+    
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to suggest catalog paints: {str(e)}"
+        }
+
+def find_nearest_paints(colors: list, k: int = 5, space: str = "lab"):
+    """Find the k closest catalog paints to each color with one query of the catalog's spatial index.
+
+    space "lab" ranks by perceptual (ΔE*76) distance, "rgb" by RGB distance; every
+    match also reports its CIEDE2000 delta_e from the queried color.
+    """
+    try:
+        if not colors or len(colors) > MAX_CONVERT_COLORS:
+            return {"error": f"Provide between 1 and {MAX_CONVERT_COLORS} colors"}
+        
+        if not 1 <= k <= MAX_NEAREST_PAINTS:
+            return {"error": f"k must be between 1 and {MAX_NEAREST_PAINTS}"}
+        
+        if space not in CATALOG_SPACES:
+            return {"error": f"Unknown space '{space}'. Use one of: {', '.join(CATALOG_SPACES)}"}
+        
+        for i, color in enumerate(colors):
+            if not isinstance(color, dict) or not all(key in color for key in ["r", "g", "b"]):
+                return {"error": f"colors[{i}] must contain r, g, b values"}
+        
+        rgb = np.array([[color["r"], color["g"], color["b"]] for color in colors], dtype=np.float64)
+        out_of_range = np.flatnonzero(((rgb < 0) | (rgb > 255)).any(axis=1))
+        if len(out_of_range):
+            return {"error": f"colors[{out_of_range[0]}]: RGB values must be between 0 and 255"}
+        
+        catalog = get_paint_catalog()
+        distances, indices = catalog.nearest(rgb, k, space)
+        delta_es = delta_e2000_batch(srgb_to_lab_exact(rgb)[:, None, :], catalog.lab[indices])
+        
+        results = []
+        for color, row_indices, row_distances, row_delta_es in zip(colors, indices.tolist(), np.round(distances, 2).tolist(), np.round(delta_es, 2).tolist()):
+            results.append({
+                "rgb": color,
+                "matches": [dict(catalog.paint(index), distance=distance, delta_e=delta_e)
+                            for index, distance, delta_e in zip(row_indices, row_distances, row_delta_es)]
+            })
+        
+        return {
+            "success": True,
+            "results": results,
+            "count": len(results),
+            "space": space,
+            "catalog_size": len(catalog),
+            "message": f"Found the {indices.shape[1]} nearest of {len(catalog)} catalog paints for {len(results)} colors"
+        }
+    
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to find nearest paints: {str(e)}"
+        }
+
+def find_covering_paint_set(target_rgbs: list, user_colors: list, tolerance: float = ACCURACY_THRESHOLD, max_paints: int = 3, max_ms: float = None):
+    """Find the fewest paints of the palette that mix every target within tolerance, with each target's recipe.
+
+    Recipes use up to max_paints paints on the grid solver's lattice. Targets outside
+    the palette's gamut are skipped, every subset's mixes are shared by all targets,
+    and only minimal recipes enter the cover search. max_ms bounds the cover search;
+    when it runs out, the best cover found so far is returned with "optimal": false.
+    """
+    try:
+        if not target_rgbs or len(target_rgbs) > MAX_COVER_TARGETS:
+            return {"error": f"Provide between 1 and {MAX_COVER_TARGETS} target colors"}
+        
+        for i, target_rgb in enumerate(target_rgbs):
+            if not isinstance(target_rgb, dict) or not all(key in target_rgb for key in ["r", "g", "b"]):
+                return {"error": f"target_rgbs[{i}] must contain r, g, b values"}
+        
+        error = validate_mix_options(user_colors, "grid", GRID_STEP, max_paints)
+        if error:
+            return error
+        
+        if not is_number(tolerance) or tolerance < 0:
+            return {"error": "tolerance must be a number, at least 0"}
+        
+        if max_ms is not None and not (is_number(max_ms) and max_ms > 0):
+            return {"error": "max_ms must be a number greater than 0"}
+        
+        if cover_work(len(user_colors), max_paints) > MAX_COVER_SUBSETS:
+            return {"error": f"Too many paint subsets for {len(user_colors)} paints with max_paints {max_paints}; lower max_paints"}
+        
+        palette = palette_to_array(user_colors)
+        targets = np.array([[t["r"], t["g"], t["b"]] for t in target_rgbs], dtype=np.float64)
+        
+        # Targets the whole palette cannot get near are never mixed
+        in_gamut = np.flatnonzero(get_palette_gamut(user_colors).distance_bound(targets) <= tolerance)
+        masks, owners, _, evaluated = minimal_recipes(palette, targets[in_gamut], tolerance, max_paints)
+        search = CoverSearch(masks, in_gamut[owners], SearchBudget(max_ms))
+        cover, optimal = search.search()
+        paint_set = mask_indices(cover)
+        reachable = set(search.targets.tolist())
+        
+        recipes = []
+        closest = best_recipes(palette, paint_set, targets, max_paints) if paint_set else [None] * len(targets)
+        for target_rgb, recipe in zip(target_rgbs, closest):
+            if recipe is None:
+                recipes.append({"target_rgb": target_rgb, "closest_match": None, "selected_colors": [], "within_tolerance": False})
+                continue
+            subset, subset_ratios, mixed, distance = recipe
+            ratios = [0.0] * len(user_colors)
+            for i, ratio in zip(subset, subset_ratios):
+                ratios[i] = ratio
+            delta_e = round(float(delta_e_batch([mixed], (target_rgb["r"], target_rgb["g"], target_rgb["b"]))[0]), 2)
+            match = MixMatch(tuple(ratios), RGBColor(*mixed), mix_colors_cmyk(user_colors, ratios), distance, delta_e)
+            recipes.append({
+                "target_rgb": target_rgb,
+                "closest_match": match.to_dict(),
+                "selected_colors": [i for i in subset if ratios[i] > 0],
+                "within_tolerance": distance <= tolerance
+            })
+        
+        return {
+            "success": True,
+            "paint_set": paint_set,
+            "paints": [user_colors[i] for i in paint_set],
+            "paint_count": len(paint_set),
+            "optimal": optimal,
+            "recipes": recipes,
+            "unreachable_targets": [i for i in range(len(target_rgbs)) if i not in reachable],
+            "tolerance": tolerance,
+            "max_paints": max_paints,
+            "subsets_evaluated": evaluated,
+            "message": f"{len(paint_set)} of {len(user_colors)} paints mix {len(reachable)} of {len(target_rgbs)} targets within {tolerance}"
+        }
+    
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to find a covering paint set: {str(e)}"
+        }
+
+def get_mix_cache_stats():
+    """Hit, miss and eviction counters of the mixing caches."""
+    return {
+        "success": True,
+        "caches": [mix_result_cache.stats(), mix_session_cache.stats(), lattice_cache.stats(), gamut_cache.stats()]
+    }
+
 def subtractive_color_mix(user_colors: list, ratios: list):
     """Mix colors using subtractive color theory (like real paint mixing)."""
     try:
@@ -217,8 +743,26 @@ def calculate_shade_percentage(light_value: float, max_light: float = 100.0):
 
 
 
-def process_rgb_scanner_results(rgb_scanner_results: dict, target_rgb: dict):
-    """Process RGB Scanner Agent results and calculate paint mixing ratios for target color."""
+def mixing_instructions(user_colors: list, ratios: list):
+    """Step-by-step instructions for a recipe, largest share first, with a one-line summary."""
+    steps = []
+    for i in sorted((i for i, ratio in enumerate(ratios) if ratio > 0), key=lambda i: -ratios[i]):
+        color = user_colors[i]
+        percentage = round(ratios[i] * 100, 1)
+        steps.append({
+            "step": len(steps) + 1,
+            "color_index": i,
+            "rgb": {"r": color["r"], "g": color["g"], "b": color["b"]},
+            "percentage": percentage,
+            "instruction": f"Add {percentage}% of color {i + 1} (RGB {color['r']}, {color['g']}, {color['b']})"
+        })
+    return {
+        "summary": "Mix " + ", ".join(f"{step['percentage']}% color {step['color_index'] + 1}" for step in steps),
+        "steps": steps
+    }
+
+def process_rgb_scanner_results(rgb_scanner_results: dict, target_rgb: dict, max_ms: float = None, tolerance: float = None):
+    """Process RGB Scanner Agent results and calculate paint mixing ratios for target color (max_ms and tolerance as in calculate_color_mix_ratios)."""
     try:
         # Validate inputs
         if not rgb_scanner_results or not isinstance(rgb_scanner_results, dict):
@@ -257,11 +801,11 @@ def process_rgb_scanner_results(rgb_scanner_results: dict, target_rgb: dict):
         if not user_colors:
             return {"error": "No user colors extracted from scanner results"}
         
-        if len(user_colors) > 3:
-            return {"error": "Maximum 3 user colors allowed for paint mixing"}
+        if len(user_colors) > MAX_PALETTE_COLORS:
+            return {"error": f"Maximum {MAX_PALETTE_COLORS} user colors allowed for paint mixing"}
         
         # Calculate color mixing ratios
-        mix_result = calculate_color_mix_ratios(target_rgb, user_colors)
+        mix_result = calculate_color_mix_ratios(target_rgb, user_colors, max_ms=max_ms, tolerance=tolerance)
         
         if not mix_result.get("success"):
             return mix_result
@@ -286,6 +830,9 @@ def process_rgb_scanner_results(rgb_scanner_results: dict, target_rgb: dict):
                 "mixed_cmyk": mixed_cmyk["cmyk"],
                 "distance": mix_result["closest_match"]["distance"]
             },
+            "selected_colors": mix_result["selected_colors"],
+            "paint_mixing_instructions": mixing_instructions(user_colors, mix_result["closest_match"]["ratios"]),
+            "search": mix_result["search"],
             "message": f"Successfully calculated paint mixing ratios for target color using {len(user_colors)} user colors"
         }
     
@@ -306,6 +853,11 @@ calculations_agent = Agent(
         rgb_to_cmyk, 
         calculate_color_mix_ratios, 
         calculate_shade_percentage,
-        process_rgb_scanner_results
+        process_rgb_scanner_results,
+        calculate_batch_color_mix_ratios,
+        rgb_to_cmyk_batch,
+        suggest_catalog_paints,
+        find_nearest_paints,
+        find_covering_paint_set
     ]
 )
\ No newline at end of file
@@ -0,0 +1,37 @@
+"""
+Vectorized RGB ↔ CMYK conversion with the paint adjustments
+Converts whole (..., 3) / (..., 4) arrays of colors in one call; CMYKColor.from_rgb
+(behind calculations_agent.rgb_to_cmyk) converts a single color through the same function
+"""
+
+import numpy as np
+
+
+def rgb_to_cmyk_array(rgb):
+    """CMYK fractions (0-1) for an (..., 3) array of 0-255 RGB colors."""
+    rgb = np.asarray(rgb, dtype=np.float64)
+    primes = rgb / 255.0
+    brightest = rgb.max(axis=-1)
+
+    black = 1 - primes.max(axis=-1)
+    # Avoid introducing black for vibrant colors
+    black = np.where((black > 0.5) & (brightest > 100), 0.0, black)
+    scale = np.where(black < 1, 1 - black, 1.0)[..., None]
+    cmy = np.where((black < 1)[..., None], (1 - primes - black[..., None]) / scale, 0.0)
+    return np.concatenate([cmy, black[..., None]], axis=-1)
+
+
+def cmyk_percentages(cmyk):
+    """Fractions → percentages rounded to 2 decimals, pure black as (0, 0, 0, 100) like CMYKColor.to_dict."""
+    cmyk = np.asarray(cmyk, dtype=np.float64)
+    percentages = np.round(cmyk * 100, 2)
+    percentages[cmyk[..., 3] == 1] = (0, 0, 0, 100)
+    return percentages
+
+
+def cmyk_to_rgb_array(percentages):
+    """0-255 integer RGB for an (..., 4) array of CMYK percentages (truncated like cmyk_to_rgb)."""
+    fractions = np.asarray(percentages, dtype=np.float64) / 100.0
+    black = fractions[..., 3:]
+    rgb = np.trunc(255 * (1 - fractions[..., :3]) * (1 - black))
+    return np.clip(rgb, 0, 255).astype(np.int64)
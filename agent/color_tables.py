@@ -0,0 +1,168 @@
+"""
+Precomputed sRGB → Lab / CMYK lookup tables shared through memory-mapped files
+Every gunicorn worker maps the same read-only files, so perceptual scoring costs
+a table lookup instead of a per-color conversion
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import numpy as np
+from .color_space import rgb_to_cmyk_array
+
+TABLES_VERSION = 1  # Bump when the layout of the table files changes
+LAB_LEVELS = 64  # Grid nodes per channel of the Lab table (trilinear interpolation in between)
+TABLE_FILES = ("srgb_to_lab.npy", "cmyk_channel.npy", "cmyk_black.npy")
+
+# sRGB (D65) → XYZ
+SRGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041]
+])
+D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+
+def color_tables_dir():
+    """Directory holding the table files (SHADESMITH_COLOR_TABLES, else a shared temp dir)."""
+    return os.environ.get("SHADESMITH_COLOR_TABLES", os.path.join(tempfile.gettempdir(), "shadesmith_color_tables"))
+
+
+def color_tables_key():
+    """Key of the current table contents: file version, Lab grid size and both conversions on a probe grid."""
+    digest = hashlib.sha1(f"{TABLES_VERSION}:{LAB_LEVELS}".encode("ascii"))
+    nodes = np.linspace(0, 255, 16).round()
+    probe = np.stack(np.meshgrid(nodes, nodes, nodes, indexing="ij"), axis=-1).reshape(-1, 3)
+    # A change to either color model changes its probe values, so stale files are never reused
+    digest.update(rgb_to_cmyk_array(probe).tobytes())
+    digest.update(srgb_to_lab_exact(probe).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def color_tables_version_dir():
+    """Directory of the table files for the current table contents (keyed like the paint catalog's files)."""
+    return os.path.join(color_tables_dir(), f"color_tables_{color_tables_key()}")
+
+
+def srgb_to_lab_exact(rgb: np.ndarray):
+    """Direct sRGB (0-255) → CIELAB conversion, used to build the table."""
+    srgb = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ SRGB_TO_XYZ.T / D65_WHITE
+    epsilon = (6 / 29) ** 3
+    f = np.where(xyz > epsilon, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack([116 * f[..., 1] - 16, 500 * (f[..., 0] - f[..., 1]), 200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+
+def build_cmyk_tables():
+    """CMYK of the paint model as [channel, max_channel] and [max_channel] tables (fractions 0-1)."""
+    # Entries with channel > max_channel are never looked up
+    values = np.arange(256)
+    cmyk = rgb_to_cmyk_array(np.stack(np.broadcast_arrays(values[:, None], values[None, :], values[None, :]), axis=-1))
+    return cmyk[..., 0], cmyk[0, :, 3]
+
+
+def build_color_tables(directory: str = None):
+    """Write the lookup tables to directory, atomically so concurrent workers never see partial files."""
+    directory = directory or color_tables_version_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    nodes = np.linspace(0, 255, LAB_LEVELS)
+    grid = np.stack(np.meshgrid(nodes, nodes, nodes, indexing="ij"), axis=-1)
+    channel, black = build_cmyk_tables()
+    tables = {
+        "srgb_to_lab.npy": srgb_to_lab_exact(grid).astype(np.float32),
+        "cmyk_channel.npy": channel,
+        "cmyk_black.npy": black
+    }
+    for filename, table in tables.items():
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(handle, "wb") as temp_file:
+            np.save(temp_file, table)
+        os.replace(temp_path, os.path.join(directory, filename))
+    return directory
+
+
+class ColorTables:
+    """Read-only memory-mapped view of the lookup tables."""
+
+    def __init__(self, directory: str):
+        self.lab = np.load(os.path.join(directory, "srgb_to_lab.npy"), mmap_mode="r")
+        self.cmyk_channel = np.load(os.path.join(directory, "cmyk_channel.npy"), mmap_mode="r")
+        self.cmyk_black = np.load(os.path.join(directory, "cmyk_black.npy"), mmap_mode="r")
+
+    def rgb_to_lab(self, rgb: np.ndarray):
+        """Trilinear interpolation of the Lab table for an (..., 3) array of 0-255 colors."""
+        position = np.clip(np.asarray(rgb, dtype=np.float64), 0, 255) * ((LAB_LEVELS - 1) / 255.0)
+        low = np.minimum(np.floor(position).astype(np.int64), LAB_LEVELS - 2)
+        frac = position - low
+        r0, g0, b0 = low[..., 0], low[..., 1], low[..., 2]
+        fr, fg, fb = frac[..., 0:1], frac[..., 1:2], frac[..., 2:3]
+        lab = self.lab
+        c00 = lab[r0, g0, b0] * (1 - fb) + lab[r0, g0, b0 + 1] * fb
+        c01 = lab[r0, g0 + 1, b0] * (1 - fb) + lab[r0, g0 + 1, b0 + 1] * fb
+        c10 = lab[r0 + 1, g0, b0] * (1 - fb) + lab[r0 + 1, g0, b0 + 1] * fb
+        c11 = lab[r0 + 1, g0 + 1, b0] * (1 - fb) + lab[r0 + 1, g0 + 1, b0 + 1] * fb
+        return (c00 * (1 - fg) + c01 * fg) * (1 - fr) + (c10 * (1 - fg) + c11 * fg) * fr
+
+    def rgb_to_cmyk(self, rgb: np.ndarray):
+        """CMYK fractions (0-1) of the paint model for an (..., 3) array of integer colors."""
+        rgb = np.asarray(rgb, dtype=np.int64)
+        brightest = rgb.max(axis=-1)
+        cmy = self.cmyk_channel[rgb, brightest[..., None]]
+        return np.concatenate([cmy, self.cmyk_black[brightest][..., None]], axis=-1)
+
+
+_tables = None
+_tables_lock = threading.Lock()
+
+
+def get_color_tables():
+    """Map the lookup tables, building the files on first use."""
+    global _tables
+    if _tables is None:
+        with _tables_lock:
+            if _tables is None:
+                directory = color_tables_version_dir()
+                if not all(os.path.exists(os.path.join(directory, name)) for name in TABLE_FILES):
+                    build_color_tables(directory)
+                _tables = ColorTables(directory)
+    return _tables
+
+
+def delta_e2000_batch(lab1: np.ndarray, lab2: np.ndarray):
+    """Vectorized CIEDE2000 color difference between two broadcastable (..., 3) Lab arrays."""
+    lab1 = np.asarray(lab1, dtype=np.float64)
+    lab2 = np.asarray(lab2, dtype=np.float64)
+    L1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    L2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+
+    c_mean = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2
+    g = 0.5 * (1 - np.sqrt(c_mean ** 7 / (c_mean ** 7 + 25.0 ** 7)))
+    a1p, a2p = (1 + g) * a1, (1 + g) * a2
+    c1p, c2p = np.hypot(a1p, b1), np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360
+
+    dl = L2 - L1
+    dc = c2p - c1p
+    dh = h2p - h1p
+    dh = np.where(dh > 180, dh - 360, np.where(dh < -180, dh + 360, dh))
+    dh = np.where(c1p * c2p == 0, 0, dh)
+    dH = 2 * np.sqrt(c1p * c2p) * np.sin(np.radians(dh) / 2)
+
+    l_mean = (L1 + L2) / 2
+    cp_mean = (c1p + c2p) / 2
+    h_sum = h1p + h2p
+    h_mean = np.where(np.abs(h1p - h2p) > 180, np.where(h_sum < 360, h_sum + 360, h_sum - 360), h_sum) / 2
+    h_mean = np.where(c1p * c2p == 0, h_sum, h_mean)
+
+    t = (1 - 0.17 * np.cos(np.radians(h_mean - 30)) + 0.24 * np.cos(np.radians(2 * h_mean))
+         + 0.32 * np.cos(np.radians(3 * h_mean + 6)) - 0.20 * np.cos(np.radians(4 * h_mean - 63)))
+    sl = 1 + 0.015 * (l_mean - 50) ** 2 / np.sqrt(20 + (l_mean - 50) ** 2)
+    sc = 1 + 0.045 * cp_mean
+    sh = 1 + 0.015 * cp_mean * t
+    rt = (-2 * np.sqrt(cp_mean ** 7 / (cp_mean ** 7 + 25.0 ** 7))
+          * np.sin(np.radians(60 * np.exp(-(((h_mean - 275) / 25) ** 2)))))
+    return np.sqrt((dl / sl) ** 2 + (dc / sc) ** 2 + (dH / sh) ** 2 + rt * (dc / sc) * (dH / sh))
@@ -0,0 +1,112 @@
+"""
+Compact color value types used inside the calculations
+Colors stay as __slots__ objects while results are computed and cached, and become
+{"r", "g", "b"} / {"c", "m", "y", "k"} dicts only when a response is built
+"""
+
+from .color_space import rgb_to_cmyk_array
+
+
+class RGBColor:
+    """An RGB color with 0-255 channels."""
+
+    __slots__ = ("r", "g", "b")
+
+    def __init__(self, r, g, b):
+        self.r = r
+        self.g = g
+        self.b = b
+
+    @classmethod
+    def from_dict(cls, color: dict):
+        return cls(color["r"], color["g"], color["b"])
+
+    def to_dict(self):
+        return {"r": self.r, "g": self.g, "b": self.b}
+
+    def hex(self):
+        return f"#{self.r:02x}{self.g:02x}{self.b:02x}"
+
+    def __iter__(self):
+        yield self.r
+        yield self.g
+        yield self.b
+
+    def __eq__(self, other):
+        return isinstance(other, RGBColor) and (self.r, self.g, self.b) == (other.r, other.g, other.b)
+
+    def __hash__(self):
+        return hash((self.r, self.g, self.b))
+
+    def __repr__(self):
+        return f"RGBColor({self.r}, {self.g}, {self.b})"
+
+
+class CMYKColor:
+    """A CMYK color as unrounded fractions (0-1); rounded to percentages by to_dict."""
+
+    __slots__ = ("c", "m", "y", "k")
+
+    def __init__(self, c, m, y, k):
+        self.c = c
+        self.m = m
+        self.y = y
+        self.k = k
+
+    @classmethod
+    def from_rgb(cls, r, g, b):
+        """CMYK with the paint adjustments of calculations_agent.rgb_to_cmyk (inputs must be 0-255)."""
+        # The single-color case of the vectorized model, so the two cannot drift apart
+        c, m, y, k = rgb_to_cmyk_array((r, g, b)).tolist()
+        return cls(c, m, y, k)
+
+    @classmethod
+    def from_mix(cls, mixed):
+        """CMYK of a mixed (float) RGB triple, truncated like subtractive_color_mix; zero if out of range."""
+        r, g, b = int(mixed[0]), int(mixed[1]), int(mixed[2])
+        if not all(0 <= value <= 255 for value in (r, g, b)):
+            return cls(0, 0, 0, 0)
+        return cls.from_rgb(r, g, b)
+
+    def to_dict(self):
+        if self.k == 1:
+            return {"c": 0, "m": 0, "y": 0, "k": 100}
+        return {
+            "c": round(self.c * 100, 2),
+            "m": round(self.m * 100, 2),
+            "y": round(self.y * 100, 2),
+            "k": round(self.k * 100, 2)
+        }
+
+    def __repr__(self):
+        return f"CMYKColor({self.c:.4f}, {self.m:.4f}, {self.y:.4f}, {self.k:.4f})"
+
+
+class MixMatch:
+    """One mixing recipe: ratios, the color they produce and how far it is from the target."""
+
+    __slots__ = ("ratios", "mixed_rgb", "mixed_cmyk", "distance", "delta_e")
+
+    def __init__(self, ratios: tuple, mixed_rgb: RGBColor, mixed_cmyk: CMYKColor, distance: float, delta_e: float):
+        self.ratios = ratios
+        self.mixed_rgb = mixed_rgb
+        self.mixed_cmyk = mixed_cmyk
+        self.distance = distance
+        self.delta_e = delta_e
+
+    def to_dict(self, shared: dict = None):
+        """Response dict; `shared` lets recipes that reuse the same color objects reuse their dicts too."""
+        if shared is None:
+            mixed_rgb, mixed_cmyk = self.mixed_rgb.to_dict(), self.mixed_cmyk.to_dict()
+        else:
+            key = (id(self.mixed_rgb), id(self.mixed_cmyk))
+            if key not in shared:
+                shared[key] = (self.mixed_rgb.to_dict(), self.mixed_cmyk.to_dict())
+            mixed_rgb, mixed_cmyk = shared[key]
+        return {
+            "ratios": self.ratios,
+            "mixed_rgb": mixed_rgb,
+            "mixed_cmyk": mixed_cmyk,
+            "distance": self.distance,
+            "delta_e": self.delta_e
+        }
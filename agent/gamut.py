@@ -0,0 +1,80 @@
+"""
+Mixable gamut of a palette as a convex hull
+The hull contains every color the subtractive model can mix from the palette, so the
+distance from a target to it is a lower bound on the distance of any recipe: a
+target far outside the hull can be rejected without running a solver
+"""
+
+from itertools import product
+import numpy as np
+from scipy.spatial import ConvexHull
+from .mixing_engine import palette_to_array, green_rule_paints, roundtrip_slack, palette_key
+from .result_cache import cache_from_env
+
+GREEN_RULE_SAMPLES = 64  # Slices of the blue + yellow rule sampled into the hull
+
+# Hulls of recently used palettes
+gamut_cache = cache_from_env("palette_gamuts", "GAMUT_CACHE_SIZE", 256)
+
+
+def green_rule_mixes(palette: np.ndarray, blue: int, yellow: int, samples: int = GREEN_RULE_SAMPLES):
+    """Mixes at the corners of every slice min(blue, yellow) = s of the ratio simplex, with and without the 255 cap.
+
+    Within one slice the blue + yellow rule is an affine map, so these corners span
+    every green-rule mix; the uncapped copies keep capped mixes inside the hull.
+    """
+    rows = []
+    for s in np.linspace(0, 0.5, samples + 1)[1:]:
+        for other in range(palette.shape[0]):
+            weights = np.zeros(palette.shape[0])
+            weights[blue] = weights[yellow] = s
+            weights[other] += 1 - 2 * s
+            rows.append(weights)
+    weights = np.array(rows)
+    strength = 2 * np.minimum(weights[:, blue], weights[:, yellow])
+    linear = weights @ palette
+    mixed = np.column_stack([linear[:, 0] * (1 - strength * 0.3), linear[:, 1] + strength * 255, linear[:, 2] * (1 - strength * 0.5)])
+    capped = mixed.copy()
+    capped[:, 1] = np.minimum(255, capped[:, 1])
+    return np.vstack([mixed, capped])
+
+
+class PaletteGamut:
+    """Convex hull around every color a palette mixes under the "subtractive" model."""
+
+    def __init__(self, user_colors: list):
+        palette = palette_to_array(user_colors)
+        points = [palette]
+        blue, yellow = green_rule_paints(palette)
+        if blue is not None and yellow is not None:
+            points.append(green_rule_mixes(palette, blue, yellow))
+
+        # Truncation and the CMYK round trip move each channel by less than this; the
+        # cube around every point also keeps the hull 3-D for 1-3 paint palettes
+        margin = roundtrip_slack() + 1.1
+        corners = np.array(list(product((-margin, margin), repeat=3)))
+        points = (np.vstack(points)[:, None, :] + corners[None, :, :]).reshape(-1, 3)
+        hull = ConvexHull(points)
+        self.normals = np.ascontiguousarray(hull.equations[:, :3])  # Unit outward normals
+        self.offsets = np.ascontiguousarray(hull.equations[:, 3])
+        self.vertex_count = len(hull.vertices)
+
+    def distance_bound(self, targets):
+        """RGB distance no recipe can beat for each (..., 3) target; 0 inside the gamut."""
+        # The farthest facet plane is never farther than the hull itself
+        targets = np.asarray(targets, dtype=np.float64)
+        return np.maximum((targets @ self.normals.T + self.offsets).max(axis=-1), 0.0)
+
+    def contains(self, targets):
+        """Whether each target lies inside the gamut."""
+        return self.distance_bound(targets) == 0
+
+
+def get_palette_gamut(user_colors: list):
+    """Build (once) or fetch the gamut hull of a palette."""
+    key = palette_key(user_colors, "gamut")
+    gamut = gamut_cache.get(key)
+    if gamut is None:
+        gamut = PaletteGamut(user_colors)
+        gamut_cache.put(key, gamut)
+    return gamut
@@ -0,0 +1,61 @@
+"""
+Analysis-resolution decoding of uploaded photos
+Finding a dominant color needs a few hundred pixels on a side, not 12-48 MP. JPEGs
+are decoded at 1/2-1/8 scale by libjpeg (Image.draft). Other formats are shrunk
+by an integer factor (Image.reduce) right after decoding. A final resample then
+brings the longest side down to the analysis size. Sources can be paths, file
+objects (e.g. an upload's stream), bytes / memoryview buffers or decoded images,
+so pipeline stages hand images over in memory instead of through files
+"""
+
+import io
+from PIL import Image
+
+ANALYSIS_SIZE = 512  # Longest side kept for color analysis
+VISION_JPEG_QUALITY = 90
+REDUCE_MODES = ("L", "LA", "RGB", "RGBA")  # Modes kept as they are; others become RGB(A) before reducing
+
+
+def source_name(source, index: int = 1):
+    """Name of an image source for responses: its path or file name, else image_<index>."""
+    if isinstance(source, str):
+        return source
+    name = getattr(source, "filename", None) or getattr(source, "name", None)
+    return name if isinstance(name, str) else f"image_{index}"
+
+
+def open_analysis_image(source, size: int = ANALYSIS_SIZE):
+    """Decode an image source at no more than size on a side, as a loaded in-memory image.
+
+    A decoded image that is already small enough is returned as it is.
+    """
+    if isinstance(source, Image.Image):
+        if max(source.size) <= size:
+            return source
+        image = source.copy()
+        image.thumbnail((size, size))
+        return image
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    with Image.open(source) as image:
+        # JPEG only: libjpeg scales by 1/2, 1/4 or 1/8 while decoding, keeping at least size
+        image.draft(image.mode if image.mode in ("L", "RGB") else None, (size, size))
+        if image.mode not in REDUCE_MODES:
+            has_alpha = "A" in image.getbands() or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+        factor = max(image.size) // size
+        # Integer box reduction does most of the work, so the resample below only touches a few pixels
+        reduced = image.reduce(factor) if factor >= 2 else image.copy()
+    reduced.thumbnail((size, size), reducing_gap=None)
+    return reduced
+
+
+def encode_for_vision(source, size: int = ANALYSIS_SIZE):
+    """Analysis-resolution bytes of an image to send to Cloud Vision: JPEG, or PNG when it has transparency."""
+    image = open_analysis_image(source, size)
+    output = io.BytesIO()
+    if "A" in image.getbands():
+        image.save(output, "PNG")
+    else:
+        image.save(output, "JPEG", quality=VISION_JPEG_QUALITY)
+    return output.getvalue()
@@ -1,21 +1,29 @@
 from google.adk.agents import Agent
 from PIL import Image
+from .image_analysis import open_analysis_image, source_name, ANALYSIS_SIZE
 import os
 
-def convert_image_to_png(input_path: str, output_path: str = None):
-    """Convert an image file to PNG format."""
+def open_for_conversion(input_path, max_size: int = None):
+    """Open an image (path or file object) at full resolution, or decoded at no more than max_size on a side."""
+    if max_size is None:
+        return Image.open(input_path)
+    return open_analysis_image(input_path, max_size)
+
+def convert_image_to_png(input_path, output_path: str = None, max_size: int = None):
+    """Convert an image file (path or file object, e.g. an upload) to PNG format at full resolution, or downscaled to max_size on its longest side."""
     try:
+        input_name = source_name(input_path)
         # Validate input file exists
-        if not os.path.exists(input_path):
+        if isinstance(input_path, str) and not os.path.exists(input_path):
             return {"error": f"Input file '{input_path}' does not exist"}
         
         # Generate output path if not provided
         if output_path is None:
-            base_name = os.path.splitext(input_path)[0]
+            base_name = os.path.splitext(input_name)[0]
             output_path = f"{base_name}.png"
         
         # Open and convert the image
-        with Image.open(input_path) as img:
+        with open_for_conversion(input_path, max_size) as img:
             # Convert to RGB if necessary (for formats like RGBA, P, etc.)
             if img.mode in ('RGBA', 'LA', 'P'):
                 # Keep transparency for RGBA and LA modes
@@ -27,9 +35,9 @@ def convert_image_to_png(input_path: str, output_path: str = None):
         
         return {
             "success": True,
-            "input_file": input_path,
+            "input_file": input_name,
             "output_file": output_path,
-            "message": f"Successfully converted '{input_path}' to PNG format"
+            "message": f"Successfully converted '{input_name}' to PNG format"
         }
     
     except Exception as e:
@@ -41,8 +49,8 @@ def convert_image_to_png(input_path: str, output_path: str = None):
 
 
 
-def convert_multiple_images_to_png(image_paths: list, output_dir: str = None):
-    """Convert up to 3 images to PNG format for color analysis."""
+def convert_multiple_images_to_png(image_paths: list, output_dir: str = None, max_size: int = None):
+    """Convert up to 3 images (paths or file objects) to PNG format for color analysis, at full resolution or downscaled to max_size (see convert_image_to_png)."""
     try:
         # Validate input
         if not image_paths or len(image_paths) == 0:
@@ -62,19 +70,20 @@ def convert_multiple_images_to_png(image_paths: list, output_dir: str = None):
         errors = []
         
         for i, input_path in enumerate(image_paths):
+            input_name = source_name(input_path, i + 1)
             try:
                 # Validate input file exists
-                if not os.path.exists(input_path):
+                if isinstance(input_path, str) and not os.path.exists(input_path):
                     errors.append(f"File '{input_path}' does not exist")
                     continue
                 
                 # Generate output filename
-                base_name = os.path.splitext(os.path.basename(input_path))[0]
+                base_name = os.path.splitext(os.path.basename(input_name))[0]
                 output_filename = f"color_{i+1}_{base_name}.png"
                 output_path = os.path.join(output_dir, output_filename)
                 
                 # Convert to PNG
-                with Image.open(input_path) as img:
+                with open_for_conversion(input_path, max_size) as img:
                     # Convert to RGB if necessary
                     if img.mode in ('RGBA', 'LA', 'P'):
                         img.save(output_path, 'PNG')
@@ -84,14 +93,14 @@ def convert_multiple_images_to_png(image_paths: list, output_dir: str = None):
                 
                 converted_files.append({
                     "index": i + 1,
-                    "input_file": input_path,
+                    "input_file": input_name,
                     "output_file": output_path,
                     "output_filename": output_filename,
                     "success": True
                 })
                 
             except Exception as e:
-                errors.append(f"Failed to convert '{input_path}': {str(e)}")
+                errors.append(f"Failed to convert '{input_name}': {str(e)}")
         
         return {
             "success": len(converted_files) > 0,
@@ -107,6 +116,59 @@ def convert_multiple_images_to_png(image_paths: list, output_dir: str = None):
             "error": f"Failed to convert multiple images: {str(e)}"
         }
 
+def decode_images_for_analysis(image_sources: list, max_size: int = ANALYSIS_SIZE):
+    """Decode up to 3 images (paths, file objects or bytes / memoryview buffers) at analysis resolution, in memory.
+
+    Nothing is written to disk: "decoded_images" holds the PIL images for the RGB
+    scanner, and "images" describes them for responses.
+    """
+    try:
+        if not image_sources or len(image_sources) == 0:
+            return {"error": "No images provided"}
+        
+        if len(image_sources) > 3:
+            return {"error": "Maximum 3 images allowed for color analysis"}
+        
+        decoded_images = []
+        images = []
+        errors = []
+        
+        for i, source in enumerate(image_sources):
+            name = source_name(source, i + 1)
+            try:
+                if isinstance(source, str) and not os.path.exists(source):
+                    errors.append(f"File '{source}' does not exist")
+                    continue
+                
+                image = open_analysis_image(source, max_size)
+                decoded_images.append({"index": i + 1, "source": name, "image": image})
+                images.append({
+                    "index": i + 1,
+                    "source": name,
+                    "width": image.width,
+                    "height": image.height,
+                    "mode": image.mode,
+                    "success": True
+                })
+                
+            except Exception as e:
+                errors.append(f"Failed to decode '{name}': {str(e)}")
+        
+        return {
+            "success": len(decoded_images) > 0,
+            "decoded_images": decoded_images,
+            "images": images,
+            "total_decoded": len(decoded_images),
+            "errors": errors,
+            "message": f"Successfully decoded {len(decoded_images)} out of {len(image_sources)} images"
+        }
+    
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to decode images: {str(e)}"
+        }
+
 
 # Create the image converter agent
 image_converter_agent = Agent(
@@ -115,6 +177,7 @@ image_converter_agent = Agent(
     model="gemini-2.0-flash-exp",
     tools=[
         convert_image_to_png, 
-        convert_multiple_images_to_png
+        convert_multiple_images_to_png,
+        decode_images_for_analysis
     ]
 )
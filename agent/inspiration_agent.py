@@ -2,77 +2,29 @@ from google.adk.agents import Agent
 import math
 from itertools import permutations
 import random
-
-
-def rgb_to_cmyk(r: int, g: int, b: int):
-    """Convert RGB values to CMYK with adjustments for real-life paint mixing."""
-    try:
-        # Validate input values
-        if not all(0 <= val <= 255 for val in [r, g, b]):
-            return {"error": "RGB values must be between 0 and 255"}
-        
-        # Normalize RGB values
-        r_prime = r / 255.0
-        g_prime = g / 255.0
-        b_prime = b / 255.0
-
-        # Calculate K (Black)
-        k = 1 - max(r_prime, g_prime, b_prime)
-
-        # Avoid introducing black for vibrant colors
-        if k > 0.5 and (r > 100 or g > 100 or b > 100):  # Adjust threshold for bright colors
-            k = 0
-
-        if k == 1:
-            return {
-                "success": True,
-                "rgb": {"r": r, "g": g, "b": b},
-                "cmyk": {"c": 0, "m": 0, "y": 0, "k": 100},
-                "message": "Pure black color detected"
-            }
-
-        # Calculate C, M, Y
-        c = (1 - r_prime - k) / (1 - k) if k < 1 else 0
-        m = (1 - g_prime - k) / (1 - k) if k < 1 else 0
-        y = (1 - b_prime - k) / (1 - k) if k < 1 else 0
-
-        return {
-            "success": True,
-            "rgb": {"r": r, "g": g, "b": b},
-            "cmyk": {
-                "c": round(c * 100, 2),
-                "m": round(m * 100, 2),
-                "y": round(y * 100, 2),
-                "k": round(k * 100, 2)
-            },
-            "message": f"Successfully converted RGB({r}, {g}, {b}) to CMYK"
-        }
-    
-    except Exception as e:
-        return {
-            "success": False,
-            "error": f"Failed to convert RGB to CMYK: {str(e)}"
-        }
-        
+from .colors import RGBColor, CMYKColor
+from .calculations_agent import rgb_to_cmyk, calculate_color_mix_ratios
 import os
 from google.cloud import aiplatform
 
+# Hardcoded list of 10 unique colors
+HARDCODED_COLORS = (
+    RGBColor(255, 0, 0),      # Red
+    RGBColor(0, 255, 0),      # Green
+    RGBColor(0, 0, 255),      # Blue
+    RGBColor(255, 255, 0),    # Yellow
+    RGBColor(255, 165, 0),    # Orange
+    RGBColor(128, 0, 128),    # Purple
+    RGBColor(0, 255, 255),    # Cyan
+    RGBColor(255, 192, 203),  # Pink
+    RGBColor(128, 128, 128),  # Gray
+    RGBColor(255, 255, 255)   # White
+)
+
 def calculate_random_color_mix_ratios():
     """Hardcode 10 colors, mix them uniquely with ratios, and return 10 new color values with RGB, CMYK, and AI-generated names."""
     try:
-        # Hardcoded list of 10 unique colors (RGB values)
-        hardcoded_colors = [
-            {"r": 255, "g": 0, "b": 0},      # Red
-            {"r": 0, "g": 255, "b": 0},      # Green
-            {"r": 0, "g": 0, "b": 255},      # Blue
-            {"r": 255, "g": 255, "b": 0},    # Yellow
-            {"r": 255, "g": 165, "b": 0},    # Orange
-            {"r": 128, "g": 0, "b": 128},    # Purple
-            {"r": 0, "g": 255, "b": 255},    # Cyan
-            {"r": 255, "g": 192, "b": 203},  # Pink
-            {"r": 128, "g": 128, "b": 128},  # Gray
-            {"r": 255, "g": 255, "b": 255}   # White
-        ]
+        hardcoded_colors = HARDCODED_COLORS
 
         # Generate 10 new colors by mixing 2-3 unique colors
         generated_colors = []
@@ -84,13 +36,13 @@ def calculate_random_color_mix_ratios():
             selected_colors = random.sample(hardcoded_colors, num_colors)
             
             # Create a unique identifier for this combination
-            color_ids = tuple(sorted([(c["r"], c["g"], c["b"]) for c in selected_colors]))
+            color_ids = frozenset(selected_colors)
             
             # If this combination was already used, try again
             attempts = 0
             while color_ids in used_combinations and attempts < 50:
                 selected_colors = random.sample(hardcoded_colors, num_colors)
-                color_ids = tuple(sorted([(c["r"], c["g"], c["b"]) for c in selected_colors]))
+                color_ids = frozenset(selected_colors)
                 attempts += 1
             
             # Mark this combination as used
@@ -102,25 +54,20 @@ def calculate_random_color_mix_ratios():
             normalized_ratios = [ratio / total for ratio in ratios]
 
             # Mix the selected colors using the ratios
-            mixed_rgb = {
-                "r": int(sum(color["r"] * ratio for color, ratio in zip(selected_colors, normalized_ratios))),
-                "g": int(sum(color["g"] * ratio for color, ratio in zip(selected_colors, normalized_ratios))),
-                "b": int(sum(color["b"] * ratio for color, ratio in zip(selected_colors, normalized_ratios)))
-            }
-
-            # Convert the mixed RGB to CMYK using the helper function
-            cmyk_result = rgb_to_cmyk(mixed_rgb["r"], mixed_rgb["g"], mixed_rgb["b"])
-            if not cmyk_result.get("success"):
-                return {"success": False, "error": cmyk_result.get("error")}
+            mixed_rgb = RGBColor(
+                int(sum(color.r * ratio for color, ratio in zip(selected_colors, normalized_ratios))),
+                int(sum(color.g * ratio for color, ratio in zip(selected_colors, normalized_ratios))),
+                int(sum(color.b * ratio for color, ratio in zip(selected_colors, normalized_ratios)))
+            )
 
             # Add the generated color to the list
             generated_colors.append({
                 "name": f"Mixed Color {i+1}",  # Placeholder name
-                "mixed_rgb": mixed_rgb,
-                "mixed_cmyk": cmyk_result["cmyk"],
-                "source_colors": selected_colors,
+                "mixed_rgb": mixed_rgb.to_dict(),
+                "mixed_cmyk": CMYKColor.from_rgb(*mixed_rgb).to_dict(),
+                "source_colors": [color.to_dict() for color in selected_colors],
                 "ratios": normalized_ratios,
-                "hex": f"#{mixed_rgb['r']:02x}{mixed_rgb['g']:02x}{mixed_rgb['b']:02x}"
+                "hex": mixed_rgb.hex()
             })
 
         return {
@@ -198,27 +145,6 @@ def subtractive_color_mix(user_colors: list, ratios: list):
     except Exception as e:
         return {"c": 0, "m": 0, "y": 0, "k": 0}
 
-def cmyk_to_rgb(cmyk: dict):
-    """Convert CMYK to RGB."""
-    try:
-        c = cmyk["c"] / 100.0
-        m = cmyk["m"] / 100.0
-        y = cmyk["y"] / 100.0
-        k = cmyk["k"] / 100.0
-        
-        r = int(255 * (1 - c) * (1 - k))
-        g = int(255 * (1 - m) * (1 - k))
-        b = int(255 * (1 - y) * (1 - k))
-        
-        return {
-            "r": max(0, min(255, r)),
-            "g": max(0, min(255, g)),
-            "b": max(0, min(255, b))
-        }
-    
-    except Exception as e:
-        return {"r": 0, "g": 0, "b": 0}
-
 def calculate_shade_percentage(light_value: float, max_light: float = 100.0):
     """Calculate shade percentage based on light value."""
     try:
@@ -0,0 +1,61 @@
+"""
+Kubelka-Munk paint mixing on sampled reflectance curves
+Paints are upsampled from RGB to reflectance, mixed through their K/S ratios and
+projected back to RGB, for whole matrices of candidate ratios at once
+"""
+
+from functools import lru_cache
+import numpy as np
+
+WAVELENGTHS = np.linspace(400, 700, 16)  # nm, visible range sampled in 20 nm steps
+PRIMARY_PEAKS = (610.0, 540.0, 450.0)  # Centers of the red, green and blue reflectance bands
+BAND_WIDTH = 40.0
+# Real pigments reflect a few percent at every wavelength; RGB 0 maps to this floor,
+# which also keeps K/S finite
+MIN_REFLECTANCE = 0.03
+
+
+@lru_cache(maxsize=1)
+def reflectance_basis():
+    """Per-wavelength share of each RGB primary (rows sum to 1) and the matrix reading RGB back out."""
+    bands = np.exp(-0.5 * ((WAVELENGTHS[:, None] - np.array(PRIMARY_PEAKS)[None, :]) / BAND_WIDTH) ** 2)
+    basis = bands / bands.sum(axis=1, keepdims=True)
+    # Pseudo-inverse: an unmixed paint reads back as exactly its own color
+    readout = np.linalg.pinv(basis)
+    basis.setflags(write=False)
+    readout.setflags(write=False)
+    return basis, readout
+
+
+def srgb_to_linear(rgb: np.ndarray):
+    """sRGB (0-255) → linear light (0-1)."""
+    srgb = np.asarray(rgb, dtype=np.float64) / 255.0
+    return np.where(srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb(linear: np.ndarray):
+    """Linear light (0-1) → sRGB (0-255 floats)."""
+    linear = np.clip(linear, 0.0, 1.0)
+    srgb = np.where(linear <= 0.0031308, linear * 12.92, 1.055 * linear ** (1 / 2.4) - 0.055)
+    return srgb * 255.0
+
+
+def palette_reflectance(palette: np.ndarray):
+    """Reflectance curve of every paint in an (n, 3) RGB palette, shape (n, wavelengths)."""
+    basis, _ = reflectance_basis()
+    linear = np.clip(srgb_to_linear(palette) @ basis.T, 0.0, 1.0)
+    return MIN_REFLECTANCE + (1 - MIN_REFLECTANCE) * linear
+
+
+def kubelka_munk_mix_batch(palette: np.ndarray, weights: np.ndarray):
+    """Mix a palette with every row of a weight matrix using single-constant Kubelka-Munk theory."""
+    reflectance = palette_reflectance(palette)
+    absorption = (1 - reflectance) ** 2 / (2 * reflectance)  # K/S of each paint at each wavelength
+
+    # K/S of a mixture is the concentration-weighted sum of its paints' K/S
+    mixed_absorption = weights @ absorption
+    mixed_reflectance = 1 + mixed_absorption - np.sqrt(mixed_absorption ** 2 + 2 * mixed_absorption)
+
+    _, readout = reflectance_basis()
+    linear = (mixed_reflectance - MIN_REFLECTANCE) / (1 - MIN_REFLECTANCE)
+    return linear_to_srgb(linear @ readout.T)
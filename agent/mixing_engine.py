@@ -0,0 +1,825 @@
+"""
+Vectorized paint mixing engine
+Evaluates whole matrices of candidate ratios with NumPy instead of one dict per candidate
+"""
+
+from functools import lru_cache, partial
+from itertools import chain, combinations
+from math import comb
+import hashlib
+import heapq
+import time
+import numpy as np
+from scipy.spatial import cKDTree
+from .colors import RGBColor
+from .color_space import cmyk_percentages, cmyk_to_rgb_array
+from .color_tables import get_color_tables, delta_e2000_batch
+from .kubelka_munk import kubelka_munk_mix_batch
+from .result_cache import cache_from_env
+
+GRID_STEP = 0.1  # Ratio step of the "grid" and "lattice" solvers
+MIX_METRICS = ("rgb", "delta_e")  # Euclidean RGB distance, or CIEDE2000 via the Lab lookup table
+PALETTE_SHORTLIST = 6  # Paint subsets of each size that find_best_palette_mix searches
+
+# Palettes whose lattice stays indexed in memory
+lattice_cache = cache_from_env("mix_lattices", "MIX_LATTICE_CACHE_SIZE", 64)
+
+
+@lru_cache(maxsize=1)
+def cmyk_roundtrip_table():
+    """Build the RGB → CMYK → RGB round trip as a [channel, max_channel] lookup table from the mapped CMYK tables."""
+    # rgb_to_cmyk derives K from the brightest channel only, so the round trip of
+    # one channel depends on nothing but its own value and the max of all three
+    values = np.arange(256)
+    colors = np.stack(np.broadcast_arrays(values[:, None], values[None, :], values[None, :]), axis=-1)
+    table = cmyk_to_rgb_array(cmyk_percentages(get_color_tables().rgb_to_cmyk(colors)))[..., 0]
+    table[values[:, None] > values[None, :]] = 0  # A channel never exceeds the max channel
+    table.setflags(write=False)
+    return table
+
+
+def lattice_divisions(step: float):
+    """Number of equal units a ratio step splits the whole mix into; the step must divide 1."""
+    divisions = int(round(1 / step))
+    if divisions < 1 or abs(divisions * step - 1) > 1e-9:
+        raise ValueError(f"Ratio step {step} does not divide 1 evenly")
+    return divisions
+
+
+@lru_cache(maxsize=32)
+def simplex_units(color_count: int, divisions: int):
+    """Every split of `divisions` units among color_count paints, in lexicographic order (stars and bars)."""
+    # Each choice of color_count - 1 "bar" positions among divisions + color_count - 1 slots is one composition
+    slots = divisions + color_count - 1
+    count = comb(slots, color_count - 1)
+    bars = np.fromiter(chain.from_iterable(combinations(range(slots), color_count - 1)), dtype=np.int64, count=count * (color_count - 1))
+    bars = bars.reshape(count, color_count - 1)
+    edges = np.hstack([np.full((count, 1), -1), bars, np.full((count, 1), slots)])
+    units = np.diff(edges, axis=1) - 1
+    units.setflags(write=False)
+    return units
+
+
+@lru_cache(maxsize=32)
+def _simplex_weights(color_count: int, divisions: int):
+    weights = simplex_units(color_count, divisions) / divisions
+    weights.setflags(write=False)
+    return weights
+
+
+def simplex_lattice(color_count: int, step: float = GRID_STEP):
+    """All ratio sets summing to 1 in multiples of step, repeated ratios included, as a shared read-only array."""
+    return _simplex_weights(color_count, lattice_divisions(step))
+
+
+def lattice_size(color_count: int, step: float):
+    """Number of ratio sets on the lattice of color_count paints at step (the work of an exhaustive search)."""
+    return comb(lattice_divisions(step) + color_count - 1, color_count - 1)
+
+
+def ratio_tuple(weights: np.ndarray, index: int):
+    """One lattice row as a plain tuple of ratios."""
+    return tuple(weights[index].tolist())
+
+
+def palette_to_array(user_colors: list):
+    """Pack a list of {"r", "g", "b"} dicts into an (n, 3) float array."""
+    return np.array([[color["r"], color["g"], color["b"]] for color in user_colors], dtype=np.float64).reshape(-1, 3)
+
+
+def green_rule_paints(palette: np.ndarray):
+    """Indices of the (last) pure blue and pure yellow paints, or None."""
+    blue = yellow = None
+    for i, (r, g, b) in enumerate(palette):
+        if r == 0 and g == 0 and b == 255:
+            blue = i
+        elif r == 255 and g == 255 and b == 0:
+            yellow = i
+    return blue, yellow
+
+
+def subtractive_mix_batch(palette: np.ndarray, weights: np.ndarray):
+    """Mix a palette with every row of a weight matrix (the batched subtractive_color_mix)."""
+    mixed = np.zeros((weights.shape[0], 3), dtype=np.float64)
+    # Accumulate color by color to keep the scalar implementation's summation order
+    for i in range(palette.shape[0]):
+        mixed = mixed + weights[:, i:i + 1] * palette[i]
+
+    # Blue + Yellow = Green rule: the last pure blue / pure yellow paint sets the amount
+    blue, yellow = green_rule_paints(palette)
+    blue_amount = weights[:, blue] if blue is not None else np.zeros(weights.shape[0])
+    yellow_amount = weights[:, yellow] if yellow is not None else np.zeros(weights.shape[0])
+
+    greens = (blue_amount > 0) & (yellow_amount > 0)
+    if greens.any():
+        green_strength = np.minimum(blue_amount, yellow_amount) * 2
+        mixed[:, 1] = np.where(greens, np.minimum(255, mixed[:, 1] + green_strength * 255), mixed[:, 1])
+        mixed[:, 2] = np.where(greens, mixed[:, 2] * (1 - green_strength * 0.5), mixed[:, 2])
+        mixed[:, 0] = np.where(greens, mixed[:, 0] * (1 - green_strength * 0.3), mixed[:, 0])
+    return mixed
+
+
+# Mixing models: name → function(palette (n, 3), weights (m, n)) returning (m, 3) float RGB
+MIX_MODELS = {
+    "subtractive": subtractive_mix_batch,  # Weighted RGB average with the blue + yellow rule
+    "kubelka_munk": kubelka_munk_mix_batch  # Reflectance mixing through K/S ratios
+}
+
+
+def quantize_mix_batch(mixed: np.ndarray):
+    """Truncate mixed colors to integers and apply the CMYK round trip used for comparison."""
+    quantized = np.trunc(mixed).astype(np.int64)
+    valid = ((quantized >= 0) & (quantized <= 255)).all(axis=1)
+    clipped = np.clip(quantized, 0, 255)
+    result = cmyk_roundtrip_table()[clipped, clipped.max(axis=1, keepdims=True)]
+    # Out of range mixes fail CMYK conversion and fall back to zero CMYK, i.e. white
+    result[~valid] = 255
+    return result
+
+
+def rgb_distance_batch(mixed_rgb: np.ndarray, target):
+    """Euclidean RGB distance from every mixed color to the target."""
+    delta = mixed_rgb.astype(np.float64) - np.asarray(target, dtype=np.float64)
+    return np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2 + delta[:, 2] ** 2)
+
+
+def delta_e_batch(mixed_rgb: np.ndarray, target):
+    """CIEDE2000 difference from every mixed color to the target, using the shared Lab table."""
+    tables = get_color_tables()
+    target_lab = tables.rgb_to_lab(np.asarray(target, dtype=np.float64))
+    return delta_e2000_batch(tables.rgb_to_lab(mixed_rgb), target_lab)
+
+
+def score_batch(mixed_rgb: np.ndarray, target, metric: str = "rgb"):
+    """Objective minimized by the solvers: RGB distance or perceptual ΔE2000."""
+    if metric == "delta_e":
+        return delta_e_batch(mixed_rgb, target)
+    return rgb_distance_batch(mixed_rgb, target)
+
+
+def evaluate_ratio_batch(palette: np.ndarray, weights: np.ndarray, target, metric: str = "rgb", model: str = "subtractive"):
+    """Mixed RGB and score against the target for every candidate ratio row."""
+    mixed_rgb = quantize_mix_batch(MIX_MODELS[model](palette, weights))
+    return mixed_rgb, score_batch(mixed_rgb, target, metric)
+
+
+def match_result(ratios: tuple, mixed: np.ndarray, target, score: float, **extra):
+    """Solver result for one recipe; "distance" is always the RGB distance, "score" the objective."""
+    mixed = np.asarray(mixed)
+    return dict({
+        "ratios": ratios,
+        "mixed_rgb": RGBColor(int(mixed[0]), int(mixed[1]), int(mixed[2])),
+        "distance": float(rgb_distance_batch(mixed[None, :], target)[0]),
+        "score": float(score)
+    }, **extra)
+
+
+class SearchBudget:
+    """Time limit and good-enough score for one solve, checked between the steps of a search.
+
+    stopped_by records why a search returned early ("tolerance" or "max_ms"); once set,
+    every later stage of the same solve stops too. The deadline is on the system-wide
+    monotonic clock, so worker processes can check a pickled copy.
+    """
+
+    def __init__(self, max_ms: float = None, tolerance: float = None):
+        self.deadline = None if max_ms is None else time.monotonic() + max_ms / 1000
+        self.tolerance = tolerance
+        self.stopped_by = None
+
+    def should_stop(self, best_score: float):
+        """Whether to return the best recipe so far (score in the solve's metric)."""
+        if self.stopped_by is None:
+            if self.tolerance is not None and best_score <= self.tolerance:
+                self.stopped_by = "tolerance"
+            elif self.deadline is not None and time.monotonic() >= self.deadline:
+                self.stopped_by = "max_ms"
+        return self.stopped_by is not None
+
+
+class TopRecipes:
+    """The k best distinct recipes a search has scored, ordered by (score, ratios), in a bounded heap.
+
+    Recipes are distinct when they mix a different color or use a different set of
+    paints; of two recipes that share both, only the better one is kept.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap = []  # Max-heap of (-score, -ratios, key, ratios, mixed): the worst kept recipe on top
+        self._keys = {}
+
+    def full(self):
+        """Whether k recipes are kept, so new ones have to displace the worst."""
+        return len(self._heap) >= self.k
+
+    def worst(self):
+        """(score, ratios) a recipe has to beat to get in, or None while fewer than k are kept."""
+        if not self.full():
+            return None
+        entry = self._heap[0]
+        return -entry[0], entry[3]
+
+    @staticmethod
+    def recipe_key(ratios: tuple, mixed):
+        """Mixed color plus the paints used: recipes sharing both count as one."""
+        return tuple(int(value) for value in mixed), tuple(i for i, ratio in enumerate(ratios) if ratio > 0)
+
+    def offer(self, score: float, ratios: tuple, mixed):
+        """Keep one recipe if it is among the k best distinct ones so far."""
+        key = self.recipe_key(ratios, mixed)
+        order = (-score, tuple(-ratio for ratio in ratios))
+        if key in self._keys:
+            if order <= self._keys[key]:
+                return
+            self._heap = [entry for entry in self._heap if entry[2] != key]
+            heapq.heapify(self._heap)
+        elif self.full():
+            if order <= self._heap[0][:2]:
+                return
+            del self._keys[heapq.heappop(self._heap)[2]]
+        self._keys[key] = order
+        heapq.heappush(self._heap, order + (key, ratios, key[0]))
+
+    def offer_batch(self, scores: np.ndarray, weights: np.ndarray, mixed_rgb: np.ndarray):
+        """Offer every scored ratio row, best first, stopping at the first one that cannot get in."""
+        worst = self.worst()
+        rows = np.arange(len(scores)) if worst is None else np.flatnonzero(scores <= worst[0])
+        if len(rows) == 0:
+            return
+        rows = rows[np.lexsort(tuple(weights[rows].T[::-1]) + (scores[rows],))]
+        for row in rows.tolist():
+            ratios = tuple(weights[row].tolist())
+            worst = self.worst()
+            if worst is not None and (float(scores[row]), ratios) >= worst:
+                break
+            self.offer(float(scores[row]), ratios, mixed_rgb[row])
+
+    def results(self, target, first: dict = None):
+        """match_result dicts from best to worst; `first` (the solver's own best recipe) leads if given."""
+        kept = sorted((-entry[0], entry[3], entry[2], entry[4]) for entry in self._heap)
+        results, skip = [], None
+        if first is not None:
+            results.append(first)
+            mixed = first["mixed_rgb"]
+            skip = self.recipe_key(first["ratios"], (mixed.r, mixed.g, mixed.b))
+        for score, ratios, key, mixed in kept:
+            if key == skip:
+                continue
+            results.append(match_result(ratios, np.array(mixed), target, score))
+        return results[:self.k]
+
+
+def find_best_ratios(target_rgb: dict, user_colors: list, metric: str = "rgb", model: str = "subtractive", step: float = GRID_STEP, top_k: int = 1):
+    """Exhaustive search: index of the best ratio set on the lattice, plus its ratios, mixed RGB and distance.
+
+    With top_k > 1, "top_recipes" lists the top_k best distinct recipes (see TopRecipes).
+    """
+    weights = simplex_lattice(len(user_colors), step)
+    target = (target_rgb["r"], target_rgb["g"], target_rgb["b"])
+    mixed_rgb, scores = evaluate_ratio_batch(palette_to_array(user_colors), weights, target, metric, model)
+
+    # argmin returns the first minimum, matching the strict "<" of the scalar loop
+    best = int(np.argmin(scores))
+    result = match_result(ratio_tuple(weights, best), mixed_rgb[best], target, scores[best], index=best)
+    if top_k > 1:
+        recipes = TopRecipes(top_k)
+        recipes.offer_batch(scores, weights, mixed_rgb)
+        result["top_recipes"] = recipes.results(target, result)
+    return result
+
+
+def project_to_simplex(weights: np.ndarray):
+    """Euclidean projection of each row onto the probability simplex (sort-based)."""
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    ordered = -np.sort(-weights, axis=1)
+    cumulative = np.cumsum(ordered, axis=1) - 1
+    index = np.arange(1, weights.shape[1] + 1)
+    support = (ordered - cumulative / index) > 0
+    rho = weights.shape[1] - np.argmax(support[:, ::-1], axis=1)
+    theta = cumulative[np.arange(weights.shape[0]), rho - 1] / rho
+    return np.maximum(weights - theta[:, None], 0)
+
+
+def least_squares_simplex(palette: np.ndarray, target, iterations: int = 200):
+    """Projected gradient descent on the linear mix: min ||w·palette - target||² with w on the simplex."""
+    target = np.asarray(target, dtype=np.float64)
+    gram = palette @ palette.T
+    lipschitz = 2 * max(np.linalg.eigvalsh(gram).max(), 1e-9)
+    weights = np.full(palette.shape[0], 1.0 / palette.shape[0])
+    for _ in range(iterations):
+        gradient = 2 * (palette @ (weights @ palette - target))
+        updated = project_to_simplex(weights - gradient / lipschitz)[0]
+        if np.abs(updated - weights).max() < 1e-6:
+            return updated
+        weights = updated
+    return weights
+
+
+def round_to_units(weights: np.ndarray, total_units: int):
+    """Round simplex weights to integer units summing to total_units (largest remainder)."""
+    scaled = np.asarray(weights, dtype=np.float64) * total_units
+    units = np.floor(scaled).astype(np.int64)
+    remainder = total_units - units.sum()
+    if remainder > 0:
+        units[np.argsort(-(scaled - units), kind="stable")[:remainder]] += 1
+    return units
+
+
+def refine_units(palette: np.ndarray, target, start_units: np.ndarray, total_units: int, metric: str = "rgb", model: str = "subtractive", recipes: TopRecipes = None, budget: SearchBudget = None):
+    """Coarse-to-fine local search: move mass between pairs of paints while it lowers the score.
+
+    Every scored move is offered to `recipes` if given; `budget` can end the search
+    after any step with the ratios reached so far.
+    """
+    n = palette.shape[0]
+    pairs = [(i, j) for i in range(n) for j in range(n) if i != j]
+    current = np.asarray(start_units, dtype=np.int64)
+    _, distance = evaluate_ratio_batch(palette, current[None, :] / total_units, target, metric, model)
+    best_distance = float(distance[0])
+
+    step = max(total_units // 10, 1)
+    while step >= 1 and pairs:
+        if budget is not None and budget.should_stop(best_distance):
+            return current, best_distance
+        moves = []
+        for i, j in pairs:
+            if current[i] >= step:
+                candidate = current.copy()
+                candidate[i] -= step
+                candidate[j] += step
+                moves.append(candidate)
+        if moves:
+            moves = np.array(moves)
+            mixed_rgb, distances = evaluate_ratio_batch(palette, moves / total_units, target, metric, model)
+            if recipes is not None:
+                recipes.offer_batch(distances, moves / total_units, mixed_rgb)
+            best = int(np.argmin(distances))
+            if distances[best] < best_distance:
+                current, best_distance = moves[best], float(distances[best])
+                continue
+        step //= 2
+    return polish_units(palette, target, current, best_distance, total_units, metric, model, recipes=recipes, budget=budget)
+
+
+@lru_cache(maxsize=16)
+def neighbourhood_offsets(color_count: int, radius: int):
+    """Integer offsets summing to zero with every component within ±radius."""
+    axes = np.meshgrid(*[np.arange(-radius, radius + 1)] * (color_count - 1), indexing="ij")
+    free = np.stack([axis.ravel() for axis in axes], axis=1).reshape(-1, color_count - 1)
+    offsets = np.concatenate([free, -free.sum(axis=1, keepdims=True)], axis=1)
+    offsets = offsets[np.abs(offsets[:, -1]) <= radius]
+    offsets.setflags(write=False)
+    return offsets
+
+
+def polish_units(palette: np.ndarray, target, current: np.ndarray, best_distance: float, total_units: int, metric: str = "rgb", model: str = "subtractive", radius: int = 3, recipes: TopRecipes = None, budget: SearchBudget = None):
+    """Exhaustively score the lattice points around the current ratios until none is better.
+
+    The quantized mix is piecewise constant, so single pair moves can stall on a plateau.
+    """
+    if palette.shape[0] < 2:
+        return current, best_distance
+    offsets = neighbourhood_offsets(palette.shape[0], radius)
+    while True:
+        if budget is not None and budget.should_stop(best_distance):
+            return current, best_distance
+        candidates = current + offsets
+        candidates = candidates[(candidates >= 0).all(axis=1)]
+        mixed_rgb, distances = evaluate_ratio_batch(palette, candidates / total_units, target, metric, model)
+        if recipes is not None:
+            recipes.offer_batch(distances, candidates / total_units, mixed_rgb)
+        best = int(np.argmin(distances))
+        if distances[best] >= best_distance:
+            return current, best_distance
+        current, best_distance = candidates[best], float(distances[best])
+
+
+def find_best_ratios_continuous(target_rgb: dict, user_colors: list, resolution: float = 0.01, metric: str = "rgb", model: str = "subtractive", top_k: int = 1, budget: SearchBudget = None):
+    """Continuous solver: least squares start on the simplex plus coarse-to-fine refinement at `resolution`.
+
+    With top_k > 1, "top_recipes" lists the best distinct recipes the refinement scored.
+    resolution must divide 1 evenly (ValueError otherwise).
+    """
+    total_units = lattice_divisions(resolution)
+    palette = palette_to_array(user_colors)
+    target = (target_rgb["r"], target_rgb["g"], target_rgb["b"])
+
+    # Start from both the coarse grid optimum and the linear least squares optimum
+    coarse = find_best_ratios(target_rgb, user_colors, metric, model)
+    starts = [
+        round_to_units(np.array(coarse["ratios"]), total_units),
+        round_to_units(least_squares_simplex(palette, target), total_units)
+    ]
+
+    recipes = TopRecipes(top_k) if top_k > 1 else None
+    best_units, best_distance = None, float("inf")
+    for start in starts:
+        if best_units is not None and budget is not None and budget.should_stop(best_distance):
+            break
+        units, distance = refine_units(palette, target, start, total_units, metric, model, recipes, budget)
+        if distance < best_distance:
+            best_units, best_distance = units, distance
+
+    mixed_rgb, _ = evaluate_ratio_batch(palette, best_units[None, :] / total_units, target, model=model)
+    result = match_result(tuple(float(u) / total_units for u in best_units), mixed_rgb[0], target, best_distance)
+    if recipes is not None:
+        result["top_recipes"] = recipes.results(target, result)
+    return result
+
+
+def find_best_ratios_warm(target_rgb: dict, user_colors: list, start_ratios: list, resolution: float = 0.01, metric: str = "rgb", model: str = "subtractive", top_k: int = 1, budget: SearchBudget = None):
+    """Continuous solver for a target near a previous one: refine the previous recipe only, without the grid and least squares starts."""
+    total_units = lattice_divisions(resolution)
+    palette = palette_to_array(user_colors)
+    target = (target_rgb["r"], target_rgb["g"], target_rgb["b"])
+
+    start = round_to_units(np.asarray(start_ratios, dtype=np.float64), total_units)
+    recipes = TopRecipes(top_k) if top_k > 1 else None
+    units, distance = refine_units(palette, target, start, total_units, metric, model, recipes, budget)
+    mixed_rgb, _ = evaluate_ratio_batch(palette, units[None, :] / total_units, target, model=model)
+    result = match_result(tuple(float(u) / total_units for u in units), mixed_rgb[0], target, distance)
+    if recipes is not None:
+        result["top_recipes"] = recipes.results(target, result)
+    return result
+
+
+@lru_cache(maxsize=1)
+def roundtrip_slack():
+    """Largest amount the CMYK round trip moves any channel (used to widen bounds)."""
+    table = cmyk_roundtrip_table()
+    values = np.arange(256)
+    reachable = values[:, None] <= values[None, :]  # a channel never exceeds the max channel
+    return int(np.abs(table - values[:, None])[reachable].max())
+
+
+def tighten_box(lo: np.ndarray, hi: np.ndarray, total: int):
+    """Shrink unit bounds lo <= u <= hi to what sum(u) == total allows; None if the box is empty."""
+    lo = np.maximum(lo, total - (hi.sum() - hi))
+    hi = np.minimum(hi, total - (lo.sum() - lo))
+    if (lo > hi).any():
+        return None
+    return lo, hi
+
+
+def box_mix_bounds(palette: np.ndarray, lo: np.ndarray, hi: np.ndarray, total: int, green_paints):
+    """Per-channel range of the quantized subtractive mix over every unit vector in a (tight) box."""
+    # Linear part: the extreme of each channel fills the cheapest (or dearest) paints first
+    spare = total - lo.sum()
+    base = lo @ palette
+    extremes = []
+    for order in (np.argsort(palette, axis=0), np.argsort(-palette, axis=0)):
+        capacity = (hi - lo)[order]
+        fill = np.clip(spare - (np.cumsum(capacity, axis=0) - capacity), 0, capacity)
+        extremes.append((base + (fill * np.take_along_axis(palette, order, axis=0)).sum(axis=0)) / total)
+    low, high = extremes
+
+    blue, yellow = green_paints
+    if blue is not None and yellow is not None:
+        strength_lo = min(lo[blue], lo[yellow]) * 2 / total
+        strength_hi = min(hi[blue], hi[yellow]) * 2 / total
+        low = np.array([low[0] * (1 - strength_hi * 0.3), min(255, low[1] + strength_lo * 255), low[2] * (1 - strength_hi * 0.5)])
+        high = np.array([high[0] * (1 - strength_lo * 0.3), min(255, high[1] + strength_hi * 255), high[2] * (1 - strength_lo * 0.5)])
+
+    # Truncation, then the CMYK round trip; the 1e-9 absorbs summation order differences
+    slack = roundtrip_slack()
+    return np.clip(np.floor(low - 1e-9) - slack, 0, 255), np.clip(np.floor(high + 1e-9) + slack, 0, 255)
+
+
+def box_lexmin(lo: np.ndarray, hi: np.ndarray, total: int):
+    """Lexicographically smallest unit vector in a tight box (for exhaustive-search tie-breaking)."""
+    units = []
+    remaining = total
+    for i in range(len(lo)):
+        unit = max(lo[i], remaining - hi[i + 1:].sum())
+        units.append(int(unit))
+        remaining -= unit
+    return tuple(units)
+
+
+def box_units(lo: np.ndarray, hi: np.ndarray, total: int):
+    """Every unit vector in a box that sums to total."""
+    free = int(np.argmax(hi - lo))  # solved for from the others
+    others = [i for i in range(len(lo)) if i != free]
+    grids = np.meshgrid(*[np.arange(lo[i], hi[i] + 1) for i in others], indexing="ij")
+    units = np.empty((grids[0].size, len(lo)), dtype=np.int64)
+    for i, grid in zip(others, grids):
+        units[:, i] = grid.ravel()
+    units[:, free] = total - units[:, others].sum(axis=1)
+    return units[(units[:, free] >= lo[free]) & (units[:, free] <= hi[free])]
+
+
+def find_best_ratios_branch_bound(target_rgb: dict, user_colors: list, resolution: float = 0.01, leaf_size: int = 512, bounds: tuple = None, top_k: int = 1, budget: SearchBudget = None):
+    """Exact search of the lattice at `resolution` that skips regions which cannot beat the best mix so far.
+
+    The ratio simplex is split into boxes of unit bounds, best lower bound first; a box
+    whose quantized color range is farther from the target than the best mix found is
+    discarded. Returns the same recipe as find_best_ratios at that step. bounds limits
+    the search to (lo, hi) units per paint; None if that box holds no ratio set.
+    With top_k > 1 a box is only discarded once it cannot beat the k-th best distinct
+    recipe, and "top_recipes" holds the exact top_k. A `budget` stops the search
+    between boxes once a recipe exists; "stopped_by" then says why.
+    resolution must divide 1 evenly (ValueError otherwise).
+    """
+    total = lattice_divisions(resolution)
+    palette = palette_to_array(user_colors)
+    target = (target_rgb["r"], target_rgb["g"], target_rgb["b"])
+    target_array = np.asarray(target, dtype=np.float64)
+    n = len(user_colors)
+    if n == 1:
+        return dict(find_best_ratios(target_rgb, user_colors, top_k=top_k), evaluated=1)
+    green_paints = green_rule_paints(palette)
+
+    def lower_bound(lo, hi):
+        low, high = box_mix_bounds(palette, lo, hi, total, green_paints)
+        delta = np.clip(target_array, low, high) - target_array
+        return float(np.sqrt(delta[0] ** 2 + delta[1] ** 2 + delta[2] ** 2))
+
+    recipes = TopRecipes(top_k) if top_k > 1 else None
+
+    def cutoff():
+        """(distance, units) a box has to beat to be searched, or None while anything can."""
+        if recipes is None:
+            return None if best_units is None else (best_distance, best_units)
+        worst = recipes.worst()
+        return None if worst is None else (worst[0], tuple(round(ratio * total) for ratio in worst[1]))
+
+    best_distance, best_units = float("inf"), None
+    evaluated = 0
+    if bounds is None:
+        lo, hi = np.zeros(n, dtype=np.int64), np.full(n, total, dtype=np.int64)
+    else:
+        box = tighten_box(np.asarray(bounds[0], dtype=np.int64), np.asarray(bounds[1], dtype=np.int64), total)
+        if box is None:
+            return None
+        lo, hi = box
+    heap = [(lower_bound(lo, hi), box_lexmin(lo, hi, total), 0, lo, hi)]
+    counter = 1
+    while heap:
+        bound, lexmin, _, lo, hi = heapq.heappop(heap)
+        # Nothing left can beat (or tie earlier than) the best mix: the exhaustive result is final
+        limit = cutoff()
+        if limit is not None and (bound, lexmin) >= limit:
+            break
+        if best_units is not None and budget is not None and budget.should_stop(best_distance):
+            break
+
+        widths = hi - lo + 1
+        if np.prod(widths) // widths.max() <= leaf_size:
+            units = box_units(lo, hi, total)
+            evaluated += len(units)
+            mixed_rgb, distances = evaluate_ratio_batch(palette, units / total, target)
+            if recipes is not None:
+                recipes.offer_batch(distances, units / total, mixed_rgb)
+            closest = distances.min()
+            ties = units[distances == closest]
+            first = tuple(ties[np.lexsort(ties.T[::-1])[0]].tolist())
+            if best_units is None or (closest, first) < (best_distance, best_units):
+                best_distance, best_units = float(closest), first
+            continue
+
+        split = int(np.argmax(hi - lo))
+        middle = (lo[split] + hi[split]) // 2
+        for child_lo, child_hi in ((lo, np.where(np.arange(n) == split, middle, hi)), (np.where(np.arange(n) == split, middle + 1, lo), hi)):
+            box = tighten_box(child_lo, child_hi, total)
+            if box is None:
+                continue
+            child_bound = lower_bound(*box)
+            child_lexmin = box_lexmin(*box, total)
+            limit = cutoff()
+            if limit is None or (child_bound, child_lexmin) < limit:
+                heapq.heappush(heap, (child_bound, child_lexmin, counter, *box))
+                counter += 1
+
+    units = np.array(best_units)
+    mixed_rgb, _ = evaluate_ratio_batch(palette, units[None, :] / total, target)
+    result = match_result(tuple((units / total).tolist()), mixed_rgb[0], target, best_distance, evaluated=evaluated)
+    if budget is not None:
+        result["stopped_by"] = budget.stopped_by
+    if recipes is not None:
+        result["top_recipes"] = recipes.results(target, result)
+    return result
+
+
+def find_best_ratios_branch_bound_sharded(target_rgb: dict, user_colors: list, resolution: float, executor, shards: int, top_k: int = 1, budget: SearchBudget = None):
+    """Branch-and-bound split into slabs of the first paint's ratio, searched by executor.map.
+
+    Every slab is searched exactly; the merge keeps the smallest (distance, ratios), the
+    same recipe as the single search.
+    """
+    total = lattice_divisions(resolution)
+    n = len(user_colors)
+    edges = np.linspace(0, total + 1, min(shards, total + 1) + 1).astype(np.int64)
+    slabs = []
+    for start, stop in zip(edges[:-1], edges[1:]):
+        lo, hi = [0] * n, [total] * n
+        lo[0], hi[0] = int(start), int(stop) - 1
+        slabs.append((lo, hi))
+    search = partial(find_best_ratios_branch_bound, target_rgb, user_colors, resolution, 512, top_k=top_k, budget=budget)
+    results = [result for result in executor.map(search, slabs) if result is not None]
+    best = min(results, key=lambda result: (result["distance"], result["ratios"]))
+    best = dict(best, evaluated=sum(result["evaluated"] for result in results))
+    if budget is not None:
+        # Each slab checked its own copy of the budget
+        budget.stopped_by = next((result["stopped_by"] for result in results if result["stopped_by"]), None)
+        best["stopped_by"] = budget.stopped_by
+    if top_k > 1:
+        target = (target_rgb["r"], target_rgb["g"], target_rgb["b"])
+        best["top_recipes"] = merge_top_recipes([result["top_recipes"] for result in results], top_k, target, best)
+    return best
+
+
+def merge_top_recipes(recipe_lists: list, top_k: int, target, best: dict):
+    """Combine the top_recipes of independent searches into the top_k best distinct ones, led by `best`."""
+    recipes = TopRecipes(top_k)
+    for recipe in chain.from_iterable(recipe_lists):
+        mixed = recipe["mixed_rgb"]
+        recipes.offer(recipe["score"], tuple(recipe["ratios"]), (mixed.r, mixed.g, mixed.b))
+    return recipes.results(target, best)
+
+
+def hull_distance_batch(subsets: np.ndarray, target, iterations: int = 150):
+    """Distance from the target to the linear-mix hull of every subset, solved together.
+
+    subsets has shape (s, k, 3); adding a paint can only shrink this distance, which makes it
+    a cheap bound for ranking which paints are worth combining.
+    """
+    target = np.asarray(target, dtype=np.float64)
+    count, k, _ = subsets.shape
+    gram = subsets @ subsets.transpose(0, 2, 1)
+    step = 1 / (2 * np.maximum(np.linalg.eigvalsh(gram)[:, -1], 1e-9))
+    weights = np.full((count, k), 1.0 / k)
+    for _ in range(iterations):
+        residual = np.einsum("sk,skc->sc", weights, subsets) - target
+        gradient = 2 * np.einsum("skc,sc->sk", subsets, residual)
+        weights = project_to_simplex(weights - gradient * step[:, None])
+    residual = np.einsum("sk,skc->sc", weights, subsets) - target
+    return np.sqrt((residual ** 2).sum(axis=1))
+
+
+def select_paint_subsets(palette: np.ndarray, target, max_paints: int = 4, beam_width: int = 8):
+    """Beam search over paint subsets of up to max_paints, ranked by their hull distance.
+
+    Returns candidate subsets (tuples of palette indices) for exact evaluation instead of
+    enumerating every combination of the palette.
+    """
+    count = palette.shape[0]
+    singles = np.sqrt(((palette - np.asarray(target, dtype=np.float64)) ** 2).sum(axis=1))
+    order = np.argsort(singles, kind="stable")
+    beam = [((int(i),), float(singles[i])) for i in order[:beam_width]]
+    candidates = list(beam)
+
+    for _ in range(2, min(max_paints, count) + 1):
+        expansions = sorted({tuple(sorted(subset + (j,))) for subset, _ in beam for j in range(count) if j not in subset})
+        if not expansions:
+            break
+        distances = hull_distance_batch(palette[np.array(expansions)], target)
+        ranked = np.argsort(distances, kind="stable")[:beam_width]
+        beam = [(expansions[i], float(distances[i])) for i in ranked]
+        candidates.extend(beam)
+    return candidates
+
+
+def solve_palette_mix(target_rgb: dict, user_colors: list, solver: str = "grid", resolution: float = 0.01, metric: str = "rgb", model: str = "subtractive", top_k: int = 1, budget: SearchBudget = None):
+    """Best ratios for every paint of a (small) palette with the selected solver.
+
+    The result's "stopped_by" carries the budget's state back from a worker process.
+    """
+    if solver == "continuous":
+        result = find_best_ratios_continuous(target_rgb, user_colors, resolution, metric, model, top_k, budget)
+    elif solver == "branch_bound":
+        result = find_best_ratios_branch_bound(target_rgb, user_colors, resolution, top_k=top_k, budget=budget)
+    elif solver == "lattice":
+        result = get_mix_lattice(user_colors, model).best_match(target_rgb, metric, top_k)
+    else:
+        result = find_best_ratios(target_rgb, user_colors, metric, model, top_k=top_k)
+    return dict(result, stopped_by=None if budget is None else budget.stopped_by)
+
+
+def find_best_palette_mix(target_rgb: dict, user_colors: list, max_paints: int = 4, solver: str = "grid", resolution: float = 0.01, metric: str = "rgb", model: str = "subtractive", shortlist: int = PALETTE_SHORTLIST, executor=None, top_k: int = 1, budget: SearchBudget = None):
+    """Pick the best subset of at most max_paints paints from a large palette, plus its ratios.
+
+    With top_k > 1, "top_recipes" merges the best recipes of every shortlisted subset
+    (ratios over the whole palette). With a `budget`, subsets are solved most promising
+    first and the remaining ones are skipped once it stops the solve.
+    """
+    palette = palette_to_array(user_colors)
+    target = (target_rgb["r"], target_rgb["g"], target_rgb["b"])
+    candidates = select_paint_subsets(palette, target, max_paints)
+
+    # Exact-evaluate the most promising subsets of every size
+    by_size = {}
+    for subset, bound in candidates:
+        by_size.setdefault(len(subset), []).append((bound, subset))
+    shortlisted = [(bound, subset) for size in sorted(by_size) for bound, subset in sorted(by_size[size])[:shortlist]]
+    # Ties go to the earlier subset of this order whichever order they are solved in
+    order = list(range(len(shortlisted)))
+    if budget is not None:
+        order.sort(key=lambda position: shortlisted[position][0])
+
+    # Subsets are independent: an executor (see parallel_solver) can solve them in worker processes
+    solve = partial(solve_palette_mix, target_rgb, solver=solver, resolution=resolution, metric=metric, model=model, top_k=top_k, budget=budget)
+    palettes = [[user_colors[i] for i in shortlisted[position][1]] for position in order]
+    results = executor.map(solve, palettes) if executor else map(solve, palettes)
+
+    def palette_ratios(subset, subset_ratios):
+        ratios = [0.0] * len(user_colors)
+        for index, ratio in zip(subset, subset_ratios):
+            ratios[index] = ratio
+        return tuple(ratios)
+
+    best, best_position = None, None
+    recipe_lists = []
+    for position, result in zip(order, results):
+        subset = shortlisted[position][1]
+        # Smallest score, then the earlier (smaller) subset on ties
+        if best is None or (result["score"], position) < (best["score"], best_position):
+            best, best_position = dict(result, selected_colors=list(subset)), position
+        if top_k > 1:
+            recipe_lists.append([dict(recipe, ratios=palette_ratios(subset, recipe["ratios"])) for recipe in result["top_recipes"]])
+        if budget is not None:
+            budget.stopped_by = budget.stopped_by or result["stopped_by"]
+            if budget.should_stop(best["score"]):
+                break
+
+    best["subset_ratios"] = best["ratios"]
+    best["ratios"] = palette_ratios(best["selected_colors"], best["ratios"])
+    if top_k > 1:
+        best["top_recipes"] = merge_top_recipes(recipe_lists, top_k, target, best)
+    return best
+
+
+def palette_key(user_colors: list, *options):
+    """Canonical hash of a palette (and solver options), independent of int/float spelling."""
+    canonical = ";".join(",".join(repr(float(color[c])) for c in "rgb") for color in user_colors)
+    canonical += "|" + ",".join(repr(option) for option in options)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+class MixLattice:
+    """Every mix of one palette on the ratio grid, indexed in a KD-tree for nearest lookups."""
+
+    def __init__(self, user_colors: list, model: str = "subtractive"):
+        self.weights = simplex_lattice(len(user_colors))
+        self.palette = palette_to_array(user_colors)
+        self.mixed_rgb = quantize_mix_batch(MIX_MODELS[model](self.palette, self.weights))
+        # Many ratio sets land on the same color; index each color once, by its first ratio set
+        self.points, self.first_index = np.unique(self.mixed_rgb, axis=0, return_index=True)
+        self.tree = cKDTree(self.points.astype(np.float64))
+        self._points_lab = None
+
+    def nearest(self, targets: np.ndarray, metric: str = "rgb"):
+        """Lattice index of the best ratio set for every target row, with grid search tie-breaking."""
+        targets = np.atleast_2d(np.asarray(targets, dtype=np.float64))
+        if metric == "delta_e":
+            return self._nearest_delta_e(targets)
+        best = np.empty(len(targets), dtype=np.int64)
+        k = min(4, len(self.points))
+        for row, target in enumerate(targets):
+            while True:
+                tree_distances, neighbours = self.tree.query(target, k=k)
+                neighbours = np.atleast_1d(neighbours)
+                distances = rgb_distance_batch(self.points[neighbours], target)
+                closest = distances.min()
+                # Widen the query until no unseen point can tie with the closest one
+                if k == len(self.points) or np.atleast_1d(tree_distances)[-1] > closest + 1e-6:
+                    break
+                k = min(k * 2, len(self.points))
+            best[row] = self.first_index[neighbours[distances == closest]].min()
+        return best
+
+    def _nearest_delta_e(self, targets: np.ndarray):
+        """ΔE2000 is not a metric the KD-tree can prune with, so scan the distinct lattice colors."""
+        tables = get_color_tables()
+        if self._points_lab is None:
+            self._points_lab = tables.rgb_to_lab(self.points)
+        scores = delta_e2000_batch(self._points_lab[None, :, :], tables.rgb_to_lab(targets)[:, None, :])
+        ties = scores == scores.min(axis=1, keepdims=True)
+        return np.where(ties, self.first_index[None, :], len(self.weights)).min(axis=1)
+
+    def ratios(self, index: int):
+        """Ratio set of one lattice point."""
+        return ratio_tuple(self.weights, index)
+
+    def best_match(self, target_rgb: dict, metric: str = "rgb", top_k: int = 1):
+        """Same result as find_best_ratios, answered from the index."""
+        target = (target_rgb["r"], target_rgb["g"], target_rgb["b"])
+        best = int(self.nearest(target, metric)[0])
+        mixed = self.mixed_rgb[best]
+        result = match_result(self.ratios(best), mixed, target, score_batch(mixed[None, :], target, metric)[0], index=best)
+        if top_k > 1:
+            # The lattice is small enough to rank whole; the tree only answers the single nearest
+            recipes = TopRecipes(top_k)
+            recipes.offer_batch(score_batch(self.mixed_rgb, target, metric), self.weights, self.mixed_rgb)
+            result["top_recipes"] = recipes.results(target, result)
+        return result
+
+
+def get_mix_lattice(user_colors: list, model: str = "subtractive"):
+    """Build (once) or fetch the indexed mix lattice of a palette under a mixing model."""
+    key = palette_key(user_colors, "grid", model)
+    lattice = lattice_cache.get(key)
+    if lattice is None:
+        lattice = MixLattice(user_colors, model)
+        lattice_cache.put(key, lattice)
+    return lattice
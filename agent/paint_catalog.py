@@ -0,0 +1,101 @@
+"""
+Catalog of paints that can be bought, with spatial indexes over their colors
+The bundled CSV lists common single-pigment artist colors; SHADESMITH_PAINT_CATALOG
+points at a larger catalog with the same columns (brand, name, pigment, r, g, b).
+The CSV is converted once into .npy files next to the color tables, which every
+worker memory-maps, so a 100k-paint library is parsed once rather than per process
+"""
+
+import csv
+import hashlib
+import os
+import tempfile
+import threading
+import numpy as np
+from scipy.spatial import cKDTree
+from .color_tables import color_tables_dir, srgb_to_lab_exact
+
+BUNDLED_CATALOG = os.path.join(os.path.dirname(__file__), "data", "paint_catalog.csv")
+CATALOG_FILES = ("catalog_rgb.npy", "catalog_lab.npy", "catalog_labels.npy")
+CATALOG_SPACES = ("lab", "rgb")  # Index spaces: Lab distance is ΔE*76, RGB distance matches the mixing solvers
+
+
+def paint_catalog_path():
+    """CSV file of the catalog (SHADESMITH_PAINT_CATALOG, else the bundled one)."""
+    return os.environ.get("SHADESMITH_PAINT_CATALOG", BUNDLED_CATALOG)
+
+
+def catalog_index_dir(path: str):
+    """Directory of the index files for one version of a catalog CSV (keyed by its content)."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as catalog_file:
+        for block in iter(lambda: catalog_file.read(1 << 20), b""):
+            digest.update(block)
+    return os.path.join(color_tables_dir(), f"paint_catalog_{digest.hexdigest()[:16]}")
+
+
+def build_catalog_index(path: str, directory: str):
+    """Convert a catalog CSV to RGB, Lab and label arrays, written atomically like the color tables."""
+    os.makedirs(directory, exist_ok=True)
+    with open(path, newline="", encoding="utf-8") as catalog_file:
+        rows = list(csv.DictReader(catalog_file))
+    rgb = np.array([[int(row["r"]), int(row["g"]), int(row["b"])] for row in rows], dtype=np.float64).reshape(-1, 3)
+    # Fixed-width UTF-8 bytes keep the labels mappable
+    labels = np.array([[row[key].encode("utf-8") for key in ("brand", "name", "pigment")] for row in rows], dtype=np.bytes_).reshape(-1, 3)
+    arrays = {
+        "catalog_rgb.npy": rgb,
+        "catalog_lab.npy": srgb_to_lab_exact(rgb),
+        "catalog_labels.npy": labels
+    }
+    for filename, array in arrays.items():
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(handle, "wb") as temp_file:
+            np.save(temp_file, array)
+        os.replace(temp_path, os.path.join(directory, filename))
+    return directory
+
+
+class PaintCatalog:
+    """Memory-mapped catalog colors (RGB and Lab) with a KD-tree per space, plus their labels."""
+
+    def __init__(self, directory: str):
+        self.rgb = np.load(os.path.join(directory, "catalog_rgb.npy"), mmap_mode="r")
+        self.lab = np.load(os.path.join(directory, "catalog_lab.npy"), mmap_mode="r")
+        self.labels = np.load(os.path.join(directory, "catalog_labels.npy"), mmap_mode="r")
+        # The trees point into the mapped arrays instead of copying them
+        self.trees = {"rgb": cKDTree(self.rgb), "lab": cKDTree(self.lab)}
+
+    def __len__(self):
+        return len(self.rgb)
+
+    def nearest(self, rgb, k: int = 1, space: str = "lab"):
+        """Distances and catalog indices of the k nearest paints to each (n, 3) RGB color, as (n, k) arrays."""
+        points = np.asarray(rgb, dtype=np.float64).reshape(-1, 3)
+        if space == "lab":
+            points = srgb_to_lab_exact(points)
+        k = min(k, len(self))
+        distances, indices = self.trees[space].query(points, k=k)
+        return distances.reshape(len(points), k), indices.reshape(len(points), k)
+
+    def paint(self, index: int):
+        """Response dict of one catalog paint."""
+        brand, name, pigment = (label.decode("utf-8") for label in self.labels[index])
+        r, g, b = (int(value) for value in self.rgb[index])
+        return {"brand": brand, "name": name, "pigment": pigment, "rgb": {"r": r, "g": g, "b": b}}
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_paint_catalog():
+    """Map and index the catalog on first use, building its index files if this CSV has none yet."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                directory = catalog_index_dir(paint_catalog_path())
+                if not all(os.path.exists(os.path.join(directory, name)) for name in CATALOG_FILES):
+                    build_catalog_index(paint_catalog_path(), directory)
+                _catalog = PaintCatalog(directory)
+    return _catalog
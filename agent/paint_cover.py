@@ -0,0 +1,247 @@
+"""
+Smallest set of paints that mixes every color of a project
+Every subset of up to max_paints paints is a candidate recipe. The grid mixes of
+each subset are computed once and shared by every target, after a bounding-box
+gamut test has skipped the targets a subset cannot get near. The cover itself is a
+branch-and-bound over each target's minimal recipes, seeded by a greedy cover
+"""
+
+from itertools import combinations
+from math import comb
+import numpy as np
+from .mixing_engine import GRID_STEP, SearchBudget, simplex_lattice, quantize_mix_batch, rgb_distance_batch, roundtrip_slack
+
+BLUE = np.array([0, 0, 255])
+YELLOW = np.array([255, 255, 0])
+MIX_CHUNK = 1 << 21  # Lattice mixes evaluated per batch
+GREEDY_CANDIDATES = 256  # Recipes scored per greedy step
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def interior_lattice(color_count: int, step: float = GRID_STEP):
+    """Grid ratio sets that use every paint; the others are mixes of a smaller subset."""
+    weights = simplex_lattice(color_count, step)
+    return weights[(weights > 0).all(axis=1)]
+
+
+def subset_mixes(palette: np.ndarray, subsets: np.ndarray, weights: np.ndarray):
+    """Quantized mixes of many paint subsets of one size at the given ratio sets, shape (s, w, 3).
+
+    The same values as a MixLattice of each subset: paints are accumulated in
+    the same order and the blue + yellow rule uses each subset's last pure blue
+    and pure yellow paint.
+    """
+    paints = palette[subsets]
+    mixed = np.zeros((len(subsets), len(weights), 3))
+    for i in range(subsets.shape[1]):
+        mixed = mixed + weights[None, :, i:i + 1] * paints[:, None, i, :]
+
+    is_blue = (paints == BLUE).all(axis=2)
+    is_yellow = (paints == YELLOW).all(axis=2)
+    green = np.flatnonzero(is_blue.any(axis=1) & is_yellow.any(axis=1))
+    if len(green):
+        last = subsets.shape[1] - 1
+        blue = last - np.argmax(is_blue[green, ::-1], axis=1)
+        yellow = last - np.argmax(is_yellow[green, ::-1], axis=1)
+        blue_amount, yellow_amount = weights[:, blue].T, weights[:, yellow].T
+        greens = (blue_amount > 0) & (yellow_amount > 0)
+        strength = np.minimum(blue_amount, yellow_amount) * 2
+        rows = mixed[green]
+        rows[..., 1] = np.where(greens, np.minimum(255, rows[..., 1] + strength * 255), rows[..., 1])
+        rows[..., 2] = np.where(greens, rows[..., 2] * (1 - strength * 0.5), rows[..., 2])
+        rows[..., 0] = np.where(greens, rows[..., 0] * (1 - strength * 0.3), rows[..., 0])
+        mixed[green] = rows
+    return quantize_mix_batch(mixed.reshape(-1, 3)).reshape(len(subsets), len(weights), 3)
+
+
+def subset_distances(palette: np.ndarray, subsets: np.ndarray, targets: np.ndarray):
+    """Distance from every target to the closest interior grid mix of every subset, shape (s, t)."""
+    weights = interior_lattice(subsets.shape[1])
+    chunk = max(1, MIX_CHUNK // (len(weights) * max(len(targets), 1)))
+    target_norms = (targets ** 2).sum(axis=1)
+    distances = np.empty((len(subsets), len(targets)))
+    for start in range(0, len(subsets), chunk):
+        mixes = subset_mixes(palette, subsets[start:start + chunk], weights).astype(np.float64).reshape(-1, 3)
+        # |m - t|² as a matrix product; exact here since every value is an integer
+        squared = (mixes ** 2).sum(axis=1)[:, None] - 2 * mixes @ targets.T + target_norms[None, :]
+        distances[start:start + chunk] = np.sqrt(squared.reshape(-1, len(weights), len(targets)).min(axis=1))
+    return distances
+
+
+def box_distance_bounds(palette: np.ndarray, subsets: np.ndarray, targets: np.ndarray):
+    """Lower bound on the distance from every target to any mix of every subset, shape (s, t).
+
+    Mixes stay inside the bounding box of their paints, widened by truncation and
+    the CMYK round trip; subsets with the blue + yellow rule get no bound (0).
+    """
+    paints = palette[subsets]
+    slack = roundtrip_slack()
+    low = paints.min(axis=1) - 1 - slack
+    high = paints.max(axis=1) + slack
+    delta = np.clip(targets[None, :, :], low[:, None, :], high[:, None, :]) - targets[None, :, :]
+    bounds = np.sqrt((delta ** 2).sum(axis=2))
+    green = ((paints == BLUE).all(axis=2).any(axis=1)) & ((paints == YELLOW).all(axis=2).any(axis=1))
+    bounds[green] = 0
+    return bounds
+
+
+def subset_masks(subsets: np.ndarray):
+    """Paint subsets as (s, 2) uint64 bit masks (palettes of up to 128 paints)."""
+    masks = np.zeros((len(subsets), 2), dtype=np.uint64)
+    for i in range(subsets.shape[1]):
+        word, bit = np.divmod(subsets[:, i], 64)
+        np.bitwise_or.at(masks, (np.arange(len(subsets)), word), np.left_shift(np.uint64(1), bit.astype(np.uint64)))
+    return masks
+
+
+def popcount(masks: np.ndarray):
+    """Number of set bits of every row of an (..., 2) uint64 mask array."""
+    return POPCOUNT[np.ascontiguousarray(masks).view(np.uint8)].reshape(masks.shape[:-1] + (-1,)).sum(axis=-1)
+
+
+def minimal_recipes(palette: np.ndarray, targets: np.ndarray, tolerance: float, max_paints: int):
+    """Every minimal paint subset that mixes a target within tolerance.
+
+    Returns (masks, target ids, distances, subsets evaluated); a subset is minimal
+    when none of its own subsets already reaches that target. Only the interior of
+    each subset's grid is mixed: a target reached on its boundary is reached by a
+    smaller subset, so the larger one is not minimal for it.
+    """
+    n = len(palette)
+    # Subset of sorted paint indices → integer key; (target, subset) → target * base + key
+    weights = n ** np.arange(max_paints, dtype=np.int64)
+    base = n ** max_paints
+    found = np.empty(0, dtype=np.int64)
+    masks, owners, distances = [], [], []
+    evaluated = 0
+    for size in range(1, min(max_paints, n) + 1):
+        subsets = np.array(list(combinations(range(n), size)), dtype=np.int64).reshape(-1, size)
+        candidates = box_distance_bounds(palette, subsets, targets) <= tolerance
+        # Skip targets a smaller recipe inside the subset already reaches
+        pair_rows, pair_targets = np.nonzero(candidates)
+        if len(found):
+            redundant = np.zeros(len(pair_rows), dtype=bool)
+            for positions in proper_subset_positions(size):
+                keys = pair_targets * base + (subsets[pair_rows][:, positions] * weights[:len(positions)]).sum(axis=1)
+                slots = np.minimum(np.searchsorted(found, keys), len(found) - 1)
+                redundant |= found[slots] == keys
+            candidates[pair_rows[redundant], pair_targets[redundant]] = False
+        rows = np.flatnonzero(candidates.any(axis=1))
+        evaluated += len(rows)
+        if not len(rows):
+            continue
+        reached = subset_distances(palette, subsets[rows], targets)
+        feasible = (reached <= tolerance) & candidates[rows]
+        row_index, target_index = np.nonzero(feasible)
+        keys = target_index * base + (subsets[rows][row_index] * weights[:size]).sum(axis=1)
+        found = np.sort(np.concatenate([found, keys]))
+        masks.append(subset_masks(subsets[rows][row_index]))
+        owners.append(target_index)
+        distances.append(reached[row_index, target_index])
+    if not masks:
+        return np.zeros((0, 2), dtype=np.uint64), np.zeros(0, dtype=np.int64), np.zeros(0), evaluated
+    return np.concatenate(masks), np.concatenate(owners), np.concatenate(distances), evaluated
+
+
+def proper_subset_positions(size: int):
+    """Index positions of every non-empty proper subset of a `size`-paint subset."""
+    return [list(positions) for length in range(1, size) for positions in combinations(range(size), length)]
+
+
+class CoverSearch:
+    """Branch-and-bound for the fewest paints that contain a recipe of every target."""
+
+    def __init__(self, masks: np.ndarray, owners: np.ndarray, budget: SearchBudget = None):
+        order = np.argsort(owners, kind="stable")
+        self.masks, self.owners = masks[order], owners[order]
+        self.targets = np.unique(self.owners)  # Targets with at least one recipe
+        self.starts = np.searchsorted(self.owners, self.targets)
+        self.option_counts = np.diff(np.append(self.starts, len(self.owners)))
+        self.budget = budget
+        self.best = None
+        self.nodes = 0
+
+    def missing(self, chosen: np.ndarray):
+        """Paints each recipe still lacks, and the fewest any target still lacks (0 = covered)."""
+        lacking = popcount(self.masks & ~chosen)
+        fewest = np.minimum.reduceat(lacking, self.starts)
+        return lacking, fewest
+
+    def greedy(self):
+        """Repeatedly add the recipe that covers the most targets per paint added."""
+        chosen = np.zeros(2, dtype=np.uint64)
+        while True:
+            lacking, fewest = self.missing(chosen)
+            if not fewest.any():
+                return chosen
+            covered = np.count_nonzero(fewest == 0)
+            # Recipes of uncovered targets, cheapest first, scored by the targets they complete per paint
+            open_rows = np.flatnonzero(np.repeat(fewest > 0, self.option_counts))
+            open_rows = open_rows[np.argsort(lacking[open_rows], kind="stable")][:GREEDY_CANDIDATES]
+            best_gain, best_mask = -1.0, None
+            for row in open_rows:
+                trial = chosen | self.masks[row]
+                gain = (np.count_nonzero(self.missing(trial)[1] == 0) - covered) / lacking[row]
+                if gain > best_gain:
+                    best_gain, best_mask = gain, trial
+            chosen = best_mask
+
+    def search(self):
+        """Smallest cover found and whether the search proved it minimal."""
+        if not len(self.targets):
+            return np.zeros(2, dtype=np.uint64), True
+        self.best = self.greedy()
+        self.best_size = int(popcount(self.best))
+        complete = self._branch(np.zeros(2, dtype=np.uint64), 0)
+        return self.best, complete
+
+    def _branch(self, chosen: np.ndarray, size: int):
+        self.nodes += 1
+        if self.budget is not None and self.budget.should_stop(float("inf")):
+            return False
+        lacking, fewest = self.missing(chosen)
+        if not fewest.any():
+            if size < self.best_size:
+                self.best, self.best_size = chosen, size
+            return True
+        # Every uncovered target needs at least its cheapest recipe's missing paints
+        if size + fewest.max() >= self.best_size:
+            return True
+        # Branch on the recipes of the uncovered target with the fewest of them
+        uncovered = np.flatnonzero(fewest > 0)
+        position = uncovered[int(np.argmin(self.option_counts[uncovered]))]
+        rows = np.arange(self.starts[position], self.starts[position] + self.option_counts[position])
+        for row in rows[np.argsort(lacking[rows], kind="stable")]:
+            if size + lacking[row] >= self.best_size:
+                break
+            if not self._branch(chosen | self.masks[row], size + int(lacking[row])):
+                return False
+        return True
+
+
+def mask_indices(mask: np.ndarray):
+    """Palette indices of a (2,) uint64 mask."""
+    return [i for i in range(128) if (int(mask[i // 64]) >> (i % 64)) & 1]
+
+
+def best_recipes(palette: np.ndarray, paint_set: list, targets: np.ndarray, max_paints: int):
+    """Closest grid recipe of every target using only paint_set: (subset, ratios, mixed RGB, distance) per target.
+
+    Ties go to the smaller subset, then the earlier one, then the first ratio set on the grid.
+    """
+    best = [None] * len(targets)
+    for size in range(1, min(max_paints, len(paint_set)) + 1):
+        subsets = np.array(list(combinations(paint_set, size)), dtype=np.int64).reshape(-1, size)
+        weights = simplex_lattice(size)
+        mixes = subset_mixes(palette, subsets, weights)
+        for t, target in enumerate(targets):
+            distances = rgb_distance_batch(mixes.reshape(-1, 3), target).reshape(mixes.shape[:2])
+            row, point = np.unravel_index(int(np.argmin(distances)), distances.shape)
+            if best[t] is None or distances[row, point] < best[t][3]:
+                best[t] = (subsets[row].tolist(), weights[point].tolist(), mixes[row, point].tolist(), float(distances[row, point]))
+    return best
+
+
+def cover_work(paint_count: int, max_paints: int):
+    """Paint subsets a covering search may evaluate."""
+    return sum(comb(paint_count, size) for size in range(1, max_paints + 1))
@@ -0,0 +1,36 @@
+"""
+Optional worker processes for CPU-bound mixing searches
+Under gunicorn a request runs on one core; with MIX_WORKERS > 1 large searches are
+sharded across a persistent process pool instead, while searches below
+MIX_PARALLEL_MIN_WORK ratio sets stay in-process, where they finish before the
+inter-process round trip would pay off
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import threading
+from .mixing_engine import roundtrip_slack
+
+MIX_WORKERS = int(os.environ.get("MIX_WORKERS", 0))  # 0 or 1 keeps every search in-process
+MIX_PARALLEL_MIN_WORK = int(os.environ.get("MIX_PARALLEL_MIN_WORK", 1000000))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """The shared process pool of MIX_WORKERS workers, started on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Workers build the CMYK round-trip table once, not inside their first shard
+                _pool = ProcessPoolExecutor(max_workers=MIX_WORKERS, initializer=roundtrip_slack)
+    return _pool
+
+
+def executor_for(work: int):
+    """The worker pool if a search over `work` ratio sets is worth sharding, else None."""
+    if MIX_WORKERS < 2 or work < MIX_PARALLEL_MIN_WORK:
+        return None
+    return get_worker_pool()
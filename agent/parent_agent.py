@@ -2,14 +2,20 @@ from google.adk.agents import Agent
 from .image_converter_agent import image_converter_agent
 from .rgb_scanner_agent import rgb_scanner_agent
 from .calculations_agent import calculations_agent
+from .image_analysis import source_name, ANALYSIS_SIZE
 import os
 
-def process_image_pipeline(image_path: str, skip_conversion: bool = False):
+def without_decoded_images(conversion_result: dict):
+    """Converter result without its in-memory images, for the JSON pipeline steps."""
+    return {key: value for key, value in conversion_result.items() if key != "decoded_images"}
+
+def process_image_pipeline(image_path, skip_conversion: bool = False):
     """
     Sequential pipeline: Image Converter → RGB Scanner → Calculations → Parent
     Image Converter Agent sends images to RGB Scanner Agent,
     RGB Scanner Agent sends RGB values to Calculations Agent,
     Calculations Agent returns results to parent to return to user
+    The image (a path, file object or bytes) is decoded once and handed over in memory
     """
     try:
         pipeline_results = {
@@ -19,55 +25,62 @@ def process_image_pipeline(image_path: str, skip_conversion: bool = False):
             "agent_chain": []
         }
         
-        current_image_path = image_path
+        image_name = source_name(image_path)
+        processed_image = image_name
+        decoded_image = None
         
         # Step 1: Image Converter Agent
         if not skip_conversion:
-            print(f"🔄 Step 1: Image Converter Agent processing {image_path}")
-            conversion_result = image_converter_agent.tools[0](image_path)
+            print(f"🔄 Step 1: Image Converter Agent processing {image_name}")
+            conversion_result = image_converter_agent.tools[2]([image_path], ANALYSIS_SIZE)  # decode_images_for_analysis
             
             if not conversion_result.get("success"):
                 return {
                     "success": False,
-                    "error": f"Image Converter Agent failed: {conversion_result.get('error')}",
+                    "error": f"Image Converter Agent failed: {'; '.join(conversion_result.get('errors', [])) or conversion_result.get('error')}",
                     "failed_step": "image_conversion"
                 }
             
-            current_image_path = conversion_result["output_file"]
+            # The image stays in memory: processed_image names it, decoded_image describes it
+            decoded_image = conversion_result["images"][0]
+            processed_image = decoded_image["source"]
             pipeline_results["pipeline_steps"].append({
                 "step": 1,
                 "agent": "Image Converter Agent",
-                "action": "Convert to PNG",
-                "input": image_path,
-                "output": current_image_path,
-                "result": conversion_result
+                "action": "Decode at analysis resolution",
+                "input": image_name,
+                "output": processed_image,
+                "result": without_decoded_images(conversion_result)
             })
             pipeline_results["agent_chain"].append("image_converter_agent")
-        
-        # Step 2: RGB Scanner Agent (receives image from Image Converter)
-        print(f"🔄 Step 2: RGB Scanner Agent processing {current_image_path}")
-        rgb_result = rgb_scanner_agent.tools[0](current_image_path)
+            
+            # Step 2: RGB Scanner Agent (receives the decoded image from Image Converter)
+            print(f"🔄 Step 2: RGB Scanner Agent processing {image_name}")
+            rgb_result = rgb_scanner_agent.tools[2](conversion_result)  # scan_rgb_from_converter_results
+        else:
+            print(f"🔄 Step 2: RGB Scanner Agent processing {image_name}")
+            rgb_result = rgb_scanner_agent.tools[1]([image_path])  # scan_rgb_from_multiple_images
         
         if not rgb_result.get("success"):
             return {
                 "success": False,
-                "error": f"RGB Scanner Agent failed: {rgb_result.get('error')}",
+                "error": f"RGB Scanner Agent failed: {'; '.join(rgb_result.get('errors', [])) or rgb_result.get('error')}",
                 "failed_step": "rgb_scanning",
                 "pipeline_steps": pipeline_results["pipeline_steps"]
             }
         
+        primary_rgb = rgb_result["scanned_results"][0]["primary_rgb"]
         pipeline_results["pipeline_steps"].append({
             "step": 2,
             "agent": "RGB Scanner Agent",
             "action": "Extract RGB values",
-            "input": current_image_path,
-            "output": rgb_result["primary_rgb"],
+            "input": image_name,
+            "output": primary_rgb,
             "result": rgb_result
         })
         pipeline_results["agent_chain"].append("rgb_scanner_agent")
         
         # Step 3: Calculations Agent (receives RGB from RGB Scanner)
-        primary_rgb = rgb_result["primary_rgb"]
         print(f"🔄 Step 3: Calculations Agent processing RGB({primary_rgb['r']}, {primary_rgb['g']}, {primary_rgb['b']})")
         
         cmyk_result = calculations_agent.tools[0](
@@ -97,8 +110,9 @@ def process_image_pipeline(image_path: str, skip_conversion: bool = False):
         # Step 4: Parent Agent (receives results from Calculations Agent)
         print(f"✅ Step 4: Parent Agent compiling final results")
         pipeline_results["final_result"] = {
-            "original_image": image_path,
-            "processed_image": current_image_path,
+            "original_image": image_name,
+            "processed_image": processed_image,
+            "decoded_image": decoded_image,
             "rgb_values": primary_rgb,
             "cmyk_values": cmyk_result["cmyk"],
             "pipeline_summary": {
@@ -230,10 +244,13 @@ def calculate_paint_mix_pipeline(target_rgb: dict, user_colors: list):
             "error": f"Paint mix pipeline failed: {str(e)}"
         }
 
-def process_complete_paint_mixing_pipeline(image_paths: list, target_rgb: dict, skip_conversion: bool = False):
+def process_complete_paint_mixing_pipeline(image_paths: list, target_rgb: dict, skip_conversion: bool = False, max_ms: float = None, tolerance: float = None, backend: str = None):
     """
     Complete pipeline: Image Converter → RGB Scanner → Calculations → Parent
-    Processes multiple images and calculates paint mixing ratios for target color
+    Processes multiple images (paths, file objects or bytes) and calculates paint mixing ratios for target color
+    Images are decoded once at analysis resolution and handed to the scanner in memory
+    max_ms and tolerance bound the mixing search (see calculate_color_mix_ratios)
+    backend picks the scanner backend (see scan_rgb_from_image)
     """
     try:
         pipeline_results = {
@@ -243,39 +260,42 @@ def process_complete_paint_mixing_pipeline(image_paths: list, target_rgb: dict,
             "agent_chain": []
         }
         
+        image_names = [source_name(source, i + 1) for i, source in enumerate(image_paths or [])]
+        
         # Step 1: Image Converter Agent (process multiple images)
         if not skip_conversion:
-            print(f"🔄 Step 1: Image Converter Agent processing {len(image_paths)} images")
-            conversion_result = image_converter_agent.tools[4](image_paths)  # convert_multiple_images_to_png
+            print(f"🔄 Step 1: Image Converter Agent processing {len(image_names)} images")
+            conversion_result = image_converter_agent.tools[2](image_paths, ANALYSIS_SIZE)  # decode_images_for_analysis
             
             if not conversion_result.get("success"):
                 return {
                     "success": False,
-                    "error": f"Image Converter Agent failed: {conversion_result.get('error')}",
+                    "error": f"Image Converter Agent failed: {'; '.join(conversion_result.get('errors', [])) or conversion_result.get('error')}",
                     "failed_step": "image_conversion"
                 }
             
             pipeline_results["pipeline_steps"].append({
                 "step": 1,
                 "agent": "Image Converter Agent",
-                "action": "Convert multiple images to PNG",
-                "input": image_paths,
-                "output": conversion_result["converted_files"],
-                "result": conversion_result
+                "action": "Decode images at analysis resolution",
+                "input": image_names,
+                "output": conversion_result["images"],
+                "result": without_decoded_images(conversion_result)
             })
             pipeline_results["agent_chain"].append("image_converter_agent")
+            
+            # Step 2: RGB Scanner Agent (scan RGB from the decoded images)
+            print(f"🔄 Step 2: RGB Scanner Agent scanning RGB values")
+            rgb_result = rgb_scanner_agent.tools[2](conversion_result, backend)  # scan_rgb_from_converter_results
         else:
-            # If skipping conversion, use image_paths directly
-            conversion_result = {"converted_files": [{"output_file": path} for path in image_paths]}
-        
-        # Step 2: RGB Scanner Agent (scan RGB from converted images)
-        print(f"🔄 Step 2: RGB Scanner Agent scanning RGB values")
-        rgb_result = rgb_scanner_agent.tools[2](conversion_result)  # scan_rgb_from_converter_results
+            # If skipping conversion, the scanner decodes the images itself
+            print(f"🔄 Step 2: RGB Scanner Agent scanning RGB values")
+            rgb_result = rgb_scanner_agent.tools[1](image_paths, backend)  # scan_rgb_from_multiple_images
         
         if not rgb_result.get("success"):
             return {
                 "success": False,
-                "error": f"RGB Scanner Agent failed: {rgb_result.get('error')}",
+                "error": f"RGB Scanner Agent failed: {'; '.join(rgb_result.get('errors', [])) or rgb_result.get('error')}",
                 "failed_step": "rgb_scanning",
                 "pipeline_steps": pipeline_results["pipeline_steps"]
             }
@@ -284,7 +304,7 @@ def process_complete_paint_mixing_pipeline(image_paths: list, target_rgb: dict,
             "step": 2,
             "agent": "RGB Scanner Agent",
             "action": "Extract RGB values from images",
-            "input": conversion_result,
+            "input": image_names,
             "output": rgb_result["scanned_results"],
             "result": rgb_result
         })
@@ -292,7 +312,7 @@ def process_complete_paint_mixing_pipeline(image_paths: list, target_rgb: dict,
         
         # Step 3: Calculations Agent (process RGB results + target color)
         print(f"🔄 Step 3: Calculations Agent calculating paint mixing ratios")
-        calculations_result = calculations_agent.tools[5](rgb_result, target_rgb)  # process_rgb_scanner_results
+        calculations_result = calculations_agent.tools[3](rgb_result, target_rgb, max_ms, tolerance)  # process_rgb_scanner_results
         
         if not calculations_result.get("success"):
             return {
@@ -330,10 +350,11 @@ def process_complete_paint_mixing_pipeline(image_paths: list, target_rgb: dict,
                 "distance": calculations_result["closest_match"]["distance"],
                 "level": "Excellent" if calculations_result["closest_match"]["distance"] < 10 else "Good" if calculations_result["closest_match"]["distance"] < 30 else "Fair"
             },
+            "search": calculations_result.get("search"),
             "pipeline_summary": {
                 "total_steps": len(pipeline_results["pipeline_steps"]),
                 "agents_used": pipeline_results["agent_chain"],
-                "images_processed": len(image_paths),
+                "images_processed": len(image_names),
                 "conversion_skipped": skip_conversion,
                 "user_colors_count": calculations_result["user_colors_count"]
             }
@@ -364,7 +385,7 @@ def process_rgb_scanner_to_calculations_pipeline(rgb_scanner_results: dict, targ
         
         # Step 1: Calculations Agent (process RGB scanner results + target color)
         print(f"🔄 Step 1: Calculations Agent processing RGB scanner results with target color")
-        calculations_result = calculations_agent.tools[5](rgb_scanner_results, target_rgb)  # process_rgb_scanner_results
+        calculations_result = calculations_agent.tools[3](rgb_scanner_results, target_rgb)  # process_rgb_scanner_results
         
         if not calculations_result.get("success"):
             return {
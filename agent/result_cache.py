@@ -0,0 +1,80 @@
+"""
+Bounded in-process cache with LRU eviction, optional TTL and hit/miss counters
+Used to memoize pure mixing calculations per gunicorn worker
+"""
+
+from collections import OrderedDict
+import os
+import threading
+import time
+
+
+class ResultCache:
+    """Thread-safe LRU cache with an optional time-to-live per entry."""
+
+    def __init__(self, name: str, max_size: int = 1024, ttl_seconds: float = 0):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds  # 0 disables expiry
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default on a miss or an expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, stored_at = entry
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries beyond max_size."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Counters for sizing the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+def cache_from_env(name: str, size_var: str, default_size: int, ttl_var: str = None, default_ttl: float = 0):
+    """Create a ResultCache sized from environment variables."""
+    max_size = int(os.environ.get(size_var, default_size))
+    ttl_seconds = float(os.environ.get(ttl_var, default_ttl)) if ttl_var else default_ttl
+    return ResultCache(name, max_size, ttl_seconds)
@@ -1,48 +1,37 @@
 from google.adk.agents import Agent
-from google.cloud import vision
+from .scanner_backends import dominant_colors, dominant_colors_batch, default_scanner_backend, scanner_backend_error
+from .image_analysis import source_name
 import os
 
-def scan_rgb_from_image(image_path: str):
-    """Scan RGB values from an image using Google Cloud Vision API."""
+def scan_rgb_from_image(image_path, backend: str = None):
+    """Scan RGB values from an image with a scanner backend ("vision" for Google Cloud Vision, "local" in-process; default from SHADESMITH_SCANNER_BACKEND).
+
+    image_path can also be an in-memory image: a file object, bytes / memoryview buffer or decoded PIL image.
+    """
     try:
+        backend = backend or default_scanner_backend()
+        error = scanner_backend_error(backend)
+        if error:
+            return error
+        
         # Validate input file exists
-        if not os.path.exists(image_path):
+        if isinstance(image_path, str) and not os.path.exists(image_path):
             return {"error": f"Image file '{image_path}' does not exist"}
         
-        # Initialize the Vision API client
-        client = vision.ImageAnnotatorClient()
-        
-        # Read the image file
-        with open(image_path, 'rb') as image_file:
-            content = image_file.read()
-        
-        # Perform image properties detection using Vision API
-        image = vision.Image(content=content)
-        response = client.image_properties(image=image)
-        
-        # Extract dominant colors
-        colors = response.image_properties_annotation.dominant_colors.colors
-        dominant_colors = []
-        
-        for color in colors:
-            rgb = {
-                "r": int(color.color.red),
-                "g": int(color.color.green),
-                "b": int(color.color.blue),
-                "score": color.score,  # Confidence score
-                "pixel_fraction": color.pixel_fraction  # Fraction of image pixels with this color
-            }
-            dominant_colors.append(rgb)
+        # Extract dominant colors; the image is decoded at analysis resolution, not read whole
+        colors = dominant_colors(image_path, backend)
+        image_path = source_name(image_path)
         
         # Get the most dominant color
-        primary_color = dominant_colors[0] if dominant_colors else None
+        primary_color = colors[0] if colors else None
         
         return {
             "success": True,
             "image_path": image_path,
             "primary_rgb": primary_color,
-            "all_colors": dominant_colors,
-            "color_count": len(dominant_colors),
+            "all_colors": colors,
+            "color_count": len(colors),
+            "backend": backend,
             "message": f"Successfully scanned RGB values from '{image_path}'"
         }
     
@@ -52,8 +41,11 @@ def scan_rgb_from_image(image_path: str):
             "error": f"Failed to scan RGB values: {str(e)}"
         }
 
-def scan_rgb_from_multiple_images(image_paths: list):
-    """Scan RGB values from multiple images using Google Cloud Vision API."""
+def scan_rgb_from_multiple_images(image_paths: list, backend: str = None, names: list = None):
+    """Scan RGB values from multiple images, paths or in-memory, with a scanner backend (see scan_rgb_from_image).
+
+    names labels in-memory images in the results (default: their file names, else image_<index>).
+    """
     try:
         # Validate input
         if not image_paths or len(image_paths) == 0:
@@ -62,61 +54,50 @@ def scan_rgb_from_multiple_images(image_paths: list):
         if len(image_paths) > 3:
             return {"error": "Maximum 3 images allowed for RGB scanning"}
         
-        # Initialize the Vision API client
-        client = vision.ImageAnnotatorClient()
+        backend = backend or default_scanner_backend()
+        error = scanner_backend_error(backend)
+        if error:
+            return error
         
         scanned_results = []
         errors = []
         
-        for i, image_path in enumerate(image_paths):
-            try:
-                # Validate input file exists
-                if not os.path.exists(image_path):
-                    errors.append(f"Image file '{image_path}' does not exist")
-                    continue
-                
-                # Read the image file
-                with open(image_path, 'rb') as image_file:
-                    content = image_file.read()
-                
-                # Perform image properties detection using Vision API
-                image = vision.Image(content=content)
-                response = client.image_properties(image=image)
-                
-                # Extract dominant colors
-                colors = response.image_properties_annotation.dominant_colors.colors
-                dominant_colors = []
-                
-                for color in colors:
-                    rgb = {
-                        "r": int(color.color.red),
-                        "g": int(color.color.green),
-                        "b": int(color.color.blue),
-                        "score": color.score,
-                        "pixel_fraction": color.pixel_fraction
-                    }
-                    dominant_colors.append(rgb)
-                
-                # Get the most dominant color
-                primary_color = dominant_colors[0] if dominant_colors else None
-                
-                scanned_results.append({
-                    "index": i + 1,
-                    "image_path": image_path,
-                    "primary_rgb": primary_color,
-                    "all_colors": dominant_colors,
-                    "color_count": len(dominant_colors),
-                    "success": True
-                })
-                
-            except Exception as e:
-                errors.append(f"Failed to scan '{image_path}': {str(e)}")
+        # Validate input files exist; the rest are scanned together (one request for Vision)
+        names = names or [source_name(source, i + 1) for i, source in enumerate(image_paths)]
+        indices = []
+        for i, source in enumerate(image_paths):
+            if isinstance(source, str) and not os.path.exists(source):
+                errors.append(f"Image file '{names[i]}' does not exist")
+            else:
+                indices.append(i)
+        
+        # Extract dominant colors
+        colors_per_image = dominant_colors_batch([image_paths[i] for i in indices], backend) if indices else []
+        
+        for i, colors in zip(indices, colors_per_image):
+            image_path = names[i]
+            if isinstance(colors, Exception):
+                errors.append(f"Failed to scan '{image_path}': {str(colors)}")
+                continue
+            
+            # Get the most dominant color
+            primary_color = colors[0] if colors else None
+            
+            scanned_results.append({
+                "index": i + 1,
+                "image_path": image_path,
+                "primary_rgb": primary_color,
+                "all_colors": colors,
+                "color_count": len(colors),
+                "success": True
+            })
         
         return {
             "success": len(scanned_results) > 0,
             "scanned_results": scanned_results,
             "total_scanned": len(scanned_results),
             "errors": errors,
+            "backend": backend,
             "message": f"Successfully scanned RGB values from {len(scanned_results)} out of {len(image_paths)} images"
         }
     
@@ -126,8 +107,8 @@ def scan_rgb_from_multiple_images(image_paths: list):
             "error": f"Failed to scan RGB values from multiple images: {str(e)}"
         }
 
-def scan_rgb_from_converter_results(converter_results: dict):
-    """Scan RGB values from Image Converter Agent results."""
+def scan_rgb_from_converter_results(converter_results: dict, backend: str = None):
+    """Scan RGB values from Image Converter Agent results (backend as in scan_rgb_from_image)."""
     try:
         # Validate input
         if not converter_results or not isinstance(converter_results, dict):
@@ -137,7 +118,16 @@ def scan_rgb_from_converter_results(converter_results: dict):
         image_paths = []
         
         # Handle different result formats from Image Converter Agent
-        if "converted_files" in converter_results:
+        if "decoded_images" in converter_results:
+            # From decode_images_for_analysis: scanned in memory
+            decoded_images = converter_results["decoded_images"]
+            if not decoded_images:
+                return {"error": "No successfully decoded images found to scan"}
+            return scan_rgb_from_multiple_images(
+                [decoded["image"] for decoded in decoded_images], backend, [decoded["source"] for decoded in decoded_images]
+            )
+        
+        elif "converted_files" in converter_results:
             # From convert_multiple_images_to_png
             for file_info in converter_results["converted_files"]:
                 if file_info.get("success") and "output_file" in file_info:
@@ -161,7 +151,7 @@ def scan_rgb_from_converter_results(converter_results: dict):
             return {"error": "No successfully converted images found to scan"}
         
         # Scan RGB values from the extracted image paths
-        return scan_rgb_from_multiple_images(image_paths)
+        return scan_rgb_from_multiple_images(image_paths, backend)
     
     except Exception as e:
         return {
@@ -217,7 +207,7 @@ def extract_primary_rgb_values(scanned_results: dict):
 # Create the RGB scanner agent
 rgb_scanner_agent = Agent(
     name="rgb_scanner_agent",
-    description="Specialized agent for scanning RGB values from images using Google Cloud Vision. Can process multiple images and extract RGB values from Image Converter Agent results.",
+    description="Specialized agent for scanning RGB values from images using Google Cloud Vision or a local color histogram. Can process multiple images and extract RGB values from Image Converter Agent results.",
     model="gemini-2.0-flash-exp",
     tools=[
         scan_rgb_from_image,
@@ -0,0 +1,223 @@
+"""
+Dominant-color backends of the RGB scanner
+"vision" asks Cloud Vision's image_properties about a downscaled copy of the image;
+"local" finds the colors in-process
+from a quantized color histogram (median cut, then a few k-means passes), with no
+network round trip. Both return up to 10 colors as {r, g, b, score, pixel_fraction},
+most dominant first. SHADESMITH_SCANNER_BACKEND sets a deployment's default.
+Vision calls share one process-wide client and send several images as one
+batch_annotate_images request
+"""
+
+import os
+import threading
+import numpy as np
+from google.cloud import vision
+from .image_analysis import open_analysis_image, encode_for_vision
+
+LOCAL_SCAN_SIZE = 256  # Longest side the local backend analyses; a swatch's colors survive the downscale
+HISTOGRAM_BITS = 5  # Bits kept per channel: 32768 histogram bins
+MAX_DOMINANT_COLORS = 10  # As many as Vision returns
+KMEANS_ITERATIONS = 4
+MERGE_DISTANCE = 20  # Clusters closer than this (RGB distance) are shades of one color and are merged
+
+
+VISION_BATCH_SIZE = 16  # Images per batch_annotate_images request (the API's limit)
+
+_vision_client = None
+_vision_client_lock = threading.Lock()
+
+
+def get_vision_client():
+    """Create the Cloud Vision client on first use; every later call reuses its channel and credentials."""
+    global _vision_client
+    if _vision_client is None:
+        with _vision_client_lock:
+            if _vision_client is None:
+                _vision_client = vision.ImageAnnotatorClient()
+    return _vision_client
+
+
+def set_vision_client(client):
+    """Replace the shared Vision client, e.g. with a local fake annotator; None creates a real one on next use."""
+    global _vision_client
+    with _vision_client_lock:
+        _vision_client = client
+
+
+def vision_colors(response):
+    """Dominant colors of one AnnotateImageResponse; raises RuntimeError when the image failed."""
+    if response.error.message:
+        raise RuntimeError(response.error.message)
+    return [{
+        "r": int(color.color.red),
+        "g": int(color.color.green),
+        "b": int(color.color.blue),
+        "score": color.score,  # Confidence score
+        "pixel_fraction": color.pixel_fraction  # Fraction of image pixels with this color
+    } for color in response.image_properties_annotation.dominant_colors.colors]
+
+
+def vision_dominant_colors_batch(sources: list):
+    """Dominant colors of several images from Cloud Vision in one batch_annotate_images request (per 16 images).
+
+    Returns one entry per source: its colors, or the exception that image raised.
+    """
+    results = [None] * len(sources)
+    requests, positions = [], []
+    for i, source in enumerate(sources):
+        try:
+            image = vision.Image(content=encode_for_vision(source))
+        except Exception as e:
+            results[i] = e
+            continue
+        requests.append(vision.AnnotateImageRequest(
+            image=image,
+            features=[vision.Feature(type_=vision.Feature.Type.IMAGE_PROPERTIES)]
+        ))
+        positions.append(i)
+    for start in range(0, len(requests), VISION_BATCH_SIZE):
+        batch_positions = positions[start:start + VISION_BATCH_SIZE]
+        try:
+            batch = get_vision_client().batch_annotate_images(requests=requests[start:start + VISION_BATCH_SIZE])
+        except Exception as e:
+            # A failed call fails every image it carried
+            for position in batch_positions:
+                results[position] = e
+            continue
+        for position, response in zip(batch_positions, batch.responses):
+            try:
+                results[position] = vision_colors(response)
+            except Exception as e:
+                results[position] = e
+    return results
+
+
+def vision_dominant_colors(source):
+    """Dominant colors of an image (path, file object or bytes) from Cloud Vision, sent at analysis resolution."""
+    colors = vision_dominant_colors_batch([source])[0]
+    if isinstance(colors, Exception):
+        raise colors
+    return colors
+
+
+def image_pixels(source, size: int = LOCAL_SCAN_SIZE):
+    """(n, 3) uint8 RGB pixels of an image decoded at no more than size on a side; fully transparent pixels are dropped."""
+    image = open_analysis_image(source, size)
+    if "A" in image.getbands() or "transparency" in image.info:
+        rgba = np.asarray(image.convert("RGBA")).reshape(-1, 4)
+        return rgba[rgba[:, 3] > 0, :3]
+    return np.asarray(image.convert("RGB")).reshape(-1, 3)
+
+
+def median_cut(colors: np.ndarray, counts: np.ndarray, max_colors: int):
+    """Split weighted colors into up to max_colors boxes, each time halving (by pixel count) the box
+    with the most pixels times channel range along its widest channel. Returns a box label per color."""
+    boxes = [np.arange(len(colors))]
+    while len(boxes) < max_colors:
+        spreads = [counts[box].sum() * np.ptp(colors[box], axis=0).max() for box in boxes]
+        widest = int(np.argmax(spreads))
+        if spreads[widest] == 0:
+            break
+        box = boxes.pop(widest)
+        channel = int(np.argmax(np.ptp(colors[box], axis=0)))
+        box = box[np.argsort(colors[box, channel], kind="stable")]
+        cumulative = np.cumsum(counts[box])
+        cut = min(max(int(np.searchsorted(cumulative, cumulative[-1] / 2)) + 1, 1), len(box) - 1)
+        boxes += [box[:cut], box[cut:]]
+    labels = np.empty(len(colors), dtype=np.int64)
+    for label, box in enumerate(boxes):
+        labels[box] = label
+    return labels
+
+
+def cluster_means(labels: np.ndarray, counts: np.ndarray, sums: np.ndarray):
+    """Mean color and pixel count of every non-empty cluster of histogram bins."""
+    cluster_counts = np.bincount(labels, weights=counts)
+    used = np.flatnonzero(cluster_counts)
+    cluster_sums = np.column_stack([np.bincount(labels, weights=sums[:, channel], minlength=len(cluster_counts)) for channel in range(3)])
+    return cluster_sums[used] / cluster_counts[used, None], cluster_counts[used]
+
+
+def local_dominant_colors(source, max_colors: int = MAX_DOMINANT_COLORS):
+    """Dominant colors of an image (path, file object or bytes) computed in-process; score is the color's pixel fraction."""
+    pixels = image_pixels(source)
+    if not len(pixels):
+        return []
+
+    # Histogram bins hold the mean color of their pixels, so clustering runs over bins, not pixels
+    shift = 8 - HISTOGRAM_BITS
+    bins = ((pixels.astype(np.int64) >> shift) * [1 << 2 * HISTOGRAM_BITS, 1 << HISTOGRAM_BITS, 1]).sum(axis=1)
+    counts = np.bincount(bins, minlength=1 << 3 * HISTOGRAM_BITS)
+    occupied = np.flatnonzero(counts)
+    sums = np.column_stack([np.bincount(bins, weights=pixels[:, channel], minlength=len(counts))[occupied] for channel in range(3)])
+    counts = counts[occupied]
+    colors = sums / counts[:, None]
+
+    labels = median_cut(colors, counts, max_colors)
+    for _ in range(KMEANS_ITERATIONS):
+        centers, _ = cluster_means(labels, counts, sums)
+        labels = np.argmin(((colors[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2), axis=1)
+
+    # Noise splits one swatch into several shades: fold each cluster into a larger one close to it
+    centers, cluster_counts = cluster_means(labels, counts, sums)
+    labels = np.unique(labels, return_inverse=True)[1]
+    merged = np.arange(len(centers))
+    order = np.argsort(-cluster_counts, kind="stable")
+    for position, i in enumerate(order):
+        for j in order[:position]:
+            if merged[j] == j and np.linalg.norm(centers[i] - centers[j]) < MERGE_DISTANCE:
+                merged[i] = j
+                break
+    centers, cluster_counts = cluster_means(merged[labels], counts, sums)
+    fractions = cluster_counts / len(pixels)
+    dominant = []
+    for i in np.argsort(-fractions, kind="stable"):
+        r, g, b = (int(value) for value in np.rint(centers[i]))
+        fraction = float(fractions[i])
+        dominant.append({"r": r, "g": g, "b": b, "score": fraction, "pixel_fraction": fraction})
+    return dominant
+
+
+# Name → function(image path, file object or bytes) → dominant colors; register new backends here
+SCANNER_BACKENDS = {
+    "vision": vision_dominant_colors,
+    "local": local_dominant_colors
+}
+
+
+def default_scanner_backend():
+    """Backend used when a request names none (SHADESMITH_SCANNER_BACKEND, else "vision")."""
+    return os.environ.get("SHADESMITH_SCANNER_BACKEND", "vision")
+
+
+def scanner_backend_error(backend: str):
+    """Return an error dict for an unknown backend name, else None."""
+    if backend not in SCANNER_BACKENDS:
+        return {"error": f"Unknown scanner backend '{backend}'. Use one of: {', '.join(SCANNER_BACKENDS)}"}
+    return None
+
+
+def dominant_colors(source, backend: str = None):
+    """Dominant colors of an image (path, file object or bytes) from the named backend (default_scanner_backend() when None)."""
+    return SCANNER_BACKENDS[backend or default_scanner_backend()](source)
+
+
+# Backends that scan several images in one call; the others are called once per image
+BATCH_SCANNER_BACKENDS = {
+    "vision": vision_dominant_colors_batch
+}
+
+
+def dominant_colors_batch(sources: list, backend: str = None):
+    """Dominant colors of several images from the named backend: per source, its colors or the exception it raised."""
+    backend = backend or default_scanner_backend()
+    if backend in BATCH_SCANNER_BACKENDS:
+        return BATCH_SCANNER_BACKENDS[backend](sources)
+    results = []
+    for source in sources:
+        try:
+            results.append(SCANNER_BACKENDS[backend](source))
+        except Exception as e:
+            results.append(e)
+    return results
@@ -0,0 +1,57 @@
+"""
+Upload ingestion for the multipart routes
+Werkzeug's form parser streams each uploaded file into a buffer from the request
+class: by default a temporary file on disk for any body over 500 KB. UploadRequest
+hands it a spooled buffer instead. The buffer stays in memory up to
+UPLOAD_SPOOL_BYTES and refuses to grow past MAX_UPLOAD_BYTES, so an oversized
+image is rejected (413) while it streams in, not after it has been stored.
+Routes pass the resulting FileStorage objects (file-like, with the upload's
+filename) straight to the pipeline; nothing is written to uploads/ on the way in
+"""
+
+import os
+import tempfile
+from flask import Request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+MAX_UPLOAD_FILES = 3  # Images per color analysis request
+MAX_UPLOAD_BYTES = int(float(os.environ.get("SHADESMITH_MAX_UPLOAD_MB", 20)) * 1024 * 1024)  # Per uploaded file
+UPLOAD_SPOOL_BYTES = 8 * 1024 * 1024  # Larger uploads roll over to an anonymous temporary file
+FORM_OVERHEAD_BYTES = 1024 * 1024  # Multipart headers and the other form fields
+MAX_REQUEST_BYTES = MAX_UPLOAD_FILES * MAX_UPLOAD_BYTES + FORM_OVERHEAD_BYTES  # Checked against Content-Length before parsing
+
+
+class BoundedSpool(tempfile.SpooledTemporaryFile):
+    """Spooled buffer of one upload that raises RequestEntityTooLarge once more than limit bytes are written."""
+
+    def __init__(self, limit: int = MAX_UPLOAD_BYTES, spool_size: int = UPLOAD_SPOOL_BYTES):
+        super().__init__(max_size=spool_size)
+        self.limit = limit
+        self.received = 0
+        self.rolled_over = False
+
+    def write(self, data):
+        self.received += len(data)
+        if self.received > self.limit:
+            raise RequestEntityTooLarge(f"Upload too large: at most {self.limit // (1024 * 1024)} MB per image")
+        return super().write(data)
+
+    def rollover(self):
+        self.rolled_over = True
+        super().rollover()
+
+    def in_memory(self):
+        """Whether the upload is still held in memory (not rolled over to a temporary file)."""
+        return not self.rolled_over
+
+
+class UploadRequest(Request):
+    """Flask request whose file uploads are parsed into BoundedSpool buffers."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return BoundedSpool()
+
+
+def upload_too_large_error():
+    """Error dict for a request body or upload over the size limits."""
+    return {"error": f"Upload too large: at most {MAX_UPLOAD_BYTES // (1024 * 1024)} MB per image and {MAX_UPLOAD_FILES} images per request"}
@@ -1,10 +1,13 @@
 
 from flask import Flask, request, jsonify
 from agent.parent_agent import get_project_info
-from agent.calculations_agent import calculations_agent
+from agent.calculations_agent import calculations_agent, get_mix_cache_stats, MAX_PALETTE_COLORS, MAX_MIX_PAINTS, ACCURACY_THRESHOLD
+from agent.paint_catalog import get_paint_catalog
 from agent.image_converter_agent import convert_image_to_png, image_converter_agent
 from agent.parent_agent import parent_agent
 from agent.rgb_scanner_agent import rgb_scanner_agent
+from agent.scanner_backends import dominant_colors, default_scanner_backend, scanner_backend_error
+from agent.upload_ingestion import UploadRequest, MAX_REQUEST_BYTES, upload_too_large_error
 # Import database agent functions directly to avoid initialization issues
 from agent.database_agent import (
     create_user_profile, 
@@ -16,15 +19,18 @@ from agent.database_agent import (
     save_recipe_to_inventory
 )
 from agent.inspiration_agent import Inspiration_agent
-from google.cloud import vision
 import os
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
 import uuid
 import time
 from itertools import permutations
 import math
 
 app = Flask(__name__)
+# Uploads are streamed into bounded in-memory buffers (see agent/upload_ingestion.py)
+app.request_class = UploadRequest
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BYTES
 
 # Configuration for file uploads
 UPLOAD_FOLDER = 'uploads'
@@ -33,9 +39,40 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'webp'}
 # Create uploads directory if it doesn't exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Map the paint catalog and build its spatial indexes before the first request
+get_paint_catalog()
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def unique_filename(filename, extension=None):
+    """Safe, unique name for a file written to the uploads folder."""
+    name, ext = os.path.splitext(secure_filename(filename))
+    return f"{name}_{uuid.uuid4().hex[:8]}{extension or ext}"
+
+def ingest_uploads(field):
+    """Allowed image uploads of a multipart field, as named file-like objects held in memory.
+
+    Returns (uploads, None), or (None, error response) when nothing usable was
+    sent or the request is over the size limits.
+    """
+    try:
+        if field not in request.files:
+            return None, (jsonify({"error": "No files uploaded"}), 400)
+        files = request.files.getlist(field)
+    except RequestEntityTooLarge:
+        return None, (jsonify(upload_too_large_error()), 413)
+    if not files or all(file.filename == '' for file in files):
+        return None, (jsonify({"error": "No files selected"}), 400)
+    uploads = [file for file in files if file and allowed_file(file.filename)]
+    if not uploads:
+        return None, (jsonify({"error": f"No valid image files uploaded. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"}), 400)
+    return uploads, None
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    return jsonify(upload_too_large_error()), 413
+
 def cleanup_old_files():
     """Remove files older than 1 hour from uploads folder."""
     try:
@@ -72,31 +109,21 @@ def shade_percentage():
 def test_vision():
     try:
         # Get the uploaded image file
-        file = request.files['file']
-        image_content = file.read()
+        uploads, error = ingest_uploads('file')
+        if error:
+            return error
 
-        # Initialize the Vision API client
-        client = vision.ImageAnnotatorClient()
-
-        # Perform image properties detection using Vision API
-        image = vision.Image(content=image_content)
-        response = client.image_properties(image=image)
+        # Scanner backend: "vision" or "local"; default from SHADESMITH_SCANNER_BACKEND
+        backend = request.form.get('backend') or default_scanner_backend()
+        error = scanner_backend_error(backend)
+        if error:
+            return jsonify(error), 400
 
         # Extract dominant colors
-        colors = response.image_properties_annotation.dominant_colors.colors
-        dominant_colors = []
-        for color in colors:
-            rgb = {
-                "r": int(color.color.red),
-                "g": int(color.color.green),
-                "b": int(color.color.blue),
-                "score": color.score,  # Confidence score
-                "pixel_fraction": color.pixel_fraction  # Fraction of image pixels with this color
-            }
-            dominant_colors.append(rgb)
+        colors = dominant_colors(uploads[0], backend)
 
         # Return dominant colors
-        return jsonify({"dominant_colors": dominant_colors})
+        return jsonify({"dominant_colors": colors, "backend": backend})
     except Exception as e:
         print(f"Error: {e}")  # Log the error
         return jsonify({"error": str(e)}), 500
@@ -104,47 +131,26 @@ def test_vision():
 @app.route('/convert-to-png', methods=['POST'])
 def convert_to_png():
     """Convert an uploaded image file to PNG format."""
-    # Debug: Print request info
-    print(f"Content-Type: {request.content_type}")
-    print(f"Files: {list(request.files.keys())}")
-    
-    # Check if file is uploaded
-    if 'file' not in request.files:
-        return jsonify({"error": "No file uploaded"}), 400
-    
-    file = request.files['file']
-    
-    # Check if file is selected
-    if file.filename == '':
-        return jsonify({"error": "No file selected"}), 400
-    
-    # Check if file type is allowed
-    if not allowed_file(file.filename):
-        return jsonify({"error": f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"}), 400
+    # The upload is converted from its in-memory buffer; only the PNG is written
+    uploads, error = ingest_uploads('file')
+    if error:
+        return error
+    file = uploads[0]
     
     try:
-        # Generate unique filename for input
-        input_filename = secure_filename(file.filename)
-        input_name, input_ext = os.path.splitext(input_filename)
-        unique_input_filename = f"{input_name}_{uuid.uuid4().hex[:8]}{input_ext}"
-        input_path = os.path.join(UPLOAD_FOLDER, unique_input_filename)
-        
-        # Save uploaded file
-        file.save(input_path)
-        
         # Generate output path
-        output_filename = f"{input_name}_{uuid.uuid4().hex[:8]}.png"
+        output_filename = unique_filename(file.filename, '.png')
         output_path = os.path.join(UPLOAD_FOLDER, output_filename)
         
         # Convert to PNG using agent function
         try:
             # Use the agent function directly
-            result = convert_image_to_png(input_path, output_path)
+            result = convert_image_to_png(file, output_path)
             
             print(f"Conversion result: {result}")
             
             if result.get('success'):
-                result['message'] = f"Successfully converted '{input_path}' to PNG format using agent function"
+                result['message'] = f"Successfully converted '{file.filename}' to PNG format using agent function"
                 result['agent_response'] = "Used agent function directly"
             else:
                 result['agent_response'] = "Agent function returned error"
@@ -155,10 +161,6 @@ def convert_to_png():
                 "error": f"Agent function error: {str(agent_error)}"
             }
         
-        # Clean up input file
-        if os.path.exists(input_path):
-            os.remove(input_path)
-        
         if result.get('success'):
             # Return the converted file info
             return jsonify({
@@ -171,9 +173,6 @@ def convert_to_png():
             return jsonify(result), 400
             
     except Exception as e:
-        # Clean up input file if it exists
-        if 'input_path' in locals() and os.path.exists(input_path):
-            os.remove(input_path)
         return jsonify({"error": f"Conversion failed: {str(e)}"}), 500
 
 @app.route('/download/<filename>', methods=['GET'])
@@ -226,31 +225,6 @@ def list_files():
     except Exception as e:
         return jsonify({"error": f"Failed to list files: {str(e)}"}), 500
 
-def rgb_to_cmyk(r, g, b):
-    """Convert RGB to CMYK with adjustments for real-life paint mixing."""
-    # Normalize RGB values
-    r_prime = r / 255.0
-    g_prime = g / 255.0
-    b_prime = b / 255.0
-
-    # Calculate K (Black)
-    k = 1 - max(r_prime, g_prime, b_prime)
-
-    # Avoid introducing black for vibrant colors
-    if k > 0.5 and (r > 100 or g > 100 or b > 100):  # Adjust threshold for bright colors
-        k = 0
-
-    if k == 1:
-        return {"c": 0, "m": 0, "y": 0, "k": 100}
-
-    # Calculate C, M, Y
-    c = (1 - r_prime - k) / (1 - k) if k < 1 else 0
-    m = (1 - g_prime - k) / (1 - k) if k < 1 else 0
-    y = (1 - b_prime - k) / (1 - k) if k < 1 else 0
-
-    return {"c": round(c * 100), "m": round(m * 100), "y": round(y * 100), "k": round(k * 100)}
-
-
 @app.route('/rgbToRatio', methods=['POST'])
 def rgbToRatio():
     """Calculate paint mixing ratios using the Calculations Agent."""
@@ -260,11 +234,20 @@ def rgbToRatio():
         target_rgb = data.get("target_rgb")  # Example: { "r": 255, "g": 255, "b": 0 }
         user_colors = data.get("user_colors")  # Example: [ { "r": 255, "g": 0, "b": 0 }, { "r": 0, "g": 255, "b": 0 } ]
 
-        if not target_rgb or not user_colors or len(user_colors) > 3:
-            return jsonify({"error": "Invalid input. Provide target_rgb and up to 3 user_colors."}), 400
+        if not target_rgb or not user_colors or len(user_colors) > MAX_PALETTE_COLORS:
+            return jsonify({"error": f"Invalid input. Provide target_rgb and up to {MAX_PALETTE_COLORS} user_colors."}), 400
 
         # Use the Calculations Agent for paint mixing
-        result = calculations_agent.tools[1](target_rgb, user_colors)  # calculate_color_mix_ratios
+        solver = data.get("solver", "grid")  # "grid" (0.1 steps) or "continuous" (1% steps)
+        resolution = data.get("resolution", 0.01)
+        max_paints = data.get("max_paints", MAX_MIX_PAINTS)  # Paints per recipe when the palette has more than 3
+        metric = data.get("metric", "rgb")  # "rgb" distance or perceptual "delta_e" (CIEDE2000)
+        model = data.get("model", "subtractive")  # "subtractive" or "kubelka_munk" mixing model
+        session_token = data.get("session_token", "")  # Reuse the previous recipe while a target is adjusted
+        top_k = data.get("top_k", 1)  # Recipes to return: the closest match plus top_k - 1 alternatives
+        max_ms = data.get("max_ms")  # Time budget for the search; the best recipe so far is returned when it runs out
+        tolerance = data.get("tolerance")  # Stop at the first recipe this close (in units of metric)
+        result = calculations_agent.tools[1](target_rgb, user_colors, solver, resolution, max_paints, metric, model, session_token, top_k, max_ms, tolerance)  # calculate_color_mix_ratios
         
         if result.get('success'):
             return jsonify(result)
@@ -279,13 +262,10 @@ def rgbToRatio():
 def complete_paint_mixing():
     """Complete paint mixing pipeline: Image Converter → RGB Scanner → Calculations → Results."""
     try:
-        # Check if files are uploaded
-        if 'files' not in request.files:
-            return jsonify({"error": "No files uploaded"}), 400
-        
-        files = request.files.getlist('files')
-        if not files or files[0].filename == '':
-            return jsonify({"error": "No files selected"}), 400
+        # Uploads are buffered in memory and decoded straight from the request, never saved
+        images, error = ingest_uploads('files')
+        if error:
+            return error
         
         # Get target RGB from form data
         target_rgb_str = request.form.get('target_rgb')
@@ -302,29 +282,13 @@ def complete_paint_mixing():
         if not all(key in target_rgb for key in ["r", "g", "b"]):
             return jsonify({"error": "target_rgb must contain r, g, b values"}), 400
         
-        # Save uploaded files
-        image_paths = []
-        for file in files:
-            if file and allowed_file(file.filename):
-                # Generate unique filename
-                input_filename = secure_filename(file.filename)
-                input_name, input_ext = os.path.splitext(input_filename)
-                unique_filename = f"{input_name}_{uuid.uuid4().hex[:8]}{input_ext}"
-                file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
-                
-                file.save(file_path)
-                image_paths.append(file_path)
-        
-        if not image_paths:
-            return jsonify({"error": "No valid image files uploaded"}), 400
+        # Optional search budget for the mixing step (see /rgb-paint-mixing)
+        max_ms = request.form.get('max_ms', type=float)
+        tolerance = request.form.get('tolerance', type=float)
+        backend = request.form.get('backend')  # Scanner backend: "vision" or "local"
         
         # Use the complete paint mixing pipeline
-        result = parent_agent.tools[3](image_paths, target_rgb)  # process_complete_paint_mixing_pipeline
-        
-        # Clean up uploaded files
-        for path in image_paths:
-            if os.path.exists(path):
-                os.remove(path)
+        result = parent_agent.tools[3](images, target_rgb, False, max_ms, tolerance, backend)  # process_complete_paint_mixing_pipeline
         
         if result.get('success'):
             return jsonify(result)
@@ -332,70 +296,29 @@ def complete_paint_mixing():
             return jsonify(result), 400
             
     except Exception as e:
-        # Clean up files on error
-        if 'image_paths' in locals():
-            for path in image_paths:
-                if os.path.exists(path):
-                    os.remove(path)
         print(f"Error: {e}")
         return jsonify({"error": str(e)}), 500
 
 def suggest_additional_colors(target_rgb, user_colors):
-    """Suggest additional colors needed to achieve the target color."""
-    suggestions = []
-    
-    # Analyze what's missing
-    target_r, target_g, target_b = target_rgb["r"], target_rgb["g"], target_rgb["b"]
-    
-    # Get current color ranges
-    min_r = min(color["r"] for color in user_colors)
-    max_r = max(color["r"] for color in user_colors)
-    min_g = min(color["g"] for color in user_colors)
-    max_g = max(color["g"] for color in user_colors)
-    min_b = min(color["b"] for color in user_colors)
-    max_b = max(color["b"] for color in user_colors)
-    
-    # Check what's missing
-    if target_r < min_r:
-        suggestions.append({
-            "color": "red",
-            "rgb": {"r": 0, "g": 0, "b": 0},
-            "reason": f"Need lower red values (target: {target_r}, available: {min_r}-{max_r})"
-        })
-    if target_r > max_r:
-        suggestions.append({
-            "color": "red",
-            "rgb": {"r": 255, "g": 0, "b": 0},
-            "reason": f"Need higher red values (target: {target_r}, available: {min_r}-{max_r})"
-        })
-    
-    if target_g < min_g:
-        suggestions.append({
-            "color": "green", 
-            "rgb": {"r": 0, "g": 0, "b": 0},
-            "reason": f"Need lower green values (target: {target_g}, available: {min_g}-{max_g})"
-        })
-    if target_g > max_g:
-        suggestions.append({
-            "color": "green",
-            "rgb": {"r": 0, "g": 255, "b": 0},
-            "reason": f"Need higher green values (target: {target_g}, available: {min_g}-{max_g})"
-        })
-        
-    if target_b < min_b:
-        suggestions.append({
-            "color": "blue",
-            "rgb": {"r": 0, "g": 0, "b": 0},
-            "reason": f"Need lower blue values (target: {target_b}, available: {min_b}-{max_b})"
-        })
-    if target_b > max_b:
-        suggestions.append({
-            "color": "blue",
-            "rgb": {"r": 0, "g": 0, "b": 255},
-            "reason": f"Need higher blue values (target: {target_b}, available: {min_b}-{max_b})"
-        })
-    
-    return suggestions
+    """Suggest catalog paints to buy that bring the target color within reach."""
+    result = calculations_agent.tools[6](target_rgb, user_colors)  # suggest_catalog_paints
+    if not result.get('success'):
+        return []
+    # "color" is kept for clients of the earlier red/green/blue placeholder suggestions
+    return [dict(suggestion, color=suggestion["name"]) for suggestion in result["suggestions"]]
+
+def analyze_accuracy(distance, delta_e=None):
+    """Classify how close a mixed color gets to its target."""
+    analysis = {
+        "distance": distance,
+        "is_achievable": distance <= ACCURACY_THRESHOLD,
+        "accuracy_level": "Excellent" if distance <= 10 else "Good" if distance <= 30 else "Fair" if distance <= 50 else "Poor"
+    }
+    if delta_e is not None:
+        # Perceptual difference: below ~2 is barely noticeable, above ~10 clearly a different color
+        analysis["delta_e"] = delta_e
+        analysis["perceptual_level"] = "Imperceptible" if delta_e <= 1 else "Close" if delta_e <= 2 else "Noticeable" if delta_e <= 10 else "Different"
+    return analysis
 
 @app.route('/rgb-paint-mixing', methods=['POST'])
 def rgb_paint_mixing():
@@ -411,8 +334,8 @@ def rgb_paint_mixing():
         target_rgb = data.get("target_rgb")  # Target color RGB object
         
         # Validate input
-        if not target_rgb or not user_colors or len(user_colors) > 3:
-            return jsonify({"error": "Invalid input. Provide target_rgb and up to 3 user_colors."}), 400
+        if not target_rgb or not user_colors or len(user_colors) > MAX_PALETTE_COLORS:
+            return jsonify({"error": f"Invalid input. Provide target_rgb and up to {MAX_PALETTE_COLORS} user_colors."}), 400
         
         # Validate target RGB structure
         if not all(key in target_rgb for key in ["r", "g", "b"]):
@@ -423,17 +346,26 @@ def rgb_paint_mixing():
             if not all(key in color for key in ["r", "g", "b"]):
                 return jsonify({"error": f"user_colors[{i}] must contain r, g, b values"}), 400
         
+        solver = data.get("solver", "grid")  # "grid" (0.1 steps) or "continuous" (1% steps)
+        resolution = data.get("resolution", 0.01)
+        max_paints = data.get("max_paints", MAX_MIX_PAINTS)  # Paints per recipe when the palette has more than 3
+        metric = data.get("metric", "rgb")  # "rgb" distance or perceptual "delta_e" (CIEDE2000)
+        model = data.get("model", "subtractive")  # "subtractive" or "kubelka_munk" mixing model
+        session_token = data.get("session_token", "")  # Reuse the previous recipe while a target is adjusted
+        top_k = data.get("top_k", 1)  # Recipes to return: the closest match plus top_k - 1 alternatives
+        max_ms = data.get("max_ms")  # Time budget for the search; the best recipe so far is returned when it runs out
+        tolerance = data.get("tolerance")  # Stop at the first recipe this close (in units of metric)
+        
         # Use the Calculations Agent directly for RGB mixing
-        result = calculations_agent.tools[1](target_rgb, user_colors)  # calculate_color_mix_ratios
+        result = calculations_agent.tools[1](target_rgb, user_colors, solver, resolution, max_paints, metric, model, session_token, top_k, max_ms, tolerance)  # calculate_color_mix_ratios
         
         if result.get('success'):
             # Check if the result is close enough to be practical
             distance = result["closest_match"]["distance"]
-            accuracy_threshold = 50  # Adjustable threshold
             
             # Add color suggestions if accuracy is poor
             color_suggestions = []
-            if distance > accuracy_threshold:
+            if distance > ACCURACY_THRESHOLD:
                 color_suggestions = suggest_additional_colors(target_rgb, user_colors)
             
             # Add additional metadata for consistency with complete pipeline
@@ -445,19 +377,20 @@ def rgb_paint_mixing():
                 "user_colors": user_colors,
                 "user_colors_count": len(user_colors),
                 "closest_match": result["closest_match"],
+                "selected_colors": result["selected_colors"],
+                "alternatives": result["alternatives"],
+                "warm_started": result["warm_started"],
+                "gamut": result["gamut"],
+                "search": result["search"],
                 "pipeline_type": "rgb_direct",
-                "accuracy_analysis": {
-                    "distance": distance,
-                    "is_achievable": distance <= accuracy_threshold,
-                    "accuracy_level": "Excellent" if distance <= 10 else "Good" if distance <= 30 else "Fair" if distance <= 50 else "Poor"
-                },
+                "accuracy_analysis": analyze_accuracy(distance, result["closest_match"]["delta_e"]),
                 "color_suggestions": color_suggestions,
                 "processing_steps": [
                     {
                         "step": 1,
                         "agent": "calculations_agent",
                         "action": "calculate_color_mix_ratios",
-                        "input": {"target_rgb": target_rgb, "user_colors": user_colors}
+                        "input": {"target_rgb": target_rgb, "user_colors": user_colors, "solver": solver, "metric": metric, "model": model}
                     }
                 ]
             }
@@ -469,6 +402,64 @@ def rgb_paint_mixing():
         print(f"Error: {e}")  # Log the error
         return jsonify({"error": str(e)}), 500
 
+@app.route('/rgb-paint-mixing/batch', methods=['POST'])
+def rgb_paint_mixing_batch():
+    """Batch RGB paint mixing: one palette, many target colors, one recipe per target."""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+        
+        user_colors = data.get("user_colors")  # List of RGB objects
+        target_rgbs = data.get("target_rgbs")  # List of target RGB objects
+        
+        if not user_colors or not isinstance(target_rgbs, list) or not target_rgbs:
+            return jsonify({"error": "Invalid input. Provide user_colors and a list of target_rgbs."}), 400
+        
+        for i, color in enumerate(user_colors):
+            if not all(key in color for key in ["r", "g", "b"]):
+                return jsonify({"error": f"user_colors[{i}] must contain r, g, b values"}), 400
+        
+        solver = data.get("solver", "lattice")
+        resolution = data.get("resolution", 0.01)
+        max_paints = data.get("max_paints", MAX_MIX_PAINTS)
+        metric = data.get("metric", "rgb")
+        model = data.get("model", "subtractive")
+        
+        result = calculations_agent.tools[4](target_rgbs, user_colors, solver, resolution, max_paints, metric, model)  # calculate_batch_color_mix_ratios
+        
+        if not result.get('success'):
+            return jsonify(result), 400
+        
+        for recipe in result["results"]:
+            recipe["accuracy_analysis"] = analyze_accuracy(recipe["closest_match"]["distance"], recipe["closest_match"]["delta_e"])
+        
+        return jsonify({
+            "success": True,
+            "message": result["message"],
+            "user_colors": user_colors,
+            "user_colors_count": len(user_colors),
+            "results": result["results"],
+            "total_targets": result["total_targets"],
+            "solver": result["solver"],
+            "metric": result["metric"],
+            "model": result["model"],
+            "pipeline_type": "rgb_direct_batch"
+        })
+        
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/mixing-cache-stats', methods=['GET'])
+def mixing_cache_stats():
+    """Report hit/miss/eviction counters of the in-process mixing caches."""
+    try:
+        return jsonify(get_mix_cache_stats())
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/rgb-to-cmyk', methods=['POST'])
 def rgb_to_cmyk_endpoint():
     """Convert RGB to CMYK using the Calculations Agent."""
@@ -493,41 +484,126 @@ def rgb_to_cmyk_endpoint():
         print(f"Error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/rgb-to-cmyk/batch', methods=['POST'])
+def rgb_to_cmyk_batch_endpoint():
+    """Convert many RGB colors to CMYK in one request using the Calculations Agent."""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+        
+        colors = data.get("colors")  # Example: [ { "r": 255, "g": 0, "b": 0 }, ... ]
+        if not isinstance(colors, list):
+            return jsonify({"error": "colors must be a list of { r, g, b } objects"}), 400
+        
+        result = calculations_agent.tools[5](colors)  # rgb_to_cmyk_batch
+        
+        if result.get('success'):
+            return jsonify(result)
+        else:
+            return jsonify(result), 400
+            
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/suggest-paints', methods=['POST'])
+def suggest_paints():
+    """Suggest which catalog paints to buy for a target color using the Calculations Agent."""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+        
+        target_rgb = data.get("target_rgb")
+        user_colors = data.get("user_colors")
+        if not target_rgb or not user_colors or len(user_colors) > MAX_PALETTE_COLORS:
+            return jsonify({"error": f"Invalid input. Provide target_rgb and up to {MAX_PALETTE_COLORS} user_colors."}), 400
+        
+        count = data.get("count", 3)  # Number of paints to suggest
+        max_paints = data.get("max_paints", MAX_MIX_PAINTS)
+        result = calculations_agent.tools[6](target_rgb, user_colors, count, max_paints)  # suggest_catalog_paints
+        
+        if result.get('success'):
+            return jsonify(result)
+        else:
+            return jsonify(result), 400
+            
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/nearest-paints', methods=['POST'])
+def nearest_paints():
+    """Find the closest known catalog paints for one or many colors using the Calculations Agent."""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+        
+        colors = data.get("colors")  # Example: [ { "r": 255, "g": 0, "b": 0 }, ... ]
+        if isinstance(colors, dict):
+            colors = [colors]
+        if not isinstance(colors, list):
+            return jsonify({"error": "colors must be a list of { r, g, b } objects"}), 400
+        
+        k = data.get("k", 5)  # Paints returned per color
+        space = data.get("space", "lab")  # "lab" or "rgb"
+        result = calculations_agent.tools[7](colors, k, space)  # find_nearest_paints
+        
+        if result.get('success'):
+            return jsonify(result)
+        else:
+            return jsonify(result), 400
+            
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/paint-set/cover', methods=['POST'])
+def paint_set_cover():
+    """Find the fewest owned paints that mix every target color of a project using the Calculations Agent."""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+        
+        user_colors = data.get("user_colors")  # Owned paints as RGB objects
+        target_rgbs = data.get("target_rgbs")  # The project's target colors
+        
+        if not user_colors or not isinstance(target_rgbs, list) or not target_rgbs:
+            return jsonify({"error": "Invalid input. Provide user_colors and a list of target_rgbs."}), 400
+        
+        for i, color in enumerate(user_colors):
+            if not all(key in color for key in ["r", "g", "b"]):
+                return jsonify({"error": f"user_colors[{i}] must contain r, g, b values"}), 400
+        
+        tolerance = data.get("tolerance", ACCURACY_THRESHOLD)  # Max RGB distance of a target's recipe
+        max_paints = data.get("max_paints", 3)  # Paints per recipe
+        max_ms = data.get("max_ms")  # Time limit of the cover search
+        result = calculations_agent.tools[8](target_rgbs, user_colors, tolerance, max_paints, max_ms)  # find_covering_paint_set
+        
+        if result.get('success'):
+            return jsonify(result)
+        else:
+            return jsonify(result), 400
+            
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/scan-rgb-from-images', methods=['POST'])
 def scan_rgb_from_images():
     """Scan RGB values from multiple images using the RGB Scanner Agent."""
     try:
-        # Check if files are uploaded
-        if 'files' not in request.files:
-            return jsonify({"error": "No files uploaded"}), 400
-        
-        files = request.files.getlist('files')
-        if not files or files[0].filename == '':
-            return jsonify({"error": "No files selected"}), 400
-        
-        # Save uploaded files
-        image_paths = []
-        for file in files:
-            if file and allowed_file(file.filename):
-                # Generate unique filename
-                input_filename = secure_filename(file.filename)
-                input_name, input_ext = os.path.splitext(input_filename)
-                unique_filename = f"{input_name}_{uuid.uuid4().hex[:8]}{input_ext}"
-                file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
-                
-                file.save(file_path)
-                image_paths.append(file_path)
-        
-        if not image_paths:
-            return jsonify({"error": "No valid image files uploaded"}), 400
+        # Uploads are buffered in memory and scanned straight from the request, never saved
+        images, error = ingest_uploads('files')
+        if error:
+            return error
         
         # Use the RGB Scanner Agent
-        result = rgb_scanner_agent.tools[1](image_paths)  # scan_rgb_from_multiple_images
-        
-        # Clean up uploaded files
-        for path in image_paths:
-            if os.path.exists(path):
-                os.remove(path)
+        backend = request.form.get('backend')  # "vision" or "local"; default from SHADESMITH_SCANNER_BACKEND
+        result = rgb_scanner_agent.tools[1](images, backend)  # scan_rgb_from_multiple_images
         
         if result.get('success'):
             return jsonify(result)
@@ -535,11 +611,6 @@ def scan_rgb_from_images():
             return jsonify(result), 400
             
     except Exception as e:
-        # Clean up files on error
-        if 'image_paths' in locals():
-            for path in image_paths:
-                if os.path.exists(path):
-                    os.remove(path)
         print(f"Error: {e}")
         return jsonify({"error": str(e)}), 500
 
@@ -547,37 +618,17 @@ def scan_rgb_from_images():
 def convert_multiple_images():
     """Convert multiple images to PNG using the Image Converter Agent."""
     try:
-        # Check if files are uploaded
-        if 'files' not in request.files:
-            return jsonify({"error": "No files uploaded"}), 400
-        
-        files = request.files.getlist('files')
-        if not files or files[0].filename == '':
-            return jsonify({"error": "No files selected"}), 400
-        
-        # Save uploaded files
-        image_paths = []
-        for file in files:
-            if file and allowed_file(file.filename):
-                # Generate unique filename
-                input_filename = secure_filename(file.filename)
-                input_name, input_ext = os.path.splitext(input_filename)
-                unique_filename = f"{input_name}_{uuid.uuid4().hex[:8]}{input_ext}"
-                file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
-                
-                file.save(file_path)
-                image_paths.append(file_path)
+        # Uploads are converted from their in-memory buffers; only the PNGs are written
+        images, error = ingest_uploads('files')
+        if error:
+            return error
         
-        if not image_paths:
-            return jsonify({"error": "No valid image files uploaded"}), 400
+        # Unique names keep concurrent requests from overwriting each other's PNGs
+        for file in images:
+            file.filename = unique_filename(file.filename)
         
         # Use the Image Converter Agent
-        result = image_converter_agent.tools[1](image_paths)  # convert_multiple_images_to_png
-        
-        # Clean up uploaded files
-        for path in image_paths:
-            if os.path.exists(path):
-                os.remove(path)
+        result = image_converter_agent.tools[1](images, UPLOAD_FOLDER)  # convert_multiple_images_to_png
         
         if result.get('success'):
             return jsonify(result)
@@ -585,11 +636,6 @@ def convert_multiple_images():
             return jsonify(result), 400
             
     except Exception as e:
-        # Clean up files on error
-        if 'image_paths' in locals():
-            for path in image_paths:
-                if os.path.exists(path):
-                    os.remove(path)
         print(f"Error: {e}")
         return jsonify({"error": str(e)}), 500
 
@@ -854,6 +900,10 @@ def delete_mixing_result(user_id, mixing_id):
             "message": "Database not connected"
         }), 501
             
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/generate-color-inspiration', methods=['GET'])
 def generate_color_inspiration():
     """Generate 10 new colors by mixing 2-3 unique colors from a hardcoded palette."""
@@ -901,7 +951,13 @@ def pipeline_status():
             "available_endpoints": [
                 "/complete-paint-mixing",
                 "/rgb-paint-mixing",
+                "/rgb-paint-mixing/batch",
+                "/mixing-cache-stats",
                 "/rgb-to-cmyk", 
+                "/rgb-to-cmyk/batch",
+                "/suggest-paints",
+                "/nearest-paints",
+                "/paint-set/cover",
                 "/scan-rgb-from-images",
                 "/convert-multiple-images",
                 "/rgbToRatio",
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark the paint mixing models
+Reports mixes per second for each model in agent.mixing_engine.MIX_MODELS, next to
+the scalar subtractive_color_mix, over batches shaped like the solvers' search loops
+"""
+
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+# Add the agent directory to the path
+sys.path.append(str(Path(__file__).parent))
+
+from agent.calculations_agent import subtractive_color_mix
+from agent.mixing_engine import MIX_MODELS, simplex_lattice, quantize_mix_batch
+
+PALETTE = [
+    {"r": 255, "g": 255, "b": 255},
+    {"r": 0, "g": 0, "b": 255},
+    {"r": 255, "g": 255, "b": 0},
+    {"r": 200, "g": 30, "b": 40}
+]
+
+
+def time_per_call(function, min_seconds: float = 0.5):
+    """Average wall time of one call, repeating until min_seconds have passed."""
+    function()  # Warm up lookup tables and caches
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        function()
+        calls += 1
+    return (time.perf_counter() - start) / calls
+
+
+def random_weights(rows: int, colors: int, seed: int = 0):
+    """Random ratio rows summing to 1, like the continuous solver's candidates."""
+    return np.random.default_rng(seed).dirichlet(np.ones(colors), size=rows)
+
+
+def main():
+    palette = np.array([[c["r"], c["g"], c["b"]] for c in PALETTE], dtype=np.float64)
+    grid_weights = simplex_lattice(len(PALETTE))
+    batches = [
+        ("0.1 grid", grid_weights),
+        ("1k random", random_weights(1000, len(PALETTE))),
+        ("100k random", random_weights(100000, len(PALETTE)))
+    ]
+
+    print("🚀 Paint mixing model benchmark")
+    print(f"   Palette of {len(PALETTE)} paints")
+    print("=" * 60)
+    print(f"{'model':<24}{'batch':<14}{'rows':>8}{'mixes/s':>14}")
+
+    for name, weights in batches[:2]:
+        rows = [list(row) for row in weights]
+        seconds = time_per_call(lambda: [subtractive_color_mix(PALETTE, row) for row in rows])
+        print(f"{'subtractive (scalar)':<24}{name:<14}{len(rows):>8}{len(rows) / seconds:>14,.0f}")
+
+    for model, mix_batch in MIX_MODELS.items():
+        for name, weights in batches:
+            seconds = time_per_call(lambda: quantize_mix_batch(mix_batch(palette, weights)))
+            print(f"{model:<24}{name:<14}{len(weights):>8}{len(weights) / seconds:>14,.0f}")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,9 @@ Tests each agent individually and the complete pipeline
 import os
 import sys
 import json
+import math
+import numpy as np
+from itertools import product
 from pathlib import Path
 
 # Add the agent directory to Python path
@@ -36,18 +39,22 @@ def test_image_converter_agent():
     
     print(f"📁 Testing with images: {existing_images}")
     
-    # Test single image conversion
-    result = image_converter_agent.tools[0](existing_images[0])  # convert_image_to_png
-    print(f"✅ Single image conversion: {result.get('success', False)}")
-    if result.get('success'):
-        print(f"   Output: {result.get('output_file')}")
+    import tempfile
     
-    # Test multiple image conversion
-    if len(existing_images) > 1:
-        result = image_converter_agent.tools[4](existing_images)  # convert_multiple_images_to_png
-        print(f"✅ Multiple image conversion: {result.get('success', False)}")
+    # Converted PNGs go to a scratch directory, not next to the fixtures or into uploads/
+    with tempfile.TemporaryDirectory() as output_dir:
+        # Test single image conversion
+        result = image_converter_agent.tools[0](existing_images[0], os.path.join(output_dir, "converted.png"))  # convert_image_to_png
+        print(f"✅ Single image conversion: {result.get('success', False)}")
         if result.get('success'):
-            print(f"   Converted {result.get('total_converted')} images")
+            print(f"   Output: {result.get('output_file')}")
+        
+        # Test multiple image conversion
+        if len(existing_images) > 1:
+            result = image_converter_agent.tools[1](existing_images, output_dir)  # convert_multiple_images_to_png
+            print(f"✅ Multiple image conversion: {result.get('success', False)}")
+            if result.get('success'):
+                print(f"   Converted {result.get('total_converted')} images")
     
     return True
 
@@ -86,6 +93,120 @@ def test_rgb_scanner_agent():
     
     return True
 
+def test_local_scanner_backend():
+    """Test the in-process scanner backend on a noisy two-color swatch"""
+    print("\n🧪 Testing Local Scanner Backend...")
+    
+    import tempfile
+    from PIL import Image
+    
+    swatch = np.zeros((240, 320, 3))
+    swatch[:, :200] = (200, 30, 40)
+    swatch[:, 200:] = (20, 120, 200)
+    swatch = np.clip(swatch + np.random.default_rng(5).normal(0, 6, swatch.shape), 0, 255).astype(np.uint8)
+    with tempfile.TemporaryDirectory() as directory:
+        image_path = os.path.join(directory, "swatch.jpg")
+        Image.fromarray(swatch).save(image_path)
+        result = rgb_scanner_agent.tools[0](image_path, "local")  # scan_rgb_from_image
+        assert result["success"] and result["backend"] == "local"
+        assert "error" in rgb_scanner_agent.tools[0](image_path, "hsv")  # scan_rgb_from_image
+    
+    primary, secondary = result["all_colors"][:2]
+    assert set(primary) == {"r", "g", "b", "score", "pixel_fraction"}
+    assert max(abs(primary[c] - v) for c, v in zip("rgb", (200, 30, 40))) <= 4
+    assert max(abs(secondary[c] - v) for c, v in zip("rgb", (20, 120, 200))) <= 4
+    assert abs(primary["pixel_fraction"] - 0.625) < 0.02 and abs(secondary["pixel_fraction"] - 0.375) < 0.02
+    assert abs(sum(color["pixel_fraction"] for color in result["all_colors"]) - 1) < 1e-9
+    print(f"✅ Primary RGB: R={primary['r']}, G={primary['g']}, B={primary['b']} ({primary['pixel_fraction']:.0%})")
+    
+    return True
+
+def test_shared_vision_client():
+    """Test Vision scans against a local fake annotator: one shared client, one batch request per scan"""
+    print("\n🧪 Testing Shared Vision Client...")
+    
+    import io
+    from PIL import Image
+    from google.cloud import vision
+    from agent import scanner_backends
+    
+    class FakeAnnotator:
+        """Answers batch_annotate_images with the local backend's colors, or an error for a blank image."""
+        def __init__(self):
+            self.batch_sizes = []
+        
+        def batch_annotate_images(self, requests):
+            self.batch_sizes.append(len(requests))
+            responses = []
+            for annotate_request in requests:
+                assert annotate_request.features[0].type_ == vision.Feature.Type.IMAGE_PROPERTIES
+                colors = scanner_backends.local_dominant_colors(bytes(annotate_request.image.content))
+                if colors[0]["r"] == colors[0]["g"] == colors[0]["b"] == 255:
+                    responses.append(vision.AnnotateImageResponse(error={"message": "Blank image"}))
+                    continue
+                responses.append(vision.AnnotateImageResponse(image_properties_annotation={"dominant_colors": {"colors": [
+                    {"color": {"red": c["r"], "green": c["g"], "blue": c["b"]}, "score": c["score"], "pixel_fraction": c["pixel_fraction"]}
+                    for c in colors
+                ]}}))
+            return vision.BatchAnnotateImagesResponse(responses=responses)
+    
+    images = []
+    for color in ((200, 30, 40), (20, 30, 200), (255, 255, 255)):
+        buffer = io.BytesIO()
+        Image.new("RGB", (300, 200), color).save(buffer, "PNG")
+        images.append(buffer.getvalue())
+    
+    fake = FakeAnnotator()
+    scanner_backends.set_vision_client(fake)
+    try:
+        result = rgb_scanner_agent.tools[1](images, "vision")  # scan_rgb_from_multiple_images
+        single = rgb_scanner_agent.tools[0](images[1], "vision")  # scan_rgb_from_image
+        assert scanner_backends.get_vision_client() is fake
+    finally:
+        scanner_backends.set_vision_client(None)
+    
+    assert fake.batch_sizes == [3, 1]
+    assert result["success"] and result["total_scanned"] == 2
+    # Images travel as analysis-resolution JPEGs, so colors may shift by a unit or two
+    assert [abs(scan["primary_rgb"]["r"] - r) <= 2 for scan, r in zip(result["scanned_results"], (200, 20))] == [True, True]
+    assert result["errors"] == ["Failed to scan 'image_3': Blank image"]
+    assert abs(single["primary_rgb"]["b"] - 200) <= 2
+    print(f"✅ 3 images in {len(fake.batch_sizes) - 1} request, client reused")
+    
+    return True
+
+def test_analysis_resolution():
+    """Test that photos are decoded, converted and sent to Vision at analysis resolution"""
+    print("\n🧪 Testing Analysis Resolution...")
+    
+    import tempfile
+    from PIL import Image
+    from agent.image_analysis import open_analysis_image, encode_for_vision, ANALYSIS_SIZE
+    
+    rows, columns = np.mgrid[0:1800, 0:2400]
+    photo = np.stack([columns * 255 // 2400, rows * 255 // 1800, np.full_like(rows, 90)], axis=2).astype(np.uint8)
+    with tempfile.TemporaryDirectory() as directory:
+        image_path = os.path.join(directory, "photo.jpg")
+        Image.fromarray(photo).save(image_path, quality=92)
+        
+        image = open_analysis_image(image_path)
+        assert image.size == (ANALYSIS_SIZE, ANALYSIS_SIZE * 3 // 4) and image.mode == "RGB"
+        assert np.abs(np.asarray(image).reshape(-1, 3).mean(axis=0) - photo.reshape(-1, 3).mean(axis=0)).max() < 2
+        
+        content = encode_for_vision(image_path)
+        assert len(content) * 10 < os.path.getsize(image_path)
+        
+        result = image_converter_agent.tools[0](image_path)  # convert_image_to_png
+        with Image.open(result["output_file"]) as converted:
+            assert converted.size == (2400, 1800)
+        result = image_converter_agent.tools[0](image_path, None, ANALYSIS_SIZE)  # convert_image_to_png
+        with Image.open(result["output_file"]) as converted:
+            assert converted.size == image.size
+    
+    print(f"✅ 2400x1800 → {image.size[0]}x{image.size[1]}, {len(content)} bytes for Vision")
+    
+    return True
+
 def test_calculations_agent():
     """Test the Calculations Agent"""
     print("\n🧪 Testing Calculations Agent...")
@@ -116,6 +237,585 @@ def test_calculations_agent():
     
     return True
 
+def test_vectorized_mixing_engine():
+    """Test that the batched mixing engine matches the scalar subtractive mixing loop"""
+    print("\n🧪 Testing Vectorized Mixing Engine...")
+    
+    from agent.calculations_agent import subtractive_color_mix, cmyk_to_rgb
+    
+    target_rgb = {"r": 40, "g": 150, "b": 70}
+    user_colors = [
+        {"r": 0, "g": 0, "b": 255},    # Blue
+        {"r": 255, "g": 255, "b": 0},  # Yellow
+        {"r": 255, "g": 255, "b": 255} # White
+    ]
+    
+    # Reference: score every 0.1-step ratio set one at a time, repeated ratios included
+    best_ratios, best_distance = None, float("inf")
+    for units in product(range(11), repeat=len(user_colors)):
+        if sum(units) != 10:
+            continue
+        ratio_set = tuple(u / 10 for u in units)
+        mixed_rgb = cmyk_to_rgb(subtractive_color_mix(user_colors, ratio_set))
+        distance = math.sqrt(sum((mixed_rgb[c] - target_rgb[c]) ** 2 for c in "rgb"))
+        if distance < best_distance:
+            best_ratios, best_distance = ratio_set, distance
+    
+    result = calculations_agent.tools[1](target_rgb, user_colors)  # calculate_color_mix_ratios
+    closest_match = result["closest_match"]
+    print(f"✅ Batched ratios: {closest_match['ratios']} (reference: {best_ratios})")
+    assert closest_match["ratios"] == best_ratios
+    assert closest_match["distance"] == best_distance
+    
+    return True
+
+def test_continuous_mixing_solver():
+    """Test the continuous simplex solver against the 0.1-step grid"""
+    print("\n🧪 Testing Continuous Mixing Solver...")
+    
+    target_rgb = {"r": 230, "g": 120, "b": 140}
+    user_colors = [
+        {"r": 255, "g": 0, "b": 0},    # Red
+        {"r": 255, "g": 255, "b": 255} # White
+    ]
+    
+    grid = calculations_agent.tools[1](target_rgb, user_colors)  # calculate_color_mix_ratios
+    result = calculations_agent.tools[1](target_rgb, user_colors, "continuous", 0.01)
+    ratios = result["closest_match"]["ratios"]
+    print(f"✅ Continuous ratios: {ratios} (distance {result['closest_match']['distance']:.2f}, grid {grid['closest_match']['distance']:.2f})")
+    assert abs(sum(ratios) - 1.0) < 1e-9
+    assert all(abs(r * 100 - round(r * 100)) < 1e-9 for r in ratios)
+    assert result["closest_match"]["distance"] <= grid["closest_match"]["distance"]
+    
+    invalid = calculations_agent.tools[1](target_rgb, user_colors, "annealing")
+    assert "error" in invalid
+    # A step that does not divide 1 is rejected, not rounded to 1/33
+    uneven = calculations_agent.tools[1](target_rgb, user_colors, "continuous", 0.03)
+    assert "divide 1 evenly" in uneven["error"]
+    
+    return True
+
+def test_palette_subset_solver():
+    """Test subset selection for palettes with more than 3 paints"""
+    print("\n🧪 Testing Palette Subset Solver...")
+    
+    target_rgb = {"r": 255, "g": 192, "b": 203}  # Light pink
+    user_colors = [
+        {"r": 0, "g": 0, "b": 255},     # Blue
+        {"r": 0, "g": 128, "b": 0},     # Green
+        {"r": 255, "g": 0, "b": 0},     # Red
+        {"r": 40, "g": 40, "b": 40},    # Near black
+        {"r": 255, "g": 255, "b": 0},   # Yellow
+        {"r": 255, "g": 255, "b": 255}, # White
+        {"r": 128, "g": 0, "b": 128},   # Purple
+        {"r": 0, "g": 255, "b": 255}    # Cyan
+    ]
+    
+    result = calculations_agent.tools[1](target_rgb, user_colors, "grid", 0.01, 3)  # calculate_color_mix_ratios
+    ratios = result["closest_match"]["ratios"]
+    print(f"✅ Selected colors: {result['selected_colors']} with ratios {ratios}")
+    assert len(ratios) == len(user_colors)
+    assert abs(sum(ratios) - 1.0) < 1e-9
+    assert sum(1 for r in ratios if r > 0) <= 3
+    assert {2, 5} <= set(result["selected_colors"])  # Red and white
+    
+    return True
+
+def test_mix_lattice_lookup():
+    """Test that indexed lattice lookups agree with the grid search"""
+    print("\n🧪 Testing Mix Lattice Lookup...")
+    
+    from agent.mixing_engine import get_mix_lattice
+    
+    user_colors = [
+        {"r": 255, "g": 0, "b": 0},     # Red
+        {"r": 0, "g": 0, "b": 255},     # Blue
+        {"r": 255, "g": 255, "b": 255}  # White
+    ]
+    
+    for target_rgb in ({"r": 128, "g": 64, "b": 192}, {"r": 250, "g": 180, "b": 200}, {"r": 0, "g": 0, "b": 0}):
+        grid = calculations_agent.tools[1](target_rgb, user_colors)  # calculate_color_mix_ratios
+        lattice = calculations_agent.tools[1](target_rgb, user_colors, "lattice")
+        assert lattice["closest_match"] == grid["closest_match"]
+    
+    # The same palette is indexed once
+    assert get_mix_lattice(user_colors) is get_mix_lattice([dict(c) for c in user_colors])
+    print("✅ Lattice lookups match the grid search")
+    
+    return True
+
+def test_batch_color_mixing():
+    """Test batch mixing against one calculate_color_mix_ratios call per target"""
+    print("\n🧪 Testing Batch Color Mixing...")
+    
+    user_colors = [
+        {"r": 255, "g": 0, "b": 0},     # Red
+        {"r": 255, "g": 255, "b": 0},   # Yellow
+        {"r": 255, "g": 255, "b": 255}  # White
+    ]
+    target_rgbs = [{"r": r, "g": 128, "b": 64} for r in range(0, 256, 32)]
+    
+    result = calculations_agent.tools[4](target_rgbs, user_colors)  # calculate_batch_color_mix_ratios
+    print(f"✅ Batch mixing: {result.get('total_targets')} recipes")
+    assert result["total_targets"] == len(target_rgbs)
+    for target_rgb, recipe in zip(target_rgbs, result["results"]):
+        single = calculations_agent.tools[1](target_rgb, user_colors)  # calculate_color_mix_ratios
+        assert recipe["closest_match"] == single["closest_match"]
+    
+    return True
+
+def test_mix_result_cache():
+    """Test LRU eviction, TTL expiry and counters of the mixing result cache"""
+    print("\n🧪 Testing Mix Result Cache...")
+    
+    import time
+    from agent.result_cache import ResultCache
+    from agent.calculations_agent import mix_result_cache
+    
+    cache = ResultCache("test", max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (1, 1, 1, 2)
+    
+    expiring = ResultCache("ttl", max_size=2, ttl_seconds=0.01)
+    expiring.put("a", 1)
+    time.sleep(0.02)
+    assert expiring.get("a") is None and expiring.stats()["expirations"] == 1
+    
+    target_rgb = {"r": 17, "g": 99, "b": 201}
+    user_colors = [{"r": 0, "g": 0, "b": 255}, {"r": 255, "g": 255, "b": 255}]
+    first = calculations_agent.tools[1](target_rgb, user_colors)  # calculate_color_mix_ratios
+    hits = mix_result_cache.hits
+    second = calculations_agent.tools[1](target_rgb, user_colors)
+    assert mix_result_cache.hits == hits + 1
+    assert second == first and second is not first
+    print(f"✅ Cache stats: {mix_result_cache.stats()}")
+    
+    return True
+
+def test_perceptual_metric():
+    """Test the Lab lookup table, CIEDE2000 and the delta_e solver metric"""
+    print("\n🧪 Testing Perceptual Metric...")
+    
+    import numpy as np
+    from agent.color_tables import get_color_tables, srgb_to_lab_exact, delta_e2000_batch
+    from agent.mixing_engine import find_best_ratios, get_mix_lattice
+    
+    # Reference pairs from Sharma, Wu and Dalal (2005)
+    lab1 = [[50, 2.6772, -79.7751], [50, 0, 0], [50, 2.5, 0], [90.8027, -2.0831, 1.4410]]
+    lab2 = [[50, 0, -82.7485], [50, -1, 2], [73, 25, -18], [91.1528, -1.6435, 0.0447]]
+    assert np.allclose(delta_e2000_batch(lab1, lab2), [2.0425, 2.3669, 27.1492, 1.4441], atol=1e-4)
+    
+    tables = get_color_tables()
+    samples = np.random.default_rng(7).integers(0, 256, size=(500, 3))
+    assert delta_e2000_batch(tables.rgb_to_lab(samples), srgb_to_lab_exact(samples)).max() < 0.5
+    cmyk = calculations_agent.tools[0](200, 120, 40)["cmyk"]  # rgb_to_cmyk
+    assert [round(v * 100, 2) for v in tables.rgb_to_cmyk([200, 120, 40])] == [cmyk["c"], cmyk["m"], cmyk["y"], cmyk["k"]]
+    # Table files are keyed by their parameters, so a changed grid never reuses stale files
+    from agent import color_tables
+    key = color_tables.color_tables_key()
+    color_tables.LAB_LEVELS += 1
+    try:
+        assert color_tables.color_tables_key() != key
+    finally:
+        color_tables.LAB_LEVELS -= 1
+    assert color_tables.color_tables_version_dir().endswith(key)
+    # The solvers' CMYK round trip is read from the mapped tables
+    from agent.color_space import rgb_to_cmyk_array, cmyk_percentages, cmyk_to_rgb_array
+    from agent.mixing_engine import cmyk_roundtrip_table
+    brightest, channel = np.tril_indices(256)  # Every channel value up to the brightest channel
+    colors = np.stack([channel, brightest, brightest], axis=1)
+    direct = cmyk_to_rgb_array(cmyk_percentages(rgb_to_cmyk_array(colors)))[:, 0]
+    assert np.array_equal(cmyk_roundtrip_table()[channel, brightest], direct)
+    
+    user_colors = [{"r": 255, "g": 0, "b": 0}, {"r": 255, "g": 255, "b": 255}, {"r": 0, "g": 0, "b": 255}]
+    target_rgb = {"r": 120, "g": 60, "b": 150}
+    grid = find_best_ratios(target_rgb, user_colors, "delta_e")
+    assert get_mix_lattice(user_colors).best_match(target_rgb, "delta_e")["index"] == grid["index"]
+    
+    result = calculations_agent.tools[1](target_rgb, user_colors, "grid", 0.01, 4, "delta_e")  # calculate_color_mix_ratios
+    assert result["success"] and result["metric"] == "delta_e"
+    assert result["closest_match"]["delta_e"] == round(grid["score"], 2)
+    assert "error" in calculations_agent.tools[1](target_rgb, user_colors, "grid", 0.01, 4, "cie76")
+    print(f"✅ ΔE2000 recipe: {result['closest_match']['ratios']} (ΔE {result['closest_match']['delta_e']})")
+    
+    return True
+
+def test_kubelka_munk_model():
+    """Test the Kubelka-Munk mixing model and model selection"""
+    print("\n🧪 Testing Kubelka-Munk Model...")
+    
+    import numpy as np
+    from agent.mixing_engine import MIX_MODELS, find_best_ratios
+    
+    mix = MIX_MODELS["kubelka_munk"]
+    palette = np.array([[0, 0, 255], [255, 255, 0], [255, 255, 255], [120, 60, 200]], dtype=np.float64)
+    # Unmixed paints keep their own color
+    assert np.abs(mix(palette, np.eye(4)) - palette).max() < 1e-6
+    # Blue + yellow comes out green without a special case
+    green = mix(palette, np.array([[0.5, 0.5, 0, 0]]))[0]
+    assert green[1] > green[0] and green[1] > green[2]
+    # One batch call equals row-by-row calls
+    weights = np.random.default_rng(3).dirichlet(np.ones(4), size=50)
+    rows = np.vstack([mix(palette, weights[i:i + 1]) for i in range(50)])
+    assert np.allclose(mix(palette, weights), rows)
+    
+    user_colors = [{"r": 0, "g": 0, "b": 255}, {"r": 255, "g": 255, "b": 0}]
+    target_rgb = {"r": 0, "g": 140, "b": 100}
+    result = calculations_agent.tools[1](target_rgb, user_colors, "grid", 0.01, 4, "rgb", "kubelka_munk")  # calculate_color_mix_ratios
+    assert result["success"] and result["model"] == "kubelka_munk"
+    assert result["closest_match"]["ratios"] == find_best_ratios(target_rgb, user_colors, "rgb", "kubelka_munk")["ratios"]
+    assert "error" in calculations_agent.tools[1](target_rgb, user_colors, "grid", 0.01, 4, "rgb", "spectral")
+    print(f"✅ Kubelka-Munk recipe: {result['closest_match']['ratios']} → {result['closest_match']['mixed_rgb']}")
+    
+    return True
+
+def test_compact_colors():
+    """Test the slot color types behind the mixing results"""
+    print("\n🧪 Testing Compact Colors...")
+    
+    from agent.colors import RGBColor, CMYKColor, MixMatch
+    from agent.calculations_agent import mix_result_cache
+    
+    # Paint-adjusted CMYK worked out by hand: K from the brightest channel, none for vibrant colors
+    expected_cmyk = {
+        (0, 0, 0): {"c": 0, "m": 0, "y": 0, "k": 100},
+        (255, 255, 255): {"c": 0, "m": 0, "y": 0, "k": 0},
+        (255, 0, 0): {"c": 0, "m": 100, "y": 100, "k": 0},
+        (200, 120, 40): {"c": 0, "m": 40, "y": 80, "k": 21.57},
+        (30, 60, 90): {"c": 66.67, "m": 33.33, "y": 0, "k": 64.71},
+        (101, 0, 0): {"c": 60.39, "m": 100, "y": 100, "k": 0}  # K would be 60.39 but red is vibrant
+    }
+    for (r, g, b), cmyk in expected_cmyk.items():
+        assert CMYKColor.from_rgb(r, g, b).to_dict() == cmyk
+        assert calculations_agent.tools[0](r, g, b)["cmyk"] == cmyk  # rgb_to_cmyk
+    assert RGBColor.from_dict({"r": 1, "g": 2, "b": 3}) == RGBColor(1, 2, 3)
+    assert RGBColor(255, 128, 0).hex() == "#ff8000"
+    assert not hasattr(RGBColor(1, 2, 3), "__dict__")
+    
+    target_rgb = {"r": 90, "g": 30, "b": 160}
+    user_colors = [{"r": 255, "g": 0, "b": 0}, {"r": 0, "g": 0, "b": 255}, {"r": 255, "g": 255, "b": 255}]
+    first = calculations_agent.tools[1](target_rgb, user_colors)  # calculate_color_mix_ratios
+    cached = list(mix_result_cache._entries.values())[-1][0]
+    assert isinstance(cached[0], MixMatch)
+    # Responses are rebuilt from the compact entry, so callers can't alter the cache
+    first["closest_match"]["mixed_rgb"]["r"] = -1
+    assert calculations_agent.tools[1](target_rgb, user_colors)["closest_match"]["mixed_rgb"]["r"] != -1
+    print(f"✅ Cached recipe: {cached[0].mixed_rgb} {cached[0].mixed_cmyk}")
+    
+    return True
+
+def test_simplex_lattice():
+    """Test the simplex lattice generator against brute-force enumeration"""
+    print("\n🧪 Testing Simplex Lattice...")
+    
+    from agent.mixing_engine import simplex_lattice, simplex_units
+    
+    for color_count, step in [(1, 0.1), (2, 0.1), (3, 0.1), (4, 0.05), (3, 0.01)]:
+        divisions = round(1 / step)
+        expected = [units for units in product(range(divisions + 1), repeat=color_count) if sum(units) == divisions]
+        assert [tuple(row) for row in simplex_units(color_count, divisions).tolist()] == expected
+        weights = simplex_lattice(color_count, step)
+        assert np.allclose(weights.sum(axis=1), 1.0)
+    
+    assert simplex_lattice(3, 0.1) is simplex_lattice(3, 0.1)  # memoized, shared array
+    assert not simplex_lattice(3, 0.1).flags.writeable
+    assert (0.5, 0.5) in [tuple(row) for row in simplex_lattice(2).tolist()]
+    try:
+        simplex_lattice(3, 0.03)
+        assert False, "0.03 does not divide 1"
+    except ValueError:
+        pass
+    print(f"✅ Lattice sizes: 3 paints @ 0.1 = {len(simplex_lattice(3))}, 4 paints @ 0.01 = {len(simplex_lattice(4, 0.01))}")
+    
+    return True
+
+def test_branch_bound_solver():
+    """Test that branch-and-bound matches the exhaustive lattice search"""
+    print("\n🧪 Testing Branch-and-Bound Solver...")
+    
+    from agent.mixing_engine import find_best_ratios, find_best_ratios_branch_bound, simplex_lattice
+    
+    cases = [
+        ({"r": 40, "g": 150, "b": 70}, [{"r": 0, "g": 0, "b": 255}, {"r": 255, "g": 255, "b": 0}, {"r": 255, "g": 255, "b": 255}], 0.02),
+        ({"r": 230, "g": 120, "b": 140}, [{"r": 255, "g": 0, "b": 0}, {"r": 255, "g": 255, "b": 255}], 0.01),
+        ({"r": 90, "g": 60, "b": 120}, [{"r": 200, "g": 30, "b": 40}, {"r": 20, "g": 40, "b": 160}, {"r": 250, "g": 250, "b": 240}, {"r": 10, "g": 10, "b": 10}], 0.01)
+    ]
+    for target_rgb, user_colors, resolution in cases:
+        exhaustive = find_best_ratios(target_rgb, user_colors, step=resolution)
+        result = find_best_ratios_branch_bound(target_rgb, user_colors, resolution)
+        assert result["ratios"] == exhaustive["ratios"] and result["distance"] == exhaustive["distance"]
+    
+    # 4 paints at 1%: 176,851 ratio sets, most of them never scored
+    assert result["evaluated"] < 0.2 * len(simplex_lattice(4, 0.01))
+    print(f"✅ Scored {result['evaluated']} of {len(simplex_lattice(4, 0.01))} ratio sets")
+    
+    api = calculations_agent.tools[1](target_rgb, user_colors, "branch_bound", 0.01, 4)  # calculate_color_mix_ratios
+    assert api["success"] and api["closest_match"]["ratios"] == exhaustive["ratios"]
+    assert "error" in calculations_agent.tools[1](target_rgb, user_colors, "branch_bound", 0.01, 4, "delta_e")
+    # An "exhaustive" search at 1/33 steps is not what resolution 0.03 asked for
+    uneven = calculations_agent.tools[1](target_rgb, user_colors, "branch_bound", 0.03, 4)  # calculate_color_mix_ratios
+    assert "divide 1 evenly" in uneven["error"] and "search" not in uneven
+    
+    return True
+
+def test_warm_started_session():
+    """Test that a session token re-solves nearby targets from the previous recipe"""
+    print("\n🧪 Testing Warm-Started Sessions...")
+    
+    user_colors = [{"r": 200, "g": 30, "b": 40}, {"r": 20, "g": 40, "b": 160}, {"r": 250, "g": 250, "b": 240}]
+    calculate = calculations_agent.tools[1]  # calculate_color_mix_ratios
+    first = calculate({"r": 150, "g": 80, "b": 110}, user_colors, "continuous", 0.01, 4, "rgb", "subtractive", "test-session")
+    assert first["success"] and not first["warm_started"]
+    
+    # A nearby target refines the previous recipe locally
+    second = calculate({"r": 153, "g": 82, "b": 110}, user_colors, "continuous", 0.01, 4, "rgb", "subtractive", "test-session")
+    cold = calculate({"r": 153, "g": 82, "b": 110}, user_colors, "continuous", 0.01, 4)
+    assert second["success"] and second["warm_started"]
+    assert abs(sum(second["closest_match"]["ratios"]) - 1) < 1e-9
+    assert second["closest_match"]["distance"] <= cold["closest_match"]["distance"] + 2
+    print(f"✅ Warm distance {second['closest_match']['distance']:.2f}, cold {cold['closest_match']['distance']:.2f}")
+    
+    # Other options (or another palette) start from scratch
+    other = calculate({"r": 150, "g": 80, "b": 110}, user_colors, "continuous", 0.02, 4, "rgb", "subtractive", "test-session")
+    assert other["success"] and not other["warm_started"]
+    
+    return True
+
+def test_top_k_recipes():
+    """Test that top_k alternatives match ranking every ratio set on the grid"""
+    print("\n🧪 Testing Top-k Alternative Recipes...")
+    
+    from agent.mixing_engine import simplex_lattice, evaluate_ratio_batch, palette_to_array
+    
+    target_rgb = {"r": 140, "g": 90, "b": 100}
+    user_colors = [{"r": 200, "g": 30, "b": 40}, {"r": 20, "g": 40, "b": 160}, {"r": 250, "g": 250, "b": 240}]
+    weights = simplex_lattice(3, 0.1)
+    mixed_rgb, scores = evaluate_ratio_batch(palette_to_array(user_colors), weights, (140, 90, 100))
+    expected, seen = [], set()
+    for row in np.lexsort(tuple(weights.T[::-1]) + (scores,)):
+        key = (tuple(mixed_rgb[row].tolist()), tuple(np.flatnonzero(weights[row]).tolist()))
+        if key not in seen:
+            seen.add(key)
+            expected.append(tuple(weights[row].tolist()))
+    
+    for solver in ("grid", "lattice", "branch_bound"):
+        result = calculations_agent.tools[1](target_rgb, user_colors, solver, 0.1, 4, "rgb", "subtractive", "", 5)  # calculate_color_mix_ratios
+        assert result["success"] and len(result["alternatives"]) == 4
+        recipes = [result["closest_match"]] + result["alternatives"]
+        assert [tuple(recipe["ratios"]) for recipe in recipes] == expected[:5]
+    
+    # A larger palette merges the runner-ups of every candidate subset
+    result = calculations_agent.tools[1](target_rgb, user_colors + [{"r": 240, "g": 200, "b": 20}, {"r": 30, "g": 30, "b": 30}], "grid", 0.01, 3, "rgb", "subtractive", "", 5)  # calculate_color_mix_ratios
+    distances = [result["closest_match"]["distance"]] + [recipe["distance"] for recipe in result["alternatives"]]
+    assert distances == sorted(distances) and len(result["alternatives"]) == 4
+    assert all(len(recipe["selected_colors"]) <= 3 for recipe in result["alternatives"])
+    print(f"✅ Best {distances[0]:.2f}, 5th best {distances[-1]:.2f}")
+    
+    assert "error" in calculations_agent.tools[1](target_rgb, user_colors, "grid", 0.01, 4, "rgb", "subtractive", "", 11)  # calculate_color_mix_ratios
+    as_text = calculations_agent.tools[1](target_rgb, user_colors, "grid", 0.01, 4, "rgb", "subtractive", "", "3")  # calculate_color_mix_ratios
+    assert as_text["error"] == "top_k must be an integer between 1 and 10"
+    return True
+
+def test_search_budget():
+    """Test that max_ms and tolerance return early best-effort recipes"""
+    print("\n🧪 Testing Search Budget...")
+    
+    target_rgb = {"r": 122, "g": 80, "b": 130}
+    user_colors = [{"r": 200, "g": 30, "b": 40}, {"r": 20, "g": 40, "b": 160}, {"r": 250, "g": 250, "b": 240}]
+    calculate = calculations_agent.tools[1]  # calculate_color_mix_ratios
+    full = calculate(target_rgb, user_colors, "branch_bound", 0.002)
+    assert full["success"] and full["search"]["status"] == "exhaustive" and full["search"]["stopped_by"] is None
+    
+    # Any recipe within 60 is good enough
+    early = calculate(dict(target_rgb, b=131), user_colors, "branch_bound", 0.002, 4, "rgb", "subtractive", "", 1, None, 60)
+    assert early["success"] and early["search"] == dict(early["search"], status="best_effort", stopped_by="tolerance")
+    assert early["closest_match"]["distance"] <= 60
+    
+    # A generous budget finishes and gives the exhaustive recipe
+    relaxed = calculate(dict(target_rgb, b=132), user_colors, "branch_bound", 0.002, 4, "rgb", "subtractive", "", 1, 60000)
+    exact = calculate(dict(target_rgb, b=132), user_colors, "branch_bound", 0.002)
+    assert relaxed["search"]["status"] == "exhaustive" and relaxed["closest_match"] == exact["closest_match"]
+    
+    large_palette = user_colors + [{"r": 240, "g": 200, "b": 20}, {"r": 30, "g": 30, "b": 30}, {"r": 90, "g": 160, "b": 70}]
+    hurried = calculate(target_rgb, large_palette, "continuous", 0.001, 4, "rgb", "subtractive", "", 1, 1)
+    assert hurried["success"] and hurried["search"]["stopped_by"] == "max_ms"
+    print(f"✅ Exhaustive {full['closest_match']['distance']:.2f}, 1 ms budget {hurried['closest_match']['distance']:.2f}")
+    
+    assert "error" in calculate(target_rgb, user_colors, "grid", 0.01, 4, "rgb", "subtractive", "", 1, 0)
+    # JSON strings get the readable message, not a comparison TypeError
+    assert calculate(target_rgb, user_colors, "grid", 0.01, 4, "rgb", "subtractive", "", 1, "5")["error"] == "max_ms must be a positive number of milliseconds"
+    assert calculate(target_rgb, user_colors, "grid", 0.01, 4, "rgb", "subtractive", "", 1, None, "10")["error"] == "tolerance must be a number, 0 or more"
+    return True
+
+def test_parallel_solver():
+    """Test that sharding a search across worker processes returns the in-process recipe"""
+    print("\n🧪 Testing Parallel Solver...")
+    
+    from concurrent.futures import ProcessPoolExecutor
+    from agent.mixing_engine import find_best_palette_mix, find_best_ratios_branch_bound, find_best_ratios_branch_bound_sharded
+    
+    target_rgb = {"r": 90, "g": 120, "b": 60}
+    user_colors = [
+        {"r": 200, "g": 30, "b": 40}, {"r": 20, "g": 40, "b": 160}, {"r": 250, "g": 250, "b": 240},
+        {"r": 240, "g": 200, "b": 20}, {"r": 10, "g": 10, "b": 10}, {"r": 30, "g": 140, "b": 70}
+    ]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        for solver in ("grid", "branch_bound"):
+            serial = find_best_palette_mix(target_rgb, user_colors, 3, solver, 0.02)
+            sharded = find_best_palette_mix(target_rgb, user_colors, 3, solver, 0.02, executor=executor)
+            assert sharded["ratios"] == serial["ratios"] and sharded["selected_colors"] == serial["selected_colors"]
+        
+        serial = find_best_ratios_branch_bound(target_rgb, user_colors[:3], 0.005)
+        sharded = find_best_ratios_branch_bound_sharded(target_rgb, user_colors[:3], 0.005, executor, 3)
+        assert sharded["ratios"] == serial["ratios"] and sharded["distance"] == serial["distance"]
+    print(f"✅ Sharded recipes match: {sharded['ratios']}")
+    
+    return True
+
+def test_rgb_to_cmyk_batch():
+    """Test that the vectorized conversion matches the single-color one"""
+    print("\n🧪 Testing Batch RGB to CMYK...")
+    
+    from agent.color_space import rgb_to_cmyk_array, cmyk_percentages, cmyk_to_rgb_array
+    from agent.calculations_agent import cmyk_to_rgb
+    
+    colors = [{"r": r, "g": g, "b": b} for r, g, b in product((0, 37, 101, 128, 200, 255), repeat=3)]
+    result = calculations_agent.tools[5](colors)  # rgb_to_cmyk_batch
+    assert result["success"] and result["count"] == len(colors)
+    for color, cmyk in zip(colors, result["cmyk"]):
+        assert cmyk == calculations_agent.tools[0](color["r"], color["g"], color["b"])["cmyk"]  # rgb_to_cmyk
+    
+    # And back: the same truncation as cmyk_to_rgb
+    percentages = cmyk_percentages(rgb_to_cmyk_array([[c["r"], c["g"], c["b"]] for c in colors]))
+    for cmyk, rgb in zip(result["cmyk"], cmyk_to_rgb_array(percentages).tolist()):
+        assert list(cmyk_to_rgb(cmyk).values()) == rgb
+    print(f"✅ Converted {result['count']} colors")
+    
+    assert "error" in calculations_agent.tools[5]([{"r": 0, "g": 0, "b": 256}])
+    assert "error" in calculations_agent.tools[5]([{"r": 0, "g": 0}])
+    
+    return True
+
+def test_palette_gamut():
+    """Test that the gamut hull never claims a closer mix than the solver finds"""
+    print("\n🧪 Testing Palette Gamut...")
+    
+    from agent.gamut import PaletteGamut
+    from agent.mixing_engine import palette_to_array, simplex_lattice, subtractive_mix_batch, quantize_mix_batch
+    
+    palettes = [
+        [{"r": 0, "g": 0, "b": 255}, {"r": 255, "g": 255, "b": 0}, {"r": 255, "g": 255, "b": 255}],
+        [{"r": 200, "g": 30, "b": 40}, {"r": 250, "g": 250, "b": 240}],
+        [{"r": 120, "g": 80, "b": 60}]
+    ]
+    targets = np.array(list(product((0, 90, 180, 255), repeat=3)), dtype=np.float64)
+    for user_colors in palettes:
+        gamut = PaletteGamut(user_colors)
+        mixes = quantize_mix_batch(subtractive_mix_batch(palette_to_array(user_colors), simplex_lattice(len(user_colors), 0.02)))
+        assert gamut.contains(mixes).all()
+        closest = np.sqrt(((mixes[None, :, :] - targets[:, None, :]) ** 2).sum(axis=2)).min(axis=1)
+        assert (gamut.distance_bound(targets) <= closest + 1e-9).all()
+    
+    # An unreachable target skips the full search
+    result = calculations_agent.tools[1]({"r": 0, "g": 255, "b": 0}, palettes[1], "branch_bound", 0.01)  # calculate_color_mix_ratios
+    assert result["success"] and result["gamut"]["full_search_skipped"] and not result["gamut"]["in_gamut"]
+    assert result["closest_match"]["distance"] >= result["gamut"]["distance_bound"]
+    print(f"✅ Distance bound {result['gamut']['distance_bound']}, best mix {result['closest_match']['distance']:.2f}")
+    
+    return True
+
+def test_catalog_suggestions():
+    """Test that pruned paint suggestions match solving every catalog paint"""
+    print("\n🧪 Testing Catalog Paint Suggestions...")
+    
+    from agent.calculations_agent import solve_color_mix
+    from agent.paint_catalog import get_paint_catalog
+    
+    target_rgb = {"r": 30, "g": 150, "b": 140}
+    user_colors = [{"r": 200, "g": 30, "b": 40}, {"r": 250, "g": 250, "b": 240}, {"r": 240, "g": 200, "b": 20}]
+    result = calculations_agent.tools[6](target_rgb, user_colors, 3)  # suggest_catalog_paints
+    assert result["success"] and len(result["suggestions"]) == 3
+    assert result["candidates_solved"] < result["catalog_size"]
+    
+    catalog = get_paint_catalog()
+    distances = sorted(solve_color_mix(target_rgb, user_colors + [catalog.paint(i)["rgb"]], "grid", 0.1)[0].distance for i in range(len(catalog)))
+    assert [s["expected_distance"] for s in result["suggestions"]] == distances[:3]
+    print(f"✅ {result['suggestions'][0]['name']}: {result['current_distance']:.1f} → {result['suggestions'][0]['expected_distance']:.1f}")
+    
+    return True
+
+def test_nearest_paints():
+    """Test that nearest-paint lookups match a linear scan of the catalog"""
+    print("\n🧪 Testing Nearest Catalog Paints...")
+    
+    from agent.paint_catalog import get_paint_catalog
+    from agent.color_tables import srgb_to_lab_exact
+    
+    catalog = get_paint_catalog()
+    colors = [{"r": r, "g": g, "b": b} for r, g, b in np.random.default_rng(7).integers(0, 256, (20, 3)).tolist()]
+    for space in ("lab", "rgb"):
+        result = calculations_agent.tools[7](colors, 3, space)  # find_nearest_paints
+        assert result["success"] and result["count"] == len(colors)
+        library = np.asarray(catalog.lab if space == "lab" else catalog.rgb)
+        for color, entry in zip(colors, result["results"]):
+            point = np.array([color["r"], color["g"], color["b"]], dtype=np.float64)
+            scan = np.sort(np.linalg.norm(library - (srgb_to_lab_exact(point) if space == "lab" else point), axis=1))[:3]
+            assert [match["distance"] for match in entry["matches"]] == np.round(scan, 2).tolist()
+    
+    assert "error" in calculations_agent.tools[7](colors, 0)  # find_nearest_paints
+    assert "error" in calculations_agent.tools[7](colors, 3, "hsv")  # find_nearest_paints
+    print(f"✅ {colors[0]} → {result['results'][0]['matches'][0]['name']}")
+    
+    return True
+
+def test_covering_paint_set():
+    """Test that the covering paint set is as small as a brute-force search over every paint set"""
+    print("\n🧪 Testing Covering Paint Set...")
+    
+    from itertools import combinations
+    from agent.mixing_engine import get_mix_lattice
+    
+    rng = np.random.default_rng(2)
+    user_colors = [{"r": r, "g": g, "b": b} for r, g, b in rng.integers(0, 256, (8, 3)).tolist()]
+    user_colors[1], user_colors[5] = {"r": 0, "g": 0, "b": 255}, {"r": 255, "g": 255, "b": 0}
+    targets = [{"r": r, "g": g, "b": b} for r, g, b in rng.integers(0, 256, (6, 3)).tolist()]
+    result = calculations_agent.tools[8](targets, user_colors, 60, 2)  # find_covering_paint_set
+    assert result["success"] and result["optimal"]
+    
+    # Targets each 1-2 paint subset reaches, from the grid solver's own lattice
+    points = np.array([[t["r"], t["g"], t["b"]] for t in targets])
+    reaches = {}
+    for size in (1, 2):
+        for subset in combinations(range(len(user_colors)), size):
+            mixes = get_mix_lattice([user_colors[i] for i in subset]).mixed_rgb
+            reaches[subset] = np.linalg.norm(mixes[:, None, :] - points[None, :, :], axis=2).min(axis=0) <= 60
+    reachable = np.any(list(reaches.values()), axis=0)
+    assert result["unreachable_targets"] == np.flatnonzero(~reachable).tolist()
+    
+    def covers(paint_set):
+        covered = np.zeros(len(targets), dtype=bool)
+        for subset, reached in reaches.items():
+            if set(subset) <= set(paint_set):
+                covered |= reached
+        return (covered == reachable).all()
+    
+    smallest = next(size for size in range(len(user_colors) + 1) if any(covers(paint_set) for paint_set in combinations(range(len(user_colors)), size)))
+    assert result["paint_count"] == smallest and covers(result["paint_set"])
+    for i, recipe in enumerate(result["recipes"]):
+        assert recipe["within_tolerance"] == bool(reachable[i])
+        assert set(recipe["selected_colors"]) <= set(result["paint_set"])
+    
+    assert "error" in calculations_agent.tools[8](targets, user_colors, -1)  # find_covering_paint_set
+    assert calculations_agent.tools[8](targets, user_colors, 60, 3, "5")["error"] == "max_ms must be a number greater than 0"  # find_covering_paint_set
+    print(f"✅ {result['paint_count']} of {len(user_colors)} paints cover {int(reachable.sum())} targets")
+    
+    return True
+
 def test_parent_agent_pipeline():
     """Test the complete Parent Agent pipeline"""
     print("\n🧪 Testing Parent Agent Pipeline...")
@@ -190,6 +890,91 @@ def test_complete_pipeline():
     
     return result.get('success', False)
 
+def test_in_memory_pipeline():
+    """Test the complete pipeline on in-memory uploads: nothing written to disk, JSON-safe result"""
+    print("\n🧪 Testing In-Memory Pipeline...")
+    
+    import io
+    import tempfile
+    from PIL import Image
+    
+    uploads = []
+    for color in ((200, 30, 40), (20, 30, 200)):
+        buffer = io.BytesIO()
+        Image.fromarray(np.full((900, 1200, 3), color, dtype=np.uint8)).save(buffer, "JPEG")
+        uploads.append(buffer.getbuffer())  # memoryview over the encoded bytes
+    
+    with tempfile.TemporaryDirectory() as directory:
+        previous = os.getcwd()
+        os.chdir(directory)
+        try:
+            result = parent_agent.tools[3](uploads, {"r": 110, "g": 30, "b": 120}, False, None, None, "local")  # process_complete_paint_mixing_pipeline
+            backend = os.environ.get("SHADESMITH_SCANNER_BACKEND")
+            os.environ["SHADESMITH_SCANNER_BACKEND"] = "local"
+            try:
+                single = parent_agent.tools[0](uploads[0])  # process_image_pipeline
+            finally:
+                if backend is None:
+                    del os.environ["SHADESMITH_SCANNER_BACKEND"]
+                else:
+                    os.environ["SHADESMITH_SCANNER_BACKEND"] = backend
+            assert os.listdir(directory) == []
+        finally:
+            os.chdir(previous)
+    
+    # processed_image stays a name; the decoded image is described under its own key
+    assert single["success"], single.get("error")
+    json.dumps(single)
+    assert single["final_result"]["processed_image"] == "image_1"
+    assert single["final_result"]["decoded_image"]["width"] == 512
+    
+    assert result["success"], result.get("error")
+    json.dumps(result)
+    final_result = result["final_result"]
+    assert [step["input"] for step in result["pipeline_steps"][:2]] == [["image_1", "image_2"]] * 2
+    assert result["pipeline_steps"][0]["output"][0]["width"] == 512
+    assert final_result["paint_mixing_instructions"]["steps"][0]["percentage"] == 50.0
+    assert final_result["accuracy"]["level"] == "Excellent"
+    print(f"✅ {final_result['paint_mixing_instructions']['summary']}")
+    
+    return True
+
+def test_upload_ingestion():
+    """Test multipart parsing into bounded in-memory buffers, handed straight to the scanner"""
+    print("\n🧪 Testing Upload Ingestion...")
+    
+    import io
+    from PIL import Image
+    from werkzeug.test import EnvironBuilder
+    from werkzeug.exceptions import RequestEntityTooLarge
+    from agent.upload_ingestion import UploadRequest, BoundedSpool, MAX_UPLOAD_BYTES
+    
+    buffer = io.BytesIO()
+    Image.fromarray(np.full((600, 800, 3), (30, 160, 60), dtype=np.uint8)).save(buffer, "PNG")
+    environ = EnvironBuilder(method="POST", data={"files": (io.BytesIO(buffer.getvalue()), "swatch.png")}).get_environ()
+    upload = UploadRequest(environ).files["files"]
+    assert isinstance(upload.stream, BoundedSpool) and upload.stream.in_memory()
+    spool = BoundedSpool(spool_size=16)
+    spool.write(b"\0" * 32)
+    assert not spool.in_memory()
+    spool.close()
+    
+    result = rgb_scanner_agent.tools[1]([upload], "local")  # scan_rgb_from_multiple_images
+    assert result["success"], result.get("error")
+    assert result["scanned_results"][0]["image_path"] == "swatch.png"
+    assert result["scanned_results"][0]["primary_rgb"]["g"] == 160
+    
+    # An upload over the limit is refused while it streams in
+    environ = EnvironBuilder(method="POST", data={"files": (io.BytesIO(b"\0" * (MAX_UPLOAD_BYTES + 1)), "huge.png")}).get_environ()
+    try:
+        UploadRequest(environ).files
+        assert False, "oversized upload was accepted"
+    except RequestEntityTooLarge:
+        pass
+    print("✅ Uploads buffered in memory; oversized upload rejected")
+    
+    return True
+
 def test_project_info():
     """Test project info function"""
     print("\n🧪 Testing Project Info...")
@@ -210,9 +995,34 @@ def main():
     tests = [
         ("Image Converter Agent", test_image_converter_agent),
         ("RGB Scanner Agent", test_rgb_scanner_agent),
+        ("Local Scanner Backend", test_local_scanner_backend),
+        ("Shared Vision Client", test_shared_vision_client),
+        ("Analysis Resolution", test_analysis_resolution),
         ("Calculations Agent", test_calculations_agent),
+        ("Vectorized Mixing Engine", test_vectorized_mixing_engine),
+        ("Continuous Mixing Solver", test_continuous_mixing_solver),
+        ("Palette Subset Solver", test_palette_subset_solver),
+        ("Mix Lattice Lookup", test_mix_lattice_lookup),
+        ("Batch Color Mixing", test_batch_color_mixing),
+        ("Mix Result Cache", test_mix_result_cache),
+        ("Perceptual Metric", test_perceptual_metric),
+        ("Kubelka-Munk Model", test_kubelka_munk_model),
+        ("Compact Colors", test_compact_colors),
+        ("Simplex Lattice", test_simplex_lattice),
+        ("Branch-and-Bound Solver", test_branch_bound_solver),
+        ("Warm-Started Sessions", test_warm_started_session),
+        ("Top-k Alternative Recipes", test_top_k_recipes),
+        ("Search Budget", test_search_budget),
+        ("Parallel Solver", test_parallel_solver),
+        ("Batch RGB to CMYK", test_rgb_to_cmyk_batch),
+        ("Palette Gamut", test_palette_gamut),
+        ("Catalog Paint Suggestions", test_catalog_suggestions),
+        ("Nearest Catalog Paints", test_nearest_paints),
+        ("Covering Paint Set", test_covering_paint_set),
         ("Parent Agent Pipeline", test_parent_agent_pipeline),
         ("Complete Pipeline", test_complete_pipeline),
+        ("In-Memory Pipeline", test_in_memory_pipeline),
+        ("Upload Ingestion", test_upload_ingestion),
         ("Project Info", test_project_info)
     ]
     